@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Banner grabbing per IP Scanner
+Lettura dei primi byte inviati dai servizi sulle porte aperte
+"""
+
+import asyncio
+import errno
+import heapq
+import itertools
+import selectors
+import socket
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+# Codici di connect_ex di una connessione non bloccante avviata
+_ERRNO_AVVIATA = {0, errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN, errno.EALREADY}
+
+# Richieste inviate ai servizi che non parlano per primi
+SONDE = {
+    80: b"HEAD / HTTP/1.0\r\n\r\n",
+    8000: b"HEAD / HTTP/1.0\r\n\r\n",
+    8008: b"HEAD / HTTP/1.0\r\n\r\n",
+    8080: b"HEAD / HTTP/1.0\r\n\r\n",
+    8888: b"HEAD / HTTP/1.0\r\n\r\n",
+}
+
+
+def clean_banner(dati):
+    """Testo leggibile di un banner (None se vuoto)"""
+    testo = dati.decode("utf-8", "replace").replace("\r\n", "\n").replace("\r", "\n")
+    testo = "".join(c if c.isprintable() or c in "\n\t" else "." for c in testo).strip()
+    return testo or None
+
+
+def _famiglia(ip):
+    return socket.AF_INET6 if ":" in ip else socket.AF_INET
+
+
+class BannerGrabber:
+    """Lettura dei banner con un unico thread e un selettore.
+
+    Le connessioni non occupano i worker del pool delle sonde: un solo
+    thread le porta avanti tutte, al massimo max_inflight alla volta,
+    e le altre attendono in coda. Ogni lettura ha una scadenza propria
+    e restituisce quello che è arrivato entro il limite.
+    """
+
+    def __init__(self, max_bytes=256, timeout=2.0, max_inflight=256):
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.max_inflight = max_inflight
+
+        self._selector = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ)
+
+        self._lock = threading.Lock()
+        self._waiting = deque()
+        # socket -> [future, sonda, dati letti]
+        self._inflight = {}
+        self._timers = []
+        self._counter = itertools.count()
+        self._closed = False
+        self._thread = threading.Thread(target=self._loop, name="banner", daemon=True)
+        self._thread.start()
+
+    def grab(self, ip, porta):
+        """Accoda la lettura del banner; la Future restituisce il testo o None"""
+        future = Future()
+        with self._lock:
+            self._waiting.append((str(ip), porta, future))
+        self._wake()
+        return future
+
+    def close(self):
+        """Ferma il thread; le letture non completate restituiscono None"""
+        self._closed = True
+        self._wake()
+        self._thread.join()
+        self._selector.close()
+        self._wake_r.close()
+        self._wake_w.close()
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b"\x00")
+        except OSError:
+            pass
+
+    def _start_waiting(self):
+        with self._lock:
+            da_avviare = []
+            while self._waiting and len(self._inflight) + len(da_avviare) < self.max_inflight:
+                da_avviare.append(self._waiting.popleft())
+        for ip, porta, future in da_avviare:
+            try:
+                sock = socket.socket(_famiglia(ip), socket.SOCK_STREAM)
+            except OSError:
+                future.set_result(None)
+                continue
+            sock.setblocking(False)
+            if sock.connect_ex((ip, porta)) not in _ERRNO_AVVIATA:
+                sock.close()
+                future.set_result(None)
+                continue
+            self._inflight[sock] = [future, SONDE.get(porta), bytearray()]
+            self._selector.register(sock, selectors.EVENT_WRITE)
+            heapq.heappush(self._timers, (time.monotonic() + self.timeout, next(self._counter), sock))
+
+    def _finish(self, sock):
+        voce = self._inflight.pop(sock, None)
+        if voce is None:
+            return
+        self._selector.unregister(sock)
+        sock.close()
+        voce[0].set_result(clean_banner(bytes(voce[2])))
+
+    def _handle(self, sock, eventi):
+        voce = self._inflight[sock]
+        if eventi & selectors.EVENT_WRITE:
+            # Connessione completata (o fallita): si passa alla lettura
+            if sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) != 0:
+                self._finish(sock)
+                return
+            if voce[1]:
+                try:
+                    sock.send(voce[1])
+                except OSError:
+                    self._finish(sock)
+                    return
+            self._selector.modify(sock, selectors.EVENT_READ)
+            return
+        try:
+            dati = sock.recv(self.max_bytes - len(voce[2]))
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            dati = b""
+        voce[2] += dati
+        if not dati or len(voce[2]) >= self.max_bytes:
+            self._finish(sock)
+
+    def _expire(self):
+        adesso = time.monotonic()
+        while self._timers and self._timers[0][0] <= adesso:
+            _, _, sock = heapq.heappop(self._timers)
+            self._finish(sock)
+
+    def _loop(self):
+        while not self._closed:
+            self._start_waiting()
+            attesa = max(0, self._timers[0][0] - time.monotonic()) if self._timers else None
+            for chiave, eventi in self._selector.select(attesa):
+                if chiave.fileobj is self._wake_r:
+                    try:
+                        while self._wake_r.recv(4096):
+                            pass
+                    except (BlockingIOError, InterruptedError):
+                        pass
+                elif chiave.fileobj in self._inflight:
+                    self._handle(chiave.fileobj, eventi)
+            self._expire()
+        for sock in list(self._inflight):
+            self._finish(sock)
+        with self._lock:
+            in_attesa, self._waiting = self._waiting, deque()
+        for _, _, future in in_attesa:
+            future.set_result(None)
+
+
+async def _leggi_banner(ip, porta, dati, max_bytes):
+    reader, writer = await asyncio.open_connection(ip, porta)
+    try:
+        if porta in SONDE:
+            writer.write(SONDE[porta])
+        while len(dati) < max_bytes:
+            parte = await reader.read(max_bytes - len(dati))
+            if not parte:
+                break
+            dati += parte
+    finally:
+        writer.close()
+
+
+async def grab_banner_async(ip, porta, max_bytes=256, timeout=2.0):
+    """Banner di una porta letto sull'event loop corrente (None se assente).
+
+    Allo scadere del timeout restituisce quello che è già arrivato.
+    """
+    dati = bytearray()
+    try:
+        await asyncio.wait_for(_leggi_banner(ip, porta, dati, max_bytes), timeout)
+    except (OSError, asyncio.TimeoutError):
+        pass
+    return clean_banner(bytes(dati))
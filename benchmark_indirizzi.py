@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark per IP Scanner
+Costo per indirizzo della generazione dei target: oggetti ipaddress contro interi
+"""
+
+import argparse
+import ipaddress
+import time
+
+from target_set import TargetSet
+
+# Sonde TCP del rilevamento host (80, 443, 22, 21)
+SONDE_RILEVAMENTO = 4
+# Porte scansionate di default dalla versione precedente
+PORTE_PRECEDENTI = 18
+
+
+def percorso_oggetti(rete, porte):
+    """Percorso precedente: un IPv4Address per host, convertito in testo a ogni uso.
+
+    Ogni sonda di rilevamento, ogni sonda di porta, la risoluzione del
+    nome (gethostbyaddr) e il risultato chiamavano str(ip).
+    """
+    conversioni = SONDE_RILEVAMENTO + porte + 2
+    for ip in ipaddress.ip_network(rete, strict=False).hosts():
+        for _ in range(conversioni):
+            str(ip)
+
+
+def percorso_interi(rete, porte):
+    """Percorso attuale: chiavi intere, testo prodotto una sola volta e riusato"""
+    for _ in TargetSet.parse(rete).iter_slice():
+        pass
+
+
+def misura(funzione, rete, porte, ripetizioni):
+    """Tempo minimo (secondi) su più ripetizioni"""
+    migliore = None
+    for _ in range(ripetizioni):
+        inizio = time.perf_counter()
+        funzione(rete, porte)
+        durata = time.perf_counter() - inizio
+        migliore = durata if migliore is None else min(migliore, durata)
+    return migliore
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del costo per indirizzo dei target')
+    parser.add_argument('-t', '--target', default='10.0.0.0/16', help='Rete da generare (default: 10.0.0.0/16)')
+    parser.add_argument('-p', '--ports', type=int, default=PORTE_PRECEDENTI,
+                        help=f'Porte sondate per host (default: {PORTE_PRECEDENTI})')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='Ripetizioni, si tiene la migliore (default: 3)')
+    args = parser.parse_args()
+
+    indirizzi = len(TargetSet.parse(args.target))
+    print(f"📊 Indirizzi generati per ripetizione: {indirizzi} ({args.ports} porte per host)")
+    print("-" * 60)
+
+    oggetti = misura(percorso_oggetti, args.target, args.ports, args.repeat)
+    interi = misura(percorso_interi, args.target, args.ports, args.repeat)
+    print(f"🐢 Oggetti ipaddress: {oggetti:.3f} s ({oggetti / indirizzi * 1e9:.0f} ns/indirizzo)")
+    print(f"⚡ Interi:            {interi:.3f} s ({interi / indirizzi * 1e9:.0f} ns/indirizzo)")
+    print(f"📈 Accelerazione: {oggetti / interi:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
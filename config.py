@@ -59,5 +59,11 @@ WEB_PORTS = [80, 443, 8080, 8443, 3000, 5000, 8000]
 # Porte per database comuni
 DB_PORTS = [3306, 5432, 1433, 5984, 27017]
 
+# Porte UDP comuni (DNS, DHCP, TFTP, NTP, NetBIOS, SNMP, IKE)
+UDP_PORTS = [53, 67, 69, 123, 137, 161, 500]
+
+# Porte con servizi TLS (HTTPS, SMTPS, LDAPS, IMAPS, POP3S)
+TLS_PORTS = [443, 465, 636, 993, 995, 8443]
+
 # Porte per servizi di rete comuni
 NETWORK_PORTS = [21, 22, 23, 25, 53, 110, 143, 993, 995]
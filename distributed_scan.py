@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Scansione distribuita per IP Scanner
+Un coordinatore HTTP assegna shard (indirizzi x porte) a worker su più nodi
+"""
+
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import config
+from port_spec import PortSet, parse_port_spec
+from sharded_scan import scanner_settings, split_range
+from target_set import TargetSet, address_key, as_target_set
+
+# Risultati inviati al coordinatore per richiesta
+DIMENSIONE_LOTTO = 256
+
+# Anche le reti piccole vengono divise in più shard per usare tutti i worker
+SHARD_MINIMI = 32
+
+
+def split_ports(porte, per_shard):
+    """Divide un insieme di porte in specifiche di al massimo per_shard porte"""
+    gruppi = []
+    gruppo = []
+    for porta in porte:
+        gruppo.append(porta)
+        if len(gruppo) == per_shard:
+            gruppi.append(PortSet(gruppo).to_spec())
+            gruppo = []
+    if gruppo:
+        gruppi.append(PortSet(gruppo).to_spec())
+    return gruppi
+
+
+class ScanCoordinator:
+    """Coordinatore di una scansione distribuita.
+
+    I target (rete o TargetSet) vengono divisi in shard (intervalli di
+    indirizzi x gruppo di porte) assegnati in lease ai worker tramite un piccolo protocollo
+    JSON su HTTP:
+
+    - POST /lease      {worker}                       -> {shard} | {wait} | {done}
+    - POST /heartbeat  {worker, shard}                -> rinnova il lease
+    - POST /results    {worker, shard, results, final}
+
+    Un lease non rinnovato entro lease_timeout secondi (worker morto o
+    irraggiungibile) rimette lo shard in coda. I risultati dei diversi
+    gruppi di porte vengono uniti per IP, quindi i lotti duplicati di uno
+    shard riassegnato sono innocui.
+    """
+
+    def __init__(self, target, porte=None, host='127.0.0.1', port=8700, lease_timeout=30.0,
+                 indirizzi_per_shard=4096, porte_per_shard=1024):
+        targets = as_target_set(target)
+        self.target = str(targets)
+        porte = porte if porte else config.PORTE_COMUNI
+        self.host_totali = len(targets)
+        parti = max(-(-self.host_totali // indirizzi_per_shard), min(SHARD_MINIMI, self.host_totali // 16), 1)
+        self.lease_timeout = lease_timeout
+
+        self.shards = {}
+        for inizio, fine in (split_range(0, self.host_totali - 1, parti) if targets else []):
+            intervalli = targets.slice(inizio, fine + 1).ranges()
+            for spec in split_ports(porte, porte_per_shard):
+                self.shards[len(self.shards)] = {
+                    'id': len(self.shards),
+                    'ranges': intervalli,
+                    'ports': spec,
+                }
+
+        self._lock = threading.Lock()
+        self._coda = deque(self.shards)
+        # shard -> (worker, scadenza del lease)
+        self._lease = {}
+        self._completati = set()
+        # ip -> risultato unito di tutti i gruppi di porte
+        self.hosts = {}
+        self._finito = threading.Event()
+        self._server = ThreadingHTTPServer((host, port), self._crea_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        if host in ('0.0.0.0', '::'):
+            host = '127.0.0.1'
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Avvia il server HTTP in un thread"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="coordinatore", daemon=True)
+        self._thread.start()
+        if not self.shards:
+            self._finito.set()
+
+    def wait(self, timeout=None):
+        """Attende il completamento di tutti gli shard (True se completati)"""
+        scadenza = time.monotonic() + timeout if timeout is not None else None
+        while not self._finito.wait(1.0):
+            self._scadi_lease()
+            if scadenza is not None and time.monotonic() >= scadenza:
+                return False
+        return True
+
+    def stop(self):
+        """Ferma il server HTTP"""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def risultati(self):
+        """Host attivi uniti, ordinati per indirizzo"""
+        with self._lock:
+            return sorted(self.hosts.values(), key=lambda h: address_key(h['ip']))
+
+    def merge_into(self, report):
+        """Aggiunge gli host attivi uniti a un ReportManager"""
+        for host in self.risultati():
+            report.add_result(ip=host['ip'], active=True, hostname=host['hostname'],
+                              open_ports=host['porte_aperte'], banners=host.get('banner'),
+                              certificates=host.get('tls'))
+
+    # ------------------------------------------------------------------
+    # Gestione shard (chiamata dai thread del server HTTP)
+    # ------------------------------------------------------------------
+
+    def _scadi_lease(self):
+        adesso = time.monotonic()
+        with self._lock:
+            for shard, (worker, scadenza) in list(self._lease.items()):
+                if scadenza <= adesso:
+                    del self._lease[shard]
+                    self._coda.appendleft(shard)
+                    print(f"⚠️  Lease dello shard {shard} scaduto ({worker}), rimesso in coda")
+
+    def _assegna(self, worker):
+        self._scadi_lease()
+        with self._lock:
+            while self._coda:
+                shard = self._coda.popleft()
+                if shard in self._completati:
+                    continue
+                self._lease[shard] = (worker, time.monotonic() + self.lease_timeout)
+                return {'shard': self.shards[shard], 'heartbeat': self.lease_timeout / 3}
+            if self._lease:
+                # Shard ancora in lavorazione: potrebbero tornare in coda
+                return {'wait': 1.0}
+            return {'done': True}
+
+    def _rinnova(self, worker, shard):
+        with self._lock:
+            if shard in self._lease:
+                self._lease[shard] = (worker, time.monotonic() + self.lease_timeout)
+
+    def _ricevi(self, worker, shard, risultati, finale):
+        with self._lock:
+            for risultato in risultati:
+                host = self.hosts.get(risultato['ip'])
+                if host is None:
+                    self.hosts[risultato['ip']] = {
+                        'ip': risultato['ip'],
+                        'hostname': risultato.get('hostname', 'N/A'),
+                        'porte_aperte': sorted(risultato['porte_aperte']),
+                        'porte_filtrate': sorted(risultato.get('porte_filtrate', [])),
+                        'attivo': True,
+                    }
+                    if 'protocollo' in risultato:
+                        self.hosts[risultato['ip']]['protocollo'] = risultato['protocollo']
+                    for fase in ('banner', 'tls'):
+                        if fase in risultato:
+                            # Le chiavi arrivano come stringhe dal JSON
+                            self.hosts[risultato['ip']][fase] = {
+                                int(porta): valore for porta, valore in risultato[fase].items()}
+                    continue
+                host['porte_aperte'] = sorted(set(host['porte_aperte']) | set(risultato['porte_aperte']))
+                if 'porte_filtrate' in risultato:
+                    # Una porta che ha risposto in un altro shard non è più solo filtrata
+                    filtrate = set(host.get('porte_filtrate', [])) | set(risultato['porte_filtrate'])
+                    host['porte_filtrate'] = sorted(filtrate - set(host['porte_aperte']))
+                for fase in ('banner', 'tls'):
+                    for porta, valore in risultato.get(fase, {}).items():
+                        host.setdefault(fase, {})[int(porta)] = valore
+                if host['hostname'] == 'N/A':
+                    host['hostname'] = risultato.get('hostname', 'N/A')
+            if not finale:
+                if shard in self._lease:
+                    self._lease[shard] = (worker, time.monotonic() + self.lease_timeout)
+                return
+            if shard in self._completati:
+                return
+            self._completati.add(shard)
+            self._lease.pop(shard, None)
+            completati = len(self._completati)
+            if completati == len(self.shards):
+                self._finito.set()
+        print(f"✅ Shard {completati}/{len(self.shards)} completato da {worker}")
+
+    def _crea_handler(self):
+        coordinatore = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                try:
+                    lunghezza = int(self.headers.get('Content-Length', 0))
+                    dati = json.loads(self.rfile.read(lunghezza) or b"{}")
+                    worker = str(dati.get('worker', self.client_address[0]))
+                    if self.path == '/lease':
+                        risposta = coordinatore._assegna(worker)
+                    elif self.path == '/heartbeat':
+                        coordinatore._rinnova(worker, dati['shard'])
+                        risposta = {}
+                    elif self.path == '/results':
+                        coordinatore._ricevi(worker, dati['shard'], dati.get('results', []),
+                                             dati.get('final', False))
+                        risposta = {}
+                    else:
+                        self.send_error(404)
+                        return
+                except (ValueError, KeyError, TypeError) as e:
+                    self.send_error(400, str(e))
+                    return
+                corpo = json.dumps(risposta).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, formato, *argomenti):
+                pass
+
+        return Handler
+
+
+def _post(url, percorso, dati, tentativi=3, timeout=10):
+    """Invia una richiesta JSON al coordinatore, ritentando gli errori di rete"""
+    corpo = json.dumps(dati, ensure_ascii=False).encode('utf-8')
+    for tentativo in range(tentativi):
+        richiesta = urllib.request.Request(url + percorso, data=corpo,
+                                           headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(richiesta, timeout=timeout) as risposta:
+                return json.loads(risposta.read() or b"{}")
+        except (urllib.error.URLError, OSError):
+            if tentativo == tentativi - 1:
+                raise
+            time.sleep(1 + tentativo)
+
+
+def run_worker(url, scanner, nome=None):
+    """Esegue gli shard assegnati dal coordinatore finché ce ne sono.
+
+    Gli host attivi vengono inviati a lotti man mano che vengono trovati;
+    un thread di heartbeat rinnova il lease anche durante gli host lenti.
+    Restituisce il numero di shard completati.
+    """
+    url = url.rstrip('/')
+    nome = nome or f"{socket.gethostname()}-{os.getpid()}"
+    completati = 0
+    while True:
+        try:
+            assegnazione = _post(url, '/lease', {'worker': nome})
+        except (urllib.error.URLError, OSError):
+            # Coordinatore terminato o irraggiungibile
+            break
+        if assegnazione.get('done'):
+            break
+        if 'wait' in assegnazione:
+            time.sleep(assegnazione['wait'])
+            continue
+
+        shard = assegnazione['shard']
+        porte = parse_port_spec(shard['ports'])
+        targets = TargetSet(shard['ranges'])
+
+        fermo = threading.Event()
+
+        def heartbeat(intervallo=assegnazione.get('heartbeat', 10)):
+            while not fermo.wait(intervallo):
+                try:
+                    _post(url, '/heartbeat', {'worker': nome, 'shard': shard['id']}, tentativi=1)
+                except (urllib.error.URLError, OSError):
+                    pass
+
+        thread = threading.Thread(target=heartbeat, name="heartbeat", daemon=True)
+        thread.start()
+        try:
+            lotto = []
+            for risultato in scanner.itera_host(iter(targets), porte, target=targets.supernet()):
+                lotto.append(risultato)
+                if len(lotto) >= DIMENSIONE_LOTTO:
+                    _post(url, '/results', {'worker': nome, 'shard': shard['id'], 'results': lotto})
+                    lotto = []
+            _post(url, '/results', {'worker': nome, 'shard': shard['id'], 'results': lotto, 'final': True})
+            completati += 1
+        except (urllib.error.URLError, OSError) as e:
+            # Il lease scadrà e lo shard verrà assegnato a un altro worker
+            print(f"⚠️  Invio risultati fallito per lo shard {shard['id']}: {e}")
+        finally:
+            fermo.set()
+            thread.join()
+    return completati
+
+
+def _processo_worker(url, impostazioni, server_dns):
+    """Worker locale avviato come processo separato"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from ip_scanner import IPScanner
+
+    scanner = IPScanner()
+    for nome, valore in impostazioni.items():
+        setattr(scanner, nome, valore)
+    if server_dns:
+        scanner.resolver.set_server(*server_dns)
+    run_worker(url, scanner)
+
+
+def start_local_workers(url, scanner, numero):
+    """Avvia numero worker locali (processi) collegati al coordinatore"""
+    impostazioni = scanner_settings(scanner)
+    impostazioni['thread_max'] = max(1, scanner.thread_max // numero)
+    if scanner.pps:
+        impostazioni['pps'] = scanner.pps / numero
+    server_dns = (scanner.resolver.server, scanner.resolver.port) if scanner.resolver.server else None
+    contesto = multiprocessing.get_context('spawn')
+    processi = []
+    for _ in range(numero):
+        processo = contesto.Process(target=_processo_worker, args=(url, impostazioni, server_dns), daemon=True)
+        processo.start()
+        processi.append(processo)
+    return processi
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Resolver DNS inverso per IP Scanner
+Pool di risoluzione condiviso con scadenze per richiesta e cache TTL/LRU
+"""
+
+import heapq
+import ipaddress
+import itertools
+import random
+import select
+import socket
+import struct
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+
+DNS_TYPE_PTR = 12
+DNS_CLASS_IN = 1
+
+
+def reverse_pointer(ip):
+    """Nome PTR (in-addr.arpa / ip6.arpa) di un indirizzo testuale"""
+    if ":" not in ip:
+        return ".".join(reversed(ip.split("."))) + ".in-addr.arpa"
+    return ipaddress.ip_address(ip).reverse_pointer
+
+
+def build_ptr_query(query_id, name):
+    """Costruisce una query DNS PTR (ricorsiva) per il nome indicato"""
+    header = struct.pack("!HHHHHH", query_id, 0x0100, 1, 0, 0, 0)
+    qname = b"".join(bytes([len(label)]) + label.encode("ascii")
+                     for label in name.rstrip(".").split(".")) + b"\x00"
+    return header + qname + struct.pack("!HH", DNS_TYPE_PTR, DNS_CLASS_IN)
+
+
+def _read_name(data, pos):
+    """Legge un nome DNS (con puntatori di compressione) da data[pos:]"""
+    labels = []
+    fine = None
+    salti = 0
+    while True:
+        if pos >= len(data):
+            raise ValueError("nome DNS troncato")
+        lunghezza = data[pos]
+        if lunghezza & 0xC0 == 0xC0:
+            if pos + 1 >= len(data):
+                raise ValueError("puntatore DNS troncato")
+            if fine is None:
+                fine = pos + 2
+            pos = ((lunghezza & 0x3F) << 8) | data[pos + 1]
+            salti += 1
+            if salti > 64:
+                raise ValueError("ciclo di puntatori DNS")
+            continue
+        if lunghezza == 0:
+            pos += 1
+            break
+        labels.append(data[pos + 1:pos + 1 + lunghezza].decode("ascii", "replace"))
+        pos += 1 + lunghezza
+    return ".".join(labels), (fine if fine is not None else pos)
+
+
+def parse_ptr_response(data):
+    """Analizza una risposta DNS PTR.
+
+    Restituisce la tupla (id, nome richiesto, rcode, hostname) con
+    hostname None se la risposta non contiene record PTR.
+    Solleva ValueError se il pacchetto è malformato.
+    """
+    if len(data) < 12:
+        raise ValueError("risposta DNS troppo corta")
+    query_id, flags, qdcount, ancount, _, _ = struct.unpack("!HHHHHH", data[:12])
+    if qdcount != 1:
+        raise ValueError("risposta DNS senza domanda")
+    qname, pos = _read_name(data, 12)
+    pos += 4
+
+    hostname = None
+    for _ in range(ancount):
+        _, pos = _read_name(data, pos)
+        if pos + 10 > len(data):
+            raise ValueError("record DNS troncato")
+        tipo, _, _, rdlength = struct.unpack("!HHIH", data[pos:pos + 10])
+        pos += 10
+        if tipo == DNS_TYPE_PTR and hostname is None:
+            hostname, _ = _read_name(data, pos)
+        pos += rdlength
+    return query_id, qname, flags & 0x000F, hostname
+
+
+class PTRQueryPipeline:
+    """Query PTR in pipeline via UDP verso un resolver DNS configurato.
+
+    Un unico socket e un unico thread inviano le query, abbinano le
+    risposte per ID (e nome richiesto) e ritrasmettono quelle scadute.
+    """
+
+    def __init__(self, server, port=53, timeout=2.0, retries=2, max_inflight=4096):
+        self.server = server
+        self.port = port
+        self.retries = retries
+        self.max_inflight = min(max_inflight, 60000)
+        # Il timeout complessivo è diviso tra il primo invio e i tentativi
+        self.attempt_timeout = timeout / (retries + 1)
+
+        famiglia = socket.AF_INET6 if ipaddress.ip_address(server).version == 6 else socket.AF_INET
+        self._sock = socket.socket(famiglia, socket.SOCK_DGRAM)
+        self._sock.connect((server, port))
+        self._sock.setblocking(False)
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+
+        self._lock = threading.Lock()
+        self._waiting = deque()
+        # id -> [nome, callback, tentativi rimasti, generazione]
+        self._inflight = {}
+        self._timers = []
+        # Generazione globale: un timer vecchio non tocca un ID riassegnato
+        self._generation = itertools.count(1)
+        self._closed = False
+        self._thread = threading.Thread(target=self._loop, name="dns-ptr", daemon=True)
+        self._thread.start()
+
+    def query(self, ip, callback):
+        """Accoda la query PTR di un IP; callback(hostname o None) a risposta"""
+        nome = reverse_pointer(ip)
+        with self._lock:
+            self._waiting.append((nome, callback))
+        self._wake()
+
+    def close(self):
+        """Ferma il thread e chiude il socket"""
+        self._closed = True
+        self._wake()
+        self._thread.join()
+        self._sock.close()
+        self._wake_r.close()
+        self._wake_w.close()
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b"\x00")
+        except OSError:
+            pass
+
+    def _send(self, query_id, voce):
+        voce[3] = next(self._generation)
+        try:
+            self._sock.send(build_ptr_query(query_id, voce[0]))
+        except OSError:
+            # Buffer pieno o server irraggiungibile: ci pensa la ritrasmissione
+            pass
+        heapq.heappush(self._timers, (time.monotonic() + self.attempt_timeout, query_id, voce[3]))
+
+    def _start_waiting(self):
+        with self._lock:
+            while self._waiting and len(self._inflight) < self.max_inflight:
+                nome, callback = self._waiting.popleft()
+                query_id = random.getrandbits(16)
+                while query_id in self._inflight:
+                    query_id = random.getrandbits(16)
+                voce = [nome, callback, self.retries, 0]
+                self._inflight[query_id] = voce
+                self._send(query_id, voce)
+
+    def _receive(self):
+        completate = []
+        while True:
+            try:
+                data = self._sock.recv(4096)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                # ICMP port unreachable dal server: le query restano in attesa
+                break
+            try:
+                query_id, qname, rcode, hostname = parse_ptr_response(data)
+            except ValueError:
+                continue
+            with self._lock:
+                voce = self._inflight.get(query_id)
+                if voce is None or voce[0].lower() != qname.lower():
+                    continue
+                del self._inflight[query_id]
+            completate.append((voce[1], hostname if rcode == 0 else None))
+        return completate
+
+    def _expire(self):
+        completate = []
+        adesso = time.monotonic()
+        with self._lock:
+            while self._timers and self._timers[0][0] <= adesso:
+                _, query_id, generazione = heapq.heappop(self._timers)
+                voce = self._inflight.get(query_id)
+                if voce is None or voce[3] != generazione:
+                    continue
+                if voce[2] > 0:
+                    voce[2] -= 1
+                    self._send(query_id, voce)
+                else:
+                    del self._inflight[query_id]
+                    completate.append((voce[1], None))
+        return completate
+
+    def _loop(self):
+        while not self._closed:
+            self._start_waiting()
+            with self._lock:
+                attesa = self._timers[0][0] - time.monotonic() if self._timers else None
+            if attesa is not None and attesa < 0:
+                attesa = 0
+            pronti, _, _ = select.select([self._sock, self._wake_r], [], [], attesa)
+            if self._wake_r in pronti:
+                try:
+                    while self._wake_r.recv(4096):
+                        pass
+                except (BlockingIOError, InterruptedError):
+                    pass
+            completate = self._receive() if self._sock in pronti else []
+            completate.extend(self._expire())
+            for callback, hostname in completate:
+                callback(hostname)
+
+
+class ReverseResolver:
+    def __init__(self, max_workers=32, timeout=2.0, ttl=300, negative_ttl=60, max_entries=65536):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._pending = {}
+        self._executor = None
+        self._pipeline = None
+        # Server DNS configurato con set_server (None = resolver di sistema)
+        self.server = None
+        self.port = 53
+
+        # Scadenze delle richieste in corso, gestite da un unico thread
+        self._deadlines = []
+        self._deadline_counter = itertools.count()
+        self._deadline_cv = threading.Condition(threading.Lock())
+        self._deadline_thread = None
+
+    def set_server(self, server, port=53, retries=2):
+        """Invia le query PTR direttamente al server DNS indicato (UDP).
+
+        Con server None si torna al resolver di sistema (gethostbyaddr).
+        """
+        with self._lock:
+            precedente = self._pipeline
+            self._pipeline = None
+            if server:
+                self._pipeline = PTRQueryPipeline(server, port, self.timeout, retries)
+            self.server = server or None
+            self.port = port
+        if precedente is not None:
+            precedente.close()
+
+    def lookup(self, ip):
+        """Risoluzione PTR bloccante: restituisce l'hostname o None"""
+        try:
+            return socket.gethostbyaddr(ip)[0]
+        except (OSError, UnicodeError):
+            return None
+
+    def resolve_async(self, ip):
+        """Avvia la risoluzione di un IP e restituisce un Future.
+
+        Il Future si completa con l'hostname (o None) al più tardi dopo
+        timeout secondi; una risoluzione più lenta continua in background
+        e aggiorna comunque la cache. Richieste contemporanee per lo
+        stesso IP condividono la stessa risoluzione, ma ogni chiamante
+        riceve un proprio Future: annullarlo non tocca gli altri.
+        """
+        ip = str(ip)
+        adesso = time.monotonic()
+        future = Future()
+        with self._lock:
+            voce = self._cache.get(ip)
+            if voce is not None and voce[1] > adesso:
+                self._cache.move_to_end(ip)
+                future.set_result(voce[0])
+                return future
+            condiviso = self._pending.get(ip)
+            nuovo = condiviso is None
+            if nuovo:
+                condiviso = Future()
+                self._pending[ip] = condiviso
+
+        if nuovo:
+            # Completato (anche per scadenza) non è più condivisibile
+            condiviso.add_done_callback(lambda _: self._release(ip, condiviso))
+        condiviso.add_done_callback(lambda f: self._complete(future, f.result()))
+        if nuovo:
+            pipeline = self._pipeline
+            if pipeline is not None:
+                pipeline.query(ip, lambda hostname: self._store(ip, hostname, condiviso))
+            else:
+                self._get_executor().submit(self._run_lookup, ip, condiviso)
+            self._schedule_deadline(condiviso, adesso + self.timeout)
+        return future
+
+    def resolve(self, ip):
+        """Risolve un IP attendendo al massimo timeout secondi"""
+        return self.resolve_async(ip).result()
+
+    def clear_cache(self):
+        """Svuota la cache delle risoluzioni"""
+        with self._lock:
+            self._cache.clear()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix="dns")
+            return self._executor
+
+    def _run_lookup(self, ip, future):
+        self._store(ip, self.lookup(ip), future)
+
+    def _store(self, ip, hostname, future):
+        ttl = self.ttl if hostname else self.negative_ttl
+        with self._lock:
+            self._cache[ip] = (hostname, time.monotonic() + ttl)
+            self._cache.move_to_end(ip)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        self._complete(future, hostname)
+
+    def _release(self, ip, condiviso):
+        with self._lock:
+            # Una risoluzione scaduta può essere già stata sostituita da una nuova
+            if self._pending.get(ip) is condiviso:
+                del self._pending[ip]
+
+    def _complete(self, future, hostname):
+        try:
+            future.set_result(hostname)
+        except InvalidStateError:
+            # Già completato dalla scadenza o annullato dal chiamante
+            pass
+
+    def _schedule_deadline(self, future, deadline):
+        with self._deadline_cv:
+            heapq.heappush(self._deadlines, (deadline, next(self._deadline_counter), future))
+            if self._deadline_thread is None:
+                self._deadline_thread = threading.Thread(target=self._expire_deadlines,
+                                                         name="dns-scadenze", daemon=True)
+                self._deadline_thread.start()
+            self._deadline_cv.notify()
+
+    def _expire_deadlines(self):
+        """Completa con None le richieste che superano la scadenza"""
+        while True:
+            with self._deadline_cv:
+                while not self._deadlines:
+                    self._deadline_cv.wait()
+                deadline, _, future = self._deadlines[0]
+                attesa = deadline - time.monotonic()
+                if attesa > 0:
+                    self._deadline_cv.wait(attesa)
+                    continue
+                heapq.heappop(self._deadlines)
+            self._complete(future, None)
+
+
+_shared_resolver = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_resolver():
+    """Restituisce il resolver condiviso da scanner e report manager"""
+    global _shared_resolver
+    with _shared_lock:
+        if _shared_resolver is None:
+            _shared_resolver = ReverseResolver()
+        return _shared_resolver
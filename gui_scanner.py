@@ -21,12 +21,17 @@ import psutil
 # Importa il motore di scansione
 from ip_scanner import IPScanner
 from config import PORTE_COMUNI, WEB_PORTS, DB_PORTS, NETWORK_PORTS
+from port_spec import parse_port_spec
 from report_manager import ReportManager
+from scan_checkpoint import ScanCheckpoint
 
 # Configura il tema scuro
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
 
+# File di checkpoint delle scansioni di rete (ripresa dopo interruzioni)
+CHECKPOINT_FILE = "scan_checkpoint.json"
+
 class IPScannerGUI:
     def __init__(self):
         # Finestra principale
@@ -563,7 +568,7 @@ class IPScannerGUI:
         if mode in ["custom", "range"]:
             self.custom_entry.configure(state="normal")
             if mode == "custom":
-                self.custom_entry.configure(placeholder_text="es: 80,443,22,3306")
+                self.custom_entry.configure(placeholder_text="es: 80,443,22,3306 o top100,web,!8080")
             else:  # range
                 self.custom_entry.configure(placeholder_text="es: 1-1000")
         else:
@@ -632,22 +637,9 @@ class IPScannerGUI:
             return DB_PORTS
         elif mode == "rete":
             return NETWORK_PORTS
-        elif mode == "custom":
-            ports_str = self.custom_ports_var.get().strip()
-            try:
-                return [int(p.strip()) for p in ports_str.split(",")]
-            except ValueError:
-                raise ValueError("Formato porte non valido")
-        elif mode == "range":
-            range_str = self.custom_ports_var.get().strip()
-            try:
-                if "-" in range_str:
-                    start, end = map(int, range_str.split("-"))
-                    return list(range(start, end + 1))
-                else:
-                    return [int(range_str)]
-            except ValueError:
-                raise ValueError("Formato range non valido")
+        elif mode in ["custom", "range"]:
+            # Stesso parser della CLI: porte, range, profili ed esclusioni
+            return parse_port_spec(self.custom_ports_var.get().strip())
                 
         return PORTE_COMUNI
         
@@ -681,15 +673,34 @@ class IPScannerGUI:
         self.results_text.delete("1.0", "end")
         self.scan_results = []
         
+        # Checkpoint per le scansioni di rete
+        checkpoint = self.prepare_checkpoint(target, ports) if "/" in target else None
+        
         # Avvia scansione in thread separato
         self.current_scan_thread = threading.Thread(
             target=self.run_scan,
-            args=(target, ports),
+            args=(target, ports, checkpoint),
             daemon=True
         )
         self.current_scan_thread.start()
         
-    def run_scan(self, target, ports):
+    def prepare_checkpoint(self, target, ports):
+        """Propone di riprendere una scansione interrotta o ne crea una nuova"""
+        if os.path.exists(CHECKPOINT_FILE):
+            try:
+                checkpoint = ScanCheckpoint.load(CHECKPOINT_FILE)
+                if not checkpoint.finished and checkpoint.matches(target, ports):
+                    if messagebox.askyesno(
+                        "Riprendi scansione",
+                        f"♻️ Trovata una scansione interrotta di {checkpoint.target} "
+                        f"({checkpoint.completed_count()} host già completati).\n\nVuoi riprenderla?"
+                    ):
+                        return checkpoint
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Checkpoint non valido: {e}")
+        return ScanCheckpoint(CHECKPOINT_FILE, target, ports)
+        
+    def run_scan(self, target, ports, checkpoint=None):
         """Esegue la scansione in background"""
         try:
             self.update_status("🔍 Inizializzazione scansione...")
@@ -703,7 +714,7 @@ class IPScannerGUI:
             
             if "/" in target:
                 # Scansione rete
-                self.scan_network(target, ports)
+                self.scan_network(target, ports, checkpoint)
             else:
                 # Scansione singola
                 self.total_hosts = 1
@@ -747,6 +758,9 @@ class IPScannerGUI:
                 
             self.update_status(f"🔍 Raccolta MAC addresses e nomi dispositivi... (0/{total_active})")
             
+            # Un solo ARP sweep per tutti gli host invece di uno per IP
+            mac_addresses = self.report_manager.get_mac_addresses([r['ip'] for r in active_hosts])
+            
             for i, host_result in enumerate(active_hosts):
                 if not self.scan_running:
                     break
@@ -756,8 +770,8 @@ class IPScannerGUI:
                 # Aggiorna status
                 self.update_status(f"🔍 Analizzando {ip}... ({i+1}/{total_active})")
                 
-                # Ottieni MAC address
-                mac_address = self.report_manager.get_mac_address(ip)
+                # MAC address dallo sweep
+                mac_address = mac_addresses.get(ip)
                 
                 # Ottieni nome dispositivo
                 device_name = self.report_manager.get_device_name(ip, mac_address)
@@ -769,7 +783,9 @@ class IPScannerGUI:
                     hostname=host_result['hostname'],
                     open_ports=host_result['porte_aperte'],
                     mac_address=mac_address,
-                    device_name=device_name
+                    device_name=device_name,
+                    banners=host_result.get('banner'),
+                    certificates=host_result.get('tls')
                 )
                 
                 # Aggiorna risultati nella UI
@@ -823,7 +839,7 @@ class IPScannerGUI:
         except Exception as e:
             self.append_result(f"❌ Errore generazione report: {e}\n")
                 
-    def scan_network(self, network, ports):
+    def scan_network(self, network, ports, checkpoint=None):
         """Scansiona una rete con aggiornamenti in tempo reale"""
         try:
             net = ipaddress.ip_network(network, strict=False)
@@ -836,31 +852,40 @@ class IPScannerGUI:
             # Aggiorna statistiche iniziali
             self.update_scan_stats()
             
-            hosts = list(net.hosts()) if net.num_addresses > 2 else [net.network_address]
-            self.total_hosts = len(hosts)  # Aggiusta per host effettivi
+            # Gli host arrivano man mano dallo scheduler del motore
+            self.total_hosts = net.num_addresses - 2 if net.num_addresses > 2 else net.num_addresses
+            
+            # Host già completati in una scansione interrotta
+            ripresi = 0
+            if checkpoint is not None and checkpoint.completed_count():
+                ripresi = checkpoint.completed_count()
+                self.append_result(f"♻️ Ripresa da checkpoint: {ripresi} host già completati\n\n")
+                for result in checkpoint.results:
+                    self.hosts_found += 1
+                    self.total_ports_found += len(result['porte_aperte'])
+                    self.scan_results.append(result)
+                    self.append_result(f"✅ {result['ip']} ({result['hostname']})\n")
+                self.update_found_stats()
             
-            for i, ip in enumerate(hosts):
+            risultati = self.scanner.itera_scansione(network, ports, includi_inattivi=True, checkpoint=checkpoint)
+            for i, result in enumerate(risultati, ripresi + 1):
                 if not self.scan_running:
                     break
                     
                 # Aggiorna progresso
                 self.hosts_completed = i
-                progress = i / len(hosts) if len(hosts) > 0 else 0
+                progress = i / self.total_hosts if self.total_hosts > 0 else 0
                 self.update_progress(progress)
                 self.update_scan_stats()
                 
                 # Calcola ETA
-                if i > 0:
-                    elapsed = time.time() - self.start_time
-                    avg_time_per_host = elapsed / i
-                    remaining_hosts = len(hosts) - i
-                    eta_seconds = remaining_hosts * avg_time_per_host
-                    self.update_eta(eta_seconds)
-                
-                # Scansiona host
-                result = self.scanner.scansiona_host(str(ip), ports)
+                elapsed = time.time() - self.start_time
+                avg_time_per_host = elapsed / (i - ripresi)
+                remaining_hosts = self.total_hosts - i
+                eta_seconds = remaining_hosts * avg_time_per_host
+                self.update_eta(eta_seconds)
                 
-                if result:
+                if result['attivo']:
                     self.hosts_found += 1
                     self.total_ports_found += len(result['porte_aperte'])
                     self.scan_results.append(result)
@@ -868,17 +893,26 @@ class IPScannerGUI:
                     self.append_result(f"✅ {result['ip']} ({result['hostname']})\n")
                     if result['porte_aperte']:
                         for porta in result['porte_aperte']:
-                            servizio = self.scanner.ottieni_info_servizio(porta)
+                            servizio = self.scanner.ottieni_info_servizio(porta, result.get('protocollo', 'tcp'))
                             self.append_result(f"   🔓 Porta {porta}: {servizio}\n")
                     self.append_result("\n")
                 else:
-                    self.append_result(f"❌ {ip} - Non raggiungibile\n")
+                    self.append_result(f"❌ {result['ip']} - Non raggiungibile\n")
                 
                 # Aggiorna statistiche trovate
                 self.update_found_stats()
                 
+            risultati.close()
+            
+            # Scansione completa: il checkpoint non serve più
+            if checkpoint is not None and checkpoint.finished:
+                try:
+                    os.remove(checkpoint.path)
+                except OSError:
+                    pass
+            
             # Completa il progresso
-            self.hosts_completed = len(hosts)
+            self.hosts_completed = self.total_hosts
             self.update_progress(1.0)
             self.update_scan_stats()
                 
@@ -909,7 +943,7 @@ class IPScannerGUI:
             if result['porte_aperte']:
                 self.append_result(f"🔓 Porte aperte ({len(result['porte_aperte'])}):\n")
                 for porta in result['porte_aperte']:
-                    servizio = self.scanner.ottieni_info_servizio(porta)
+                    servizio = self.scanner.ottieni_info_servizio(porta, result.get('protocollo', 'tcp'))
                     self.append_result(f"   ▶ Porta {porta}: {servizio}\n")
             else:
                 self.append_result("⚠️ Nessuna porta aperta trovata\n")
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Host Discovery per IP Scanner
+Rilevamento degli host attivi a blocchi, senza una connessione TCP per host
+"""
+
+import ipaddress
+import os
+import select
+import socket
+import struct
+import threading
+import time
+
+# Marcatore nel payload per riconoscere le nostre risposte echo
+ICMP_PAYLOAD = b"IPSCANNER-PING"
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+
+
+def icmp_checksum(data):
+    """Calcola il checksum Internet (RFC 1071) di un pacchetto ICMP"""
+    if len(data) % 2:
+        data += b"\x00"
+    totale = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    totale = (totale >> 16) + (totale & 0xFFFF)
+    totale += totale >> 16
+    return ~totale & 0xFFFF
+
+
+def build_echo_request(identifier, sequence):
+    """Costruisce un pacchetto ICMP echo request con il nostro payload"""
+    header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, identifier, sequence)
+    checksum = icmp_checksum(header + ICMP_PAYLOAD)
+    header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, checksum, identifier, sequence)
+    return header + ICMP_PAYLOAD
+
+
+def open_icmp_socket():
+    """Apre un socket ICMP: datagram non privilegiato o raw se si è root.
+
+    Restituisce la coppia (socket, raw). Solleva OSError se nessuno dei
+    due tipi è disponibile (es. net.ipv4.ping_group_range restrittivo).
+    """
+    try:
+        return socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP), False
+    except OSError:
+        pass
+    return socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP), True
+
+
+def _parse_echo_reply(data, raw, identifier):
+    """True se il pacchetto ricevuto è una nostra echo reply"""
+    if raw:
+        # I socket raw ricevono anche l'header IP
+        data = data[(data[0] & 0x0F) * 4:]
+    if len(data) < 8 + len(ICMP_PAYLOAD):
+        return False
+    tipo, codice, _, ident, _ = struct.unpack("!BBHHH", data[:8])
+    if tipo != ICMP_ECHO_REPLY or codice != 0:
+        return False
+    # Con i socket datagram il kernel riscrive l'identificativo e filtra da sé
+    if raw and ident != identifier:
+        return False
+    return data[8:8 + len(ICMP_PAYLOAD)] == ICMP_PAYLOAD
+
+
+def icmp_echo_sweep(addresses, timeout=1.0, pps=None):
+    """Invia echo request a tutti gli indirizzi e raccoglie chi risponde.
+
+    Un thread mittente invia le richieste in pipeline (al massimo pps al
+    secondo, se indicato) mentre un unico ciclo di ricezione abbina le
+    risposte per indirizzo sorgente. L'attesa termina timeout secondi
+    dopo l'ultimo invio. Restituisce l'insieme degli IP che hanno risposto.
+    """
+    sock, raw = open_icmp_socket()
+    identifier = os.getpid() & 0xFFFF
+    attivi = set()
+    invio_finito = threading.Event()
+    fine_invio = [None]
+
+    def mittente():
+        intervallo = 1.0 / pps if pps else 0
+        prossimo = time.monotonic()
+        try:
+            for sequenza, ip in enumerate(addresses):
+                if intervallo:
+                    attesa = prossimo - time.monotonic()
+                    if attesa > 0:
+                        time.sleep(attesa)
+                    prossimo += intervallo
+                try:
+                    sock.sendto(build_echo_request(identifier, sequenza & 0xFFFF), (str(ip), 0))
+                except OSError:
+                    # Host irraggiungibile o buffer pieno: l'indirizzo resta inattivo
+                    continue
+        finally:
+            fine_invio[0] = time.monotonic()
+            invio_finito.set()
+
+    thread = threading.Thread(target=mittente, name="icmp-sweep", daemon=True)
+    try:
+        thread.start()
+        while True:
+            if invio_finito.is_set():
+                rimanente = fine_invio[0] + timeout - time.monotonic()
+                if rimanente <= 0:
+                    break
+                attesa = rimanente
+            else:
+                attesa = 0.1
+            pronti, _, _ = select.select([sock], [], [], attesa)
+            if not pronti:
+                continue
+            try:
+                data, (ip, _) = sock.recvfrom(2048)
+            except OSError:
+                continue
+            if _parse_echo_reply(data, raw, identifier):
+                attivi.add(ip)
+    finally:
+        thread.join()
+        sock.close()
+    return attivi
+
+
+def find_onlink_interface(target):
+    """Restituisce l'interfaccia locale direttamente collegata al target.
+
+    target è un IP o una rete; la rete deve essere interamente contenuta
+    nella subnet di un'interfaccia IPv4 (loopback esclusa).
+    Restituisce None se il target è instradato o se psutil manca.
+    """
+    try:
+        import psutil
+    except ImportError:
+        return None
+    try:
+        rete = ipaddress.ip_network(target, strict=False)
+    except ValueError:
+        return None
+    if rete.version != 4:
+        return None
+
+    for nome, indirizzi in psutil.net_if_addrs().items():
+        for indirizzo in indirizzi:
+            if indirizzo.family != socket.AF_INET or not indirizzo.netmask:
+                continue
+            if indirizzo.address.startswith('127.'):
+                continue
+            locale = ipaddress.ip_network(f"{indirizzo.address}/{indirizzo.netmask}", strict=False)
+            if rete.subnet_of(locale):
+                return nome
+    return None
+
+
+def interface_addresses(iface):
+    """Indirizzi IPv4 di un'interfaccia locale con il suo MAC: {ip: mac}.
+
+    Restituisce un dizionario vuoto se l'interfaccia non è indicata o se
+    psutil manca.
+    """
+    if not iface:
+        return {}
+    try:
+        import psutil
+    except ImportError:
+        return {}
+    indirizzi = psutil.net_if_addrs().get(iface, [])
+    mac = next((indirizzo.address for indirizzo in indirizzi if indirizzo.family == psutil.AF_LINK), None)
+    return {indirizzo.address: mac for indirizzo in indirizzi if indirizzo.family == socket.AF_INET}
+
+
+def arp_sweep(addresses, timeout=1.0, iface=None, pps=None):
+    """Invia richieste ARP a tutti gli indirizzi con un'unica chiamata srp.
+
+    Con pps le richieste partono al massimo a quella velocità. Gli
+    indirizzi dell'interfaccia iface, a cui nessuno risponde, sono
+    sempre considerati attivi.
+
+    Restituisce un dizionario {ip: mac} con gli host che hanno risposto.
+    Solleva OSError se scapy non è installato o mancano i privilegi.
+    """
+    try:
+        from scapy.all import ARP, Ether, srp
+    except ImportError as e:
+        raise OSError(f"scapy non disponibile: {e}")
+    richiesta = Ether(dst="ff:ff:ff:ff:ff:ff") / ARP(pdst=[str(ip) for ip in addresses])
+    try:
+        risposte = srp(richiesta, timeout=timeout, iface=iface, inter=1.0 / pps if pps else 0,
+                       verbose=False)[0]
+    except OSError:
+        raise
+    except Exception as e:
+        # Errori di scapy (interfaccia assente, libpcap mancante, ...)
+        raise OSError(str(e))
+    attivi = {ricevuto.psrc: ricevuto.hwsrc for _, ricevuto in risposte}
+    richiesti = {str(ip) for ip in addresses}
+    for ip, mac in interface_addresses(iface).items():
+        if ip in richiesti:
+            attivi.setdefault(ip, mac)
+    return attivi
@@ -6,19 +6,120 @@ Creato per scansionare indirizzi IP e porte aperte in una rete
 """
 
 import socket
+import errno
+import selectors
+import asyncio
 import threading
 import ipaddress
 import sys
 import time
 import argparse
+import json
+import itertools
+import queue
+import random
+from collections import deque
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+
+import config
+import host_discovery
+from banner_grab import BannerGrabber, grab_banner_async
+import ipv6_hints
+from dns_resolver import get_shared_resolver
+from service_registry import service_name
+from port_spec import PortSet, parse_port_spec
+from scan_checkpoint import ScanCheckpoint
+from sharded_scan import itera_scansione_processi
+from distributed_scan import ScanCoordinator, run_worker, start_local_workers
+from target_order import permuted_keys
+from target_set import TargetSet, address_key, as_target_set, key_to_text
+from tls_certs import CertificateCollector, collect_certificate_async
+from rate_control import AdaptiveWindow, RateLimitedSemaphore, TokenBucket
+from rtt_timeout import RttEstimator
+from port_states import APERTA, CHIUSA, FILTRATA
+from syn_scan import syn_available, syn_scan
+from udp_scan import udp_scan
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Codici di connect_ex che indicano una connessione non bloccante in corso
+ERRNO_IN_CORSO = {errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN, errno.EALREADY}
+
+# Una connessione riuscita o rifiutata (RST) dimostra che l'host esiste
+ERRNO_HOST_ATTIVO = {0, errno.ECONNREFUSED}
+
+
+def famiglia_indirizzo(ip):
+    """Famiglia di socket (AF_INET o AF_INET6) di un indirizzo testuale"""
+    return socket.AF_INET6 if ":" in ip else socket.AF_INET
+
 
 class IPScanner:
     def __init__(self):
-        self.porte_comuni = [21, 22, 23, 25, 53, 80, 110, 135, 139, 143, 443, 993, 995, 1723, 3306, 3389, 5900, 8080]
+        # Porte di default: lo stesso elenco del profilo 'comuni' di --ports
+        self.porte_comuni = list(config.PORTE_COMUNI)
+        self.porte_rilevamento = [80, 443, 22, 21]
+        # Timeout delle sonde in secondi: con timeout_adattivo è il valore
+        # iniziale e massimo, e ogni sonda attende SRTT + 4 * RTTVAR del suo
+        # host (o della sua subnet), senza scendere sotto timeout_min
         self.timeout = 1
+        self.timeout_min = 0.1
+        self.timeout_adattivo = True
+        self._rtt = None
+        # Nuovi tentativi per le sonde senza risposta, con timeout raddoppiato
+        # a ogni tentativo; le porte chiuse (RST) non vengono mai ritentate
+        self.tentativi = 1
         self.thread_max = 100
+        # Connessioni simultanee sull'event loop del motore asyncio
+        self.concorrenza_async = 5000
+        # Pool di worker persistente condiviso da tutte le scansioni
+        self._executor = None
+        self._executor_size = 0
+        self._executor_lock = threading.Lock()
+        # Host in lavorazione contemporaneamente nella scansione a flusso
+        self.finestra_host = 1024
+        # Resolver DNS inverso con cache, condiviso con il ReportManager
+        self.resolver = get_shared_resolver()
+        # Metodo di rilevamento host: 'auto' (ARP sulle reti locali, altrimenti
+        # TCP), 'tcp' (connessione), 'icmp' (ping sweep) o 'arp'
+        self.metodo_scoperta = 'auto'
+        # Indirizzi per ogni sweep di rilevamento a blocchi
+        self.blocco_scoperta = 16384
+        # Ordine di visita delle reti: crescente o permutazione pseudo-casuale
+        # (distribuisce il carico tra subnet e router invece di colpirne uno alla volta)
+        self.ordine_casuale = False
+        # Seme della permutazione (None = nuovo seme a ogni scansione)
+        self.seme = None
+        # Lettura dei banner sulle porte aperte: byte massimi, scadenza per
+        # lettura e letture in volo (fuori dal pool, non rallentano le sonde)
+        self.banner = False
+        self.banner_byte = 256
+        self.banner_timeout = 2.0
+        self.banner_max = 256
+        self._grabber = None
+        # Certificati TLS sulle porte aperte di porte_tls: handshake in una
+        # fase separata, con scadenza per handshake e handshake in volo limitati
+        self.tls = False
+        self.porte_tls = list(config.TLS_PORTS)
+        self.tls_timeout = 3.0
+        self.tls_max = 64
+        self._collector = None
+        # Protocollo delle sonde: 'tcp' (connect), 'syn' (half-open con socket
+        # raw, richiede root) o 'udp' (payload per protocollo). SYN e UDP non
+        # fanno rilevamento host: è attivo chi ha porte aperte o chiuse
+        self.protocollo = 'tcp'
+        self.porte_udp = list(config.UDP_PORTS)
+        # Sonde SYN/UDP in attesa di risposta contemporaneamente
+        self.sonde_max = 4096
+        # Sonde al secondo di tutte le scansioni (None = nessun limite)
+        self.pps = None
+        # Finestra di sonde in volo regolata dai timeout osservati (AIMD),
+        # con thread_max come tetto; False = sempre thread_max sonde in volo
+        self.concorrenza_adattiva = True
         
     def stampa_banner(self):
         """Stampa il banner dell'applicazione"""
@@ -32,74 +133,131 @@ class IPScanner:
         print()
 
     def verifica_host_attivo(self, ip):
-        """Verifica se un host è attivo tramite ping socket"""
+        """Verifica se un host è attivo sondando in parallelo le porte di rilevamento.
+
+        Apre una connessione non bloccante per ogni porta e si ferma alla
+        prima risposta: sia una connessione riuscita sia un RST
+        (ECONNREFUSED) dimostrano che l'host esiste. Un host spento costa
+        così un solo timeout invece di uno per porta.
+        """
+        ip = str(ip)
+        selettore = selectors.DefaultSelector()
+        sockets = []
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(self.timeout)
-            # Prova a connettersi alla porta 80 o 443
-            for porta in [80, 443, 22, 21]:
-                try:
-                    risultato = sock.connect_ex((str(ip), porta))
-                    if risultato == 0:
-                        sock.close()
+            famiglia = famiglia_indirizzo(ip)
+            inizio = time.monotonic()
+            for porta in self.porte_rilevamento:
+                sock = socket.socket(famiglia, socket.SOCK_STREAM)
+                sockets.append(sock)
+                sock.setblocking(False)
+                risultato = sock.connect_ex((ip, porta))
+                if risultato in ERRNO_HOST_ATTIVO:
+                    self._registra_rtt(ip, time.monotonic() - inizio)
+                    return True
+                if risultato in ERRNO_IN_CORSO:
+                    selettore.register(sock, selectors.EVENT_WRITE)
+            
+            scadenza = inizio + self._timeout_per(ip)
+            while selettore.get_map():
+                rimanente = scadenza - time.monotonic()
+                if rimanente <= 0:
+                    break
+                for chiave, _ in selettore.select(rimanente):
+                    sock = chiave.fileobj
+                    if sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) in ERRNO_HOST_ATTIVO:
+                        self._registra_rtt(ip, time.monotonic() - inizio)
                         return True
-                except:
-                    continue
-            sock.close()
+                    selettore.unregister(sock)
             return False
-        except:
+        except OSError:
             return False
+        finally:
+            selettore.close()
+            for sock in sockets:
+                sock.close()
 
     def scansiona_porta(self, ip, porta):
         """Scansiona una singola porta su un IP"""
+        if self.stato_porta(ip, porta) == APERTA:
+            return porta
+        return None
+
+    def stato_porta(self, ip, porta):
+        """Stato di una porta dopo i tentativi: solo le sonde senza risposta vengono ripetute"""
+        for tentativo in range(self.tentativi + 1):
+            stato = self.sonda_porta(ip, porta, tentativo)
+            if stato != FILTRATA:
+                return stato
+        return FILTRATA
+
+    def sonda_porta(self, ip, porta, tentativo=0):
+        """Stato di una porta: aperta, chiusa (RST) o filtrata (nessuna risposta).
+
+        tentativo (0 per la prima sonda) raddoppia il timeout a ogni ripetizione.
+        """
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(self.timeout)
-            risultato = sock.connect_ex((str(ip), porta))
+            ip = str(ip)
+            sock = socket.socket(famiglia_indirizzo(ip), socket.SOCK_STREAM)
+            sock.settimeout(self._timeout_per(ip, tentativo))
+            inizio = time.monotonic()
+            risultato = sock.connect_ex((ip, porta))
+            rtt = time.monotonic() - inizio
             sock.close()
-            
-            if risultato == 0:
-                return porta
-            return None
-        except:
+        except OSError:
+            return FILTRATA
+        if risultato not in ERRNO_HOST_ATTIVO:
+            return FILTRATA
+        self._registra_rtt(ip, rtt)
+        return APERTA if risultato == 0 else CHIUSA
+
+    def _finestra_sonde(self):
+        """Finestra AIMD delle sonde SYN e UDP in volo (None con concorrenza fissa)"""
+        return AdaptiveWindow(self.sonde_max) if self.concorrenza_adattiva else None
+
+    def _stime_rtt(self):
+        """Restituisce lo stimatore RTT condiviso (None con timeout fisso)"""
+        if not self.timeout_adattivo:
             return None
+        stime = self._rtt
+        if stime is not None and (stime.massimo, stime.minimo) == (self.timeout, self.timeout_min):
+            return stime
+        with self._executor_lock:
+            stime = self._rtt
+            if stime is None or (stime.massimo, stime.minimo) != (self.timeout, self.timeout_min):
+                self._rtt = RttEstimator(self.timeout, self.timeout_min)
+            return self._rtt
 
-    def ottieni_info_servizio(self, porta):
-        """Restituisce informazioni sul servizio della porta"""
-        servizi = {
-            21: "FTP",
-            22: "SSH",
-            23: "Telnet",
-            25: "SMTP",
-            53: "DNS",
-            80: "HTTP",
-            110: "POP3",
-            135: "RPC",
-            139: "NetBIOS",
-            143: "IMAP",
-            443: "HTTPS",
-            993: "IMAPS",
-            995: "POP3S",
-            1723: "PPTP",
-            3306: "MySQL",
-            3389: "RDP",
-            5900: "VNC",
-            8080: "HTTP-Alt"
-        }
-        return servizi.get(porta, "Sconosciuto")
+    def _timeout_per(self, ip, tentativo=0):
+        """Timeout della prossima sonda verso ip (raddoppiato a ogni tentativo, fino a timeout)"""
+        stime = self._stime_rtt()
+        if stime is None:
+            return self.timeout
+        return min(self.timeout, stime.timeout(ip) * 2 ** tentativo)
+
+    def _registra_rtt(self, ip, rtt):
+        """Aggiorna la stima RTT di ip con il tempo di una risposta"""
+        stime = self._stime_rtt()
+        if stime is not None:
+            stime.update(ip, rtt)
+
+    def ottieni_info_servizio(self, porta, protocollo='tcp'):
+        """Restituisce informazioni sul servizio della porta (tcp o udp)"""
+        return service_name(porta, protocollo)
 
     def risolvi_hostname(self, ip):
-        """Tenta di risolvere l'hostname dell'IP"""
-        try:
-            hostname = socket.gethostbyaddr(str(ip))[0]
-            return hostname
-        except:
-            return "N/A"
+        """Tenta di risolvere l'hostname dell'IP (resolver condiviso con cache)"""
+        return self.resolver.resolve(str(ip)) or "N/A"
 
     def scansiona_host(self, ip, porte_personalizzate=None):
         """Scansiona un singolo host per porte aperte"""
+        if self.protocollo in ('syn', 'udp'):
+            risultato = next(self.itera_host([str(ip)], porte_personalizzate), None)
+            self._stampa_host(str(ip), risultato)
+            return risultato
+
         porte_da_scansionare = porte_personalizzate if porte_personalizzate else self.porte_comuni
         porte_aperte = []
+        porte_filtrate = []
         
         print(f"🔍 Scansionando {ip}...", end=" ")
         
@@ -108,37 +266,646 @@ class IPScanner:
             print("❌ Host non raggiungibile")
             return None
             
-        hostname = self.risolvi_hostname(ip)
-        print(f"✅ Host attivo (Hostname: {hostname})")
+        # Il reverse DNS procede mentre si scansionano le porte
+        hostname_future = self.resolver.resolve_async(str(ip))
         
-        # Scansiona le porte
-        with ThreadPoolExecutor(max_workers=50) as executor:
-            future_to_porta = {executor.submit(self.scansiona_porta, ip, porta): porta 
-                             for porta in porte_da_scansionare}
-            
-            for future in as_completed(future_to_porta):
-                porta_risultato = future.result()
-                if porta_risultato:
-                    porte_aperte.append(porta_risultato)
+        # Scansiona le porte sul pool condiviso
+        executor = self._pool()
+        future_to_porta = {executor.submit(self.stato_porta, ip, porta): porta 
+                         for porta in porte_da_scansionare}
         
-        if porte_aperte:
-            porte_aperte.sort()
-            print(f"  📋 Porte aperte trovate: {len(porte_aperte)}")
-            for porta in porte_aperte:
-                servizio = self.ottieni_info_servizio(porta)
-                print(f"    ▶ Porta {porta}: {servizio}")
-        else:
-            print("  ⚠️  Nessuna porta aperta trovata")
+        for future in as_completed(future_to_porta):
+            stato = future.result()
+            if stato == APERTA:
+                porte_aperte.append(future_to_porta[future])
+            elif stato == FILTRATA:
+                porte_filtrate.append(future_to_porta[future])
+        
+        porte_aperte.sort()
+        porte_filtrate.sort()
+        banner_future = {porta: self._banner_grabber().grab(ip, porta) for porta in porte_aperte} if self.banner else {}
+        tls_future = {porta: self._tls_collector().collect(ip, porta)
+                      for porta in porte_aperte if porta in self.porte_tls} if self.tls else {}
+        hostname = hostname_future.result() or "N/A"
+        banner = {porta: future.result() for porta, future in banner_future.items() if future.result()}
+        certificati = {porta: future.result() for porta, future in tls_future.items() if future.result()}
+        print(f"✅ Host attivo (Hostname: {hostname})")
+        self._stampa_porte(porte_aperte, banner, certificati, porte_filtrate)
             
-        return {
+        risultato = {
             'ip': str(ip),
             'hostname': hostname,
             'porte_aperte': porte_aperte,
-            'attivo': True
+            'porte_filtrate': porte_filtrate,
+            'attivo': True,
+            'protocollo': 'tcp'
         }
+        if self.banner:
+            risultato['banner'] = banner
+        if self.tls:
+            risultato['tls'] = certificati
+        return risultato
+
+    def _stampa_porte(self, porte_aperte, banner=None, certificati=None, porte_filtrate=None,
+                      protocollo='tcp'):
+        """Stampa l'elenco delle porte aperte di un host (con banner e certificati TLS)"""
+        if porte_aperte:
+            print(f"  📋 Porte aperte trovate: {len(porte_aperte)}")
+            for porta in porte_aperte:
+                servizio = self.ottieni_info_servizio(porta, protocollo)
+                testo = (banner or {}).get(porta)
+                if testo:
+                    print(f"    ▶ Porta {porta}: {servizio} - {testo.splitlines()[0][:80]}")
+                else:
+                    print(f"    ▶ Porta {porta}: {servizio}")
+                certificato = (certificati or {}).get(porta)
+                if certificato:
+                    print(f"      🔒 {certificato['soggetto']} (scade: {certificato['scadenza'][:10]})")
+        else:
+            print("  ⚠️  Nessuna porta aperta trovata")
+        if porte_filtrate:
+            print(f"  ❔ Porte senza risposta (filtrate): {len(porte_filtrate)}")
+
+    def _stampa_host(self, ip, risultato):
+        """Stampa l'esito della scansione di un host completato dallo scheduler"""
+        if risultato is None:
+            print(f"🔍 Scansionando {ip}... ❌ Host non raggiungibile")
+            return
+        print(f"🔍 Scansionando {ip}... ✅ Host attivo (Hostname: {risultato['hostname']})")
+        self._stampa_porte(risultato['porte_aperte'], risultato.get('banner'), risultato.get('tls'),
+                           risultato.get('porte_filtrate'), risultato.get('protocollo', 'tcp'))
+
+    # ------------------------------------------------------------------
+    # Scheduler globale: un unico pool, una coda di sonde (host, porta)
+    # ------------------------------------------------------------------
+
+    def _pool(self):
+        """Restituisce il pool di worker persistente (thread_max sonde in volo)"""
+        with self._executor_lock:
+            if self._executor is None or self._executor_size != self.thread_max:
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                self._executor = ThreadPoolExecutor(max_workers=self.thread_max,
+                                                    thread_name_prefix="sonda")
+                self._executor_size = self.thread_max
+            return self._executor
+
+    def _banner_grabber(self):
+        """Restituisce il lettore di banner condiviso (ricreato se cambiano i limiti)"""
+        with self._executor_lock:
+            grabber = self._grabber
+            if grabber is None or (grabber.max_bytes, grabber.timeout, grabber.max_inflight) != \
+                    (self.banner_byte, self.banner_timeout, self.banner_max):
+                if grabber is not None:
+                    grabber.close()
+                self._grabber = BannerGrabber(self.banner_byte, self.banner_timeout, self.banner_max)
+            return self._grabber
+
+    def _tls_collector(self):
+        """Restituisce il raccoglitore di certificati condiviso (ricreato se cambiano i limiti)"""
+        with self._executor_lock:
+            collector = self._collector
+            if collector is None or (collector.timeout, collector.max_inflight) != (self.tls_timeout, self.tls_max):
+                if collector is not None:
+                    collector.close()
+                self._collector = CertificateCollector(self.tls_timeout, self.tls_max)
+            return self._collector
 
-    def scansiona_rete(self, rete, porte_personalizzate=None):
-        """Scansiona una intera rete"""
+    def _scegli_scoperta(self, target):
+        """Sceglie il metodo di rilevamento per il target.
+
+        In modalità 'auto' (e 'arp') i target direttamente collegati a una
+        delle interfacce locali usano l'ARP sweep, gli altri il TCP.
+        Restituisce la coppia (metodo, interfaccia).
+        """
+        metodo = self.metodo_scoperta
+        if metodo not in ('auto', 'arp'):
+            return metodo, None
+        interfaccia = host_discovery.find_onlink_interface(target) if target else None
+        if interfaccia:
+            return 'arp', interfaccia
+        if metodo == 'arp':
+            print(f"⚠️  {target} non è su una rete locale, uso il rilevamento TCP")
+        return 'tcp', None
+
+    def _sweep(self, metodo, interfaccia, blocco):
+        """Sweep di un blocco: insieme degli attivi o None se non disponibile.
+
+        Gli sweep sono solo IPv4: gli indirizzi IPv6 del blocco restano
+        senza esito e vengono verificati via TCP.
+        """
+        blocco = [ip for ip in blocco if ":" not in ip]
+        if not blocco:
+            return set()
+        try:
+            if metodo == 'arp':
+                return host_discovery.arp_sweep(blocco, self.timeout, interfaccia, pps=self.pps)
+            return host_discovery.icmp_echo_sweep(blocco, self.timeout, pps=self.pps)
+        except OSError as e:
+            print(f"⚠️  Rilevamento {metodo.upper()} non disponibile ({e}), uso il rilevamento TCP")
+            return None
+
+    def _esiti_scoperta(self, hosts, target=None):
+        """Associa a ogni host l'esito del rilevamento a blocchi.
+
+        Produce coppie (ip, attivo) con attivo True/False se deciso da uno
+        sweep, None se l'host va verificato con verifica_host_attivo.
+        Lo sweep del blocco successivo gira in background mentre lo
+        scheduler consuma quello corrente.
+        """
+        metodo, interfaccia = self._scegli_scoperta(target)
+        if metodo == 'tcp':
+            for ip in hosts:
+                yield str(ip), None
+            return
+
+        def sweep(blocco):
+            return self._sweep(metodo, interfaccia, blocco)
+
+        blocchi = queue.Queue(maxsize=2)
+        fermo = threading.Event()
+
+        def produttore():
+            disponibile = True
+            blocco = []
+            try:
+                for ip in hosts:
+                    if fermo.is_set():
+                        return
+                    blocco.append(str(ip))
+                    if len(blocco) >= self.blocco_scoperta:
+                        disponibile = self._accoda_blocco(blocchi, blocco, sweep, disponibile)
+                        blocco = []
+                if blocco and not fermo.is_set():
+                    self._accoda_blocco(blocchi, blocco, sweep, disponibile)
+            finally:
+                blocchi.put(None)
+
+        thread = threading.Thread(target=produttore, name="scoperta", daemon=True)
+        thread.start()
+        try:
+            while True:
+                elemento = blocchi.get()
+                if elemento is None:
+                    return
+                blocco, attivi = elemento
+                for ip in blocco:
+                    yield ip, None if attivi is None or ":" in ip else ip in attivi
+        finally:
+            fermo.set()
+            # Sblocca il produttore se è fermo su una coda piena
+            while thread.is_alive():
+                try:
+                    blocchi.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+
+    def _accoda_blocco(self, blocchi, blocco, sweep, disponibile):
+        """Esegue lo sweep di un blocco e lo passa allo scheduler.
+
+        Se lo sweep non è disponibile il blocco (e i successivi) passano
+        senza esito e vengono verificati via TCP. Restituisce la
+        disponibilità dello sweep per il blocco seguente.
+        """
+        attivi = sweep(blocco) if disponibile else None
+        blocchi.put((blocco, attivi))
+        return attivi is not None
+
+    def _pianifica(self, hosts, porte, target=None):
+        """Esegue la scansione come flusso di sonde sul pool condiviso.
+
+        Il rilevamento di ogni host e ogni coppia (host, porta) sono
+        lavori indipendenti dello stesso pool: il limite di concorrenza è
+        globale e non esistono pool per host. Le sonde degli host già
+        attivi hanno la precedenza sul rilevamento di nuovi host.
+        Con banner attivo ogni porta aperta avvia una lettura del banner
+        sul BannerGrabber e con tls le porte aperte di porte_tls un
+        handshake sul CertificateCollector: come il DNS non occupano il pool.
+        Gli host vengono letti in modo pigro e al massimo finestra_host
+        sono in lavorazione, quindi la memoria non dipende dalla
+        dimensione del target. Con pps le sonde partono al massimo a
+        quella velocità; con concorrenza_adattiva le sonde delle porte in
+        volo seguono una finestra AIMD che si restringe quando i timeout
+        aumentano (pacchetti persi) e torna a crescere fino al tetto.
+        Le sonde senza risposta tornano in testa alla coda fino a
+        tentativi volte; quelle ancora mute finiscono in porte_filtrate.
+        target (IP o rete) serve a scegliere il metodo di rilevamento.
+        Produce coppie (ip, risultato), con risultato None se inattivo.
+        """
+        pool = self._pool()
+        # Lavori accodati al pool: abbastanza da non lasciare worker a vuoto
+        limite = self.thread_max * 2
+        finestra = max(1, self.finestra_host)
+        esiti = self._esiti_scoperta(hosts, target)
+        grabber = self._banner_grabber() if self.banner else None
+        collector = self._tls_collector() if self.tls else None
+        secchio = TokenBucket(self.pps) if self.pps else None
+        finestra_sonde = AdaptiveWindow(limite) if self.concorrenza_adattiva else None
+        # future -> (tipo, ip, porta); lookup DNS, banner e TLS non occupano il pool
+        in_volo = {}
+        fuori_pool = 0
+        sonde_porta = 0
+        da_sondare = deque()
+        # (ip, porta) -> tentativi già ripetuti, solo per le sonde ritentate
+        ritentate = {}
+        # ip -> [risultato, lavori mancanti (porte + hostname + banner + TLS)]
+        in_corso = {}
+        in_scoperta = 0
+        host_esauriti = False
+
+        def avvia_host(ip):
+            nonlocal fuori_pool
+            risultato = {
+                'ip': ip,
+                'hostname': 'N/A',
+                'porte_aperte': [],
+                'porte_filtrate': [],
+                'attivo': True,
+                'protocollo': 'tcp'
+            }
+            if grabber:
+                risultato['banner'] = {}
+            if collector:
+                risultato['tls'] = {}
+            in_corso[ip] = [risultato, len(porte) + 1]
+            # Il reverse DNS procede insieme alle sonde delle porte
+            in_volo[self.resolver.resolve_async(ip)] = ('dns', ip, None)
+            fuori_pool += 1
+            da_sondare.extend((ip, p) for p in porte)
+
+        try:
+            while True:
+                attesa = None
+                while len(in_volo) - fuori_pool < limite:
+                    if secchio is not None:
+                        attesa = secchio.delay() or None
+                        if attesa:
+                            break
+                    if da_sondare and (finestra_sonde is None or sonde_porta < finestra_sonde.limit):
+                        ip, porta = da_sondare.popleft()
+                        in_volo[pool.submit(self.sonda_porta, ip, porta, ritentate.get((ip, porta), 0))] = \
+                            ('porta', ip, porta)
+                        sonde_porta += 1
+                        if secchio is not None:
+                            secchio.consume()
+                    elif not host_esauriti and in_scoperta + len(in_corso) < finestra:
+                        ip, attivo = next(esiti, (None, None))
+                        if ip is None:
+                            host_esauriti = True
+                            continue
+                        if attivo is False:
+                            yield ip, None
+                        elif attivo:
+                            # Host già confermato dallo sweep
+                            avvia_host(ip)
+                        else:
+                            in_volo[pool.submit(self.verifica_host_attivo, ip)] = ('scoperta', ip, None)
+                            in_scoperta += 1
+                            if secchio is not None:
+                                secchio.consume(len(self.porte_rilevamento))
+                    else:
+                        break
+
+                if not in_volo:
+                    if attesa is None:
+                        return
+                    time.sleep(attesa)
+                    continue
+
+                completati, _ = wait(in_volo, timeout=attesa, return_when=FIRST_COMPLETED)
+                for future in completati:
+                    tipo, ip, porta = in_volo.pop(future)
+
+                    if tipo == 'scoperta':
+                        in_scoperta -= 1
+                        if future.result():
+                            avvia_host(ip)
+                        else:
+                            yield ip, None
+                        continue
+
+                    stato = in_corso[ip]
+                    if tipo == 'dns':
+                        fuori_pool -= 1
+                        stato[0]['hostname'] = future.result() or "N/A"
+                    elif tipo in ('banner', 'tls'):
+                        fuori_pool -= 1
+                        if future.result():
+                            stato[0][tipo][porta] = future.result()
+                    elif tipo == 'porta':
+                        sonde_porta -= 1
+                        ripetute = ritentate.pop((ip, porta), 0)
+                        if finestra_sonde is not None and not ripetute:
+                            # Solo le prime sonde: una porta filtrata conta un timeout, non uno per tentativo
+                            finestra_sonde.record(future.result() == FILTRATA)
+                        if future.result() == FILTRATA:
+                            if ripetute < self.tentativi:
+                                # Nessuna risposta: si ritenta prima delle sonde nuove
+                                ritentate[(ip, porta)] = ripetute + 1
+                                da_sondare.appendleft((ip, porta))
+                                continue
+                            stato[0]['porte_filtrate'].append(porta)
+                        elif future.result() == APERTA:
+                            stato[0]['porte_aperte'].append(porta)
+                            if grabber:
+                                in_volo[grabber.grab(ip, porta)] = ('banner', ip, porta)
+                                fuori_pool += 1
+                                stato[1] += 1
+                            if collector and porta in self.porte_tls:
+                                in_volo[collector.collect(ip, porta)] = ('tls', ip, porta)
+                                fuori_pool += 1
+                                stato[1] += 1
+                    stato[1] -= 1
+                    if stato[1] == 0:
+                        del in_corso[ip]
+                        stato[0]['porte_aperte'].sort()
+                        stato[0]['porte_filtrate'].sort()
+                        for fase in ('banner', 'tls'):
+                            if fase in stato[0]:
+                                stato[0][fase] = dict(sorted(stato[0][fase].items()))
+                        yield ip, stato[0]
+        finally:
+            for future in in_volo:
+                future.cancel()
+            esiti.close()
+
+    def _pianifica_stati(self, stati_host, protocollo):
+        """Risultati delle scansioni SYN e UDP come flusso di coppie (ip, risultato).
+
+        stati_host produce (ip, {porta: stato}). Un host è attivo se
+        almeno una porta risponde (aperta) o rifiuta (chiusa: RST o ICMP
+        port unreachable); porte_aperte contiene le porte aperte e
+        porte_filtrate quelle rimaste mute. Il reverse DNS degli host
+        attivi procede mentre la scansione continua. protocollo ('tcp' per
+        SYN, 'udp') finisce nel campo 'protocollo' dei risultati.
+        """
+        in_attesa = deque()
+        for ip, stati in stati_host:
+            if not any(stato in (APERTA, CHIUSA) for stato in stati.values()):
+                yield ip, None
+            else:
+                risultato = {
+                    'ip': ip,
+                    'hostname': 'N/A',
+                    'porte_aperte': [porta for porta, stato in stati.items() if stato == APERTA],
+                    'porte_filtrate': [porta for porta, stato in stati.items() if stato not in (APERTA, CHIUSA)],
+                    'attivo': True,
+                    'protocollo': protocollo
+                }
+                in_attesa.append((risultato, self.resolver.resolve_async(ip)))
+            while in_attesa and in_attesa[0][1].done():
+                risultato, hostname_future = in_attesa.popleft()
+                risultato['hostname'] = hostname_future.result() or "N/A"
+                yield risultato['ip'], risultato
+        for risultato, hostname_future in in_attesa:
+            risultato['hostname'] = hostname_future.result() or "N/A"
+            yield risultato['ip'], risultato
+
+    def _host_da_target(self, target, checkpoint=None):
+        """Restituisce un iteratore pigro sugli host di un target.
+
+        target è un IP, una rete, un range o un TargetSet. Con un
+        checkpoint gli indirizzi già completati vengono saltati.
+        """
+        targets = as_target_set(target)
+        seme = self.seme_ordine(checkpoint) if len(targets) > 1 else None
+        if seme is not None:
+            return self.host_casuali(targets, seme, checkpoint)
+        # Gli indirizzi restano interi finché servono come testo per le sonde
+        chiavi = targets.iter_keys()
+        if checkpoint is not None:
+            chiavi = (chiave for chiave in chiavi if not checkpoint.is_done(chiave))
+        return map(key_to_text, chiavi)
+
+    def seme_ordine(self, checkpoint=None):
+        """Seme dell'ordine casuale di una scansione (None = ordine crescente)"""
+        if checkpoint is not None and checkpoint.seed is not None:
+            return checkpoint.seed
+        # Un checkpoint già avviato in ordine crescente prosegue così
+        if not self.ordine_casuale or (checkpoint is not None and checkpoint.completed_count()):
+            return None
+        seme = self.seme if self.seme is not None else random.getrandbits(32)
+        if checkpoint is not None:
+            checkpoint.seed = seme
+        return seme
+
+    def host_casuali(self, targets, seme, checkpoint=None, shard=0, shards=1):
+        """Host di un TargetSet in ordine pseudo-casuale (memoria costante).
+
+        Con shards > 1 vengono prodotti solo quelli del worker shard. Con
+        un checkpoint le posizioni già completate vengono saltate e le
+        altre associate ai rispettivi indirizzi, così la ripresa riparte
+        dalla prima posizione mancante.
+        """
+        inizio = 0
+        if checkpoint is not None and shards == 1:
+            intervalli = checkpoint.completed_ranges()
+            if intervalli and intervalli[0][0] == 0:
+                inizio = intervalli[0][1] + 1
+        for posizione, chiave in permuted_keys(targets, seme, shard, shards, inizio):
+            if checkpoint is not None and checkpoint.is_done(posizione):
+                continue
+            ip = key_to_text(chiave)
+            if checkpoint is not None:
+                checkpoint.track(ip, posizione)
+            yield ip
+
+    def itera_scansione(self, target, porte_personalizzate=None, includi_inattivi=False, checkpoint=None):
+        """Scansiona un IP, una rete o un TargetSet producendo i risultati man mano.
+
+        Ogni host viene restituito appena completato, con lo stesso
+        dizionario di scansiona_host. Con includi_inattivi=True vengono
+        prodotti anche gli host non raggiungibili ('attivo': False).
+        La memoria resta costante qualunque sia la dimensione del target.
+        Con un ScanCheckpoint gli indirizzi già completati vengono saltati
+        e i progressi salvati periodicamente (e all'interruzione).
+        """
+        targets = as_target_set(target)
+        return self.itera_host(self._host_da_target(targets, checkpoint), porte_personalizzate,
+                               includi_inattivi, checkpoint, targets.supernet())
+
+    def itera_host(self, hosts, porte_personalizzate=None, includi_inattivi=False, checkpoint=None, target=None):
+        """Come itera_scansione, ma su un iterabile qualsiasi di indirizzi.
+
+        target (IP o rete che contiene gli host) serve solo a scegliere il
+        metodo di rilevamento. Il checkpoint registra gli host completati:
+        quelli già fatti vanno esclusi da hosts a monte.
+        """
+        if self.protocollo == 'udp':
+            porte = porte_personalizzate if porte_personalizzate else self.porte_udp
+            esiti = self._pianifica_stati(udp_scan(hosts, porte, self.timeout, self.sonde_max, pps=self.pps,
+                                                   rtt=self._stime_rtt(), tentativi=self.tentativi,
+                                                   finestra=self._finestra_sonde()), 'udp')
+        elif self.protocollo == 'syn':
+            porte = porte_personalizzate if porte_personalizzate else self.porte_comuni
+            esiti = self._pianifica_stati(syn_scan(hosts, porte, self.timeout, self.sonde_max, self.pps,
+                                                   self._stime_rtt(), self.tentativi, self._finestra_sonde()), 'tcp')
+        else:
+            porte = porte_personalizzate if porte_personalizzate else self.porte_comuni
+            esiti = self._pianifica(hosts, porte, target)
+
+        completata = False
+        try:
+            for ip, risultato in esiti:
+                if checkpoint is not None:
+                    checkpoint.record(ip, risultato)
+                if risultato:
+                    yield risultato
+                elif includi_inattivi:
+                    yield {
+                        'ip': ip,
+                        'hostname': 'N/A',
+                        'porte_aperte': [],
+                        'porte_filtrate': [],
+                        'attivo': False,
+                        'protocollo': 'udp' if self.protocollo == 'udp' else 'tcp'
+                    }
+            completata = True
+        finally:
+            if checkpoint is not None:
+                checkpoint.save(finished=completata)
+
+    def scansiona_rete_flusso(self, rete, porte_personalizzate=None, file_output=None, checkpoint=None,
+                              processi=1):
+        """Scansiona una rete (o un TargetSet) stampando ed esportando ogni host appena completato.
+
+        A differenza di scansiona_rete non conserva i risultati: gli host
+        attivi vengono scritti su file_output (JSON Lines) uno per riga.
+        Con processi > 1 la rete viene divisa tra più processi worker.
+        Restituisce il numero di host attivi trovati (inclusi quelli
+        ripresi dal checkpoint).
+        """
+        try:
+            targets = as_target_set(rete)
+        except ValueError as e:
+            print(f"❌ Errore: Formato rete non valido - {e}")
+            return 0
+
+        print(f"🌐 Iniziando scansione della rete: {targets}")
+        print(f"📊 Numero totale di host da scansionare: {len(targets)}")
+        if processi > 1:
+            print(f"🧩 Scansione divisa tra {processi} processi")
+        if self.pps:
+            print(f"🚦 Limite di velocità: {self.pps:g} sonde/s")
+        print("-" * 60)
+
+        attivi = 0
+        porte_trovate = 0
+        if checkpoint is not None:
+            self._stampa_ripresa(checkpoint)
+            # Gli host del checkpoint sono già stati esportati dalla scansione interrotta
+            attivi = len(checkpoint.results)
+            porte_trovate = sum(len(h['porte_aperte']) for h in checkpoint.results)
+        inizio_tempo = time.time()
+        output = open(file_output, 'a', encoding='utf-8') if file_output else None
+        if processi > 1:
+            risultati = itera_scansione_processi(self, targets, porte_personalizzate, processi,
+                                                 includi_inattivi=True, checkpoint=checkpoint)
+        else:
+            risultati = self.itera_scansione(targets, porte_personalizzate, includi_inattivi=True,
+                                             checkpoint=checkpoint)
+        try:
+            for risultato in risultati:
+                if not risultato['attivo']:
+                    self._stampa_host(risultato['ip'], None)
+                    continue
+                self._stampa_host(risultato['ip'], risultato)
+                attivi += 1
+                porte_trovate += len(risultato['porte_aperte'])
+                if output:
+                    output.write(json.dumps(risultato, ensure_ascii=False) + "\n")
+                    output.flush()
+        finally:
+            risultati.close()
+            if output:
+                output.close()
+
+        tempo_totale = time.time() - inizio_tempo
+        print("\n" + "=" * 60)
+        print("📈 RISULTATI SCANSIONE")
+        print("=" * 60)
+        print(f"⏱️  Tempo totale: {tempo_totale:.2f} secondi")
+        print(f"🎯 Host attivi trovati: {attivi}")
+        print(f"🔓 Porte aperte trovate: {porte_trovate}")
+        print(f"📡 Host totali scansionati: {len(targets)}")
+        if file_output:
+            print(f"💾 Risultati salvati in: {file_output}")
+        if checkpoint is not None:
+            print(f"📌 Checkpoint aggiornato: {checkpoint.path}")
+        return attivi
+
+    def scansiona_distribuita(self, rete, porte_personalizzate=None, indirizzo='127.0.0.1:8700',
+                              worker_locali=0, file_output=None, file_report=None):
+        """Coordina la scansione di una rete distribuita su più worker.
+
+        Avvia il coordinatore su indirizzo (HOST:PORTA) e, se richiesto,
+        worker_locali processi worker sulla stessa macchina; i worker
+        remoti si collegano con --worker http://HOST:PORTA. I risultati
+        uniti finiscono in un ReportManager, esportato in tutti i formati
+        se è indicato file_report. Restituisce la lista degli host attivi.
+        """
+        host, _, porta = indirizzo.rpartition(':')
+        if not porte_personalizzate and self.protocollo == 'udp':
+            porte_personalizzate = PortSet(self.porte_udp)
+        try:
+            coordinatore = ScanCoordinator(rete, porte_personalizzate, host or '127.0.0.1', int(porta))
+        except ValueError as e:
+            print(f"❌ Errore: Formato rete o indirizzo non valido - {e}")
+            return []
+        except OSError as e:
+            print(f"❌ Impossibile avviare il coordinatore su {indirizzo}: {e}")
+            return []
+
+        print(f"🌐 Coordinamento scansione della rete: {coordinatore.target}")
+        print(f"🧩 Shard da assegnare: {len(coordinatore.shards)}")
+        print(f"📡 Worker: python ip_scanner.py --worker {coordinatore.url}")
+        print("-" * 60)
+
+        inizio_tempo = time.time()
+        coordinatore.start()
+        processi = start_local_workers(coordinatore.url, self, worker_locali) if worker_locali else []
+        try:
+            coordinatore.wait()
+        finally:
+            coordinatore.stop()
+            for processo in processi:
+                processo.join(timeout=5)
+                if processo.is_alive():
+                    processo.terminate()
+
+        host_attivi = coordinatore.risultati()
+        self.stampa_riassunto(host_attivi, coordinatore.host_totali, time.time() - inizio_tempo)
+        if file_output:
+            with open(file_output, 'a', encoding='utf-8') as f:
+                for host in host_attivi:
+                    f.write(json.dumps(host, ensure_ascii=False) + "\n")
+            print(f"💾 Risultati salvati in: {file_output}")
+
+        try:
+            from report_manager import ReportManager
+        except ImportError as e:
+            print(f"⚠️  Report non disponibile: {e}")
+            return host_attivi
+        report = ReportManager()
+        coordinatore.merge_into(report)
+        report.set_scan_metadata(coordinatore.target, coordinatore.host_totali,
+                                 time.time() - inizio_tempo,
+                                 porte_personalizzate.to_spec() if porte_personalizzate else 'comuni')
+        if file_report:
+            for formato, esito in report.export_all_formats(file_report).items():
+                stato = "✅" if esito['success'] else "❌"
+                print(f"{stato} Report {formato.upper()}: {esito['filename']}")
+        return host_attivi
+
+    def _stampa_ripresa(self, checkpoint):
+        """Segnala quanto lavoro viene ripreso da un checkpoint"""
+        completati = checkpoint.completed_count()
+        if completati:
+            print(f"♻️  Ripresa da checkpoint: {completati} indirizzi già completati, "
+                  f"{len(checkpoint.results)} host attivi trovati")
+
+    def scansiona_rete(self, rete, porte_personalizzate=None, checkpoint=None):
+        """Scansiona una intera rete (riprendendo da un checkpoint se indicato)"""
         try:
             network = ipaddress.ip_network(rete, strict=False)
             print(f"🌐 Iniziando scansione della rete: {network}")
@@ -146,46 +913,280 @@ class IPScanner:
             print("-" * 60)
             
             host_attivi = []
+            if checkpoint is not None:
+                self._stampa_ripresa(checkpoint)
+                host_attivi.extend(checkpoint.results)
             inizio_tempo = time.time()
             
-            with ThreadPoolExecutor(max_workers=self.thread_max) as executor:
-                future_to_ip = {executor.submit(self.scansiona_host, ip, porte_personalizzate): ip 
-                              for ip in network.hosts()}
-                
-                for future in as_completed(future_to_ip):
-                    risultato = future.result()
-                    if risultato:
-                        host_attivi.append(risultato)
+            for risultato in self.itera_scansione(rete, porte_personalizzate, includi_inattivi=True,
+                                                  checkpoint=checkpoint):
+                if risultato['attivo']:
+                    self._stampa_host(risultato['ip'], risultato)
+                    host_attivi.append(risultato)
+                else:
+                    self._stampa_host(risultato['ip'], None)
             
             fine_tempo = time.time()
             tempo_totale = fine_tempo - inizio_tempo
             
-            # Stampa riassunto
-            print("\n" + "=" * 60)
-            print("📈 RISULTATI SCANSIONE")
-            print("=" * 60)
-            print(f"⏱️  Tempo totale: {tempo_totale:.2f} secondi")
-            print(f"🎯 Host attivi trovati: {len(host_attivi)}")
-            print(f"📡 Host totali scansionati: {network.num_addresses}")
-            print(f"📊 Percentuale host attivi: {(len(host_attivi)/network.num_addresses)*100:.2f}%")
-            
-            if host_attivi:
-                print("\n📋 DETTAGLI HOST ATTIVI:")
-                print("-" * 60)
-                for host in host_attivi:
-                    print(f"🖥️  IP: {host['ip']} | Hostname: {host['hostname']}")
-                    if host['porte_aperte']:
-                        porte_str = ", ".join([f"{p}({self.ottieni_info_servizio(p)})" 
-                                             for p in host['porte_aperte']])
-                        print(f"   🔓 Porte: {porte_str}")
-                    print()
-            
+            self.stampa_riassunto(host_attivi, network.num_addresses, tempo_totale)
             return host_attivi
             
         except ValueError as e:
             print(f"❌ Errore: Formato rete non valido - {e}")
             return []
 
+    def stampa_riassunto(self, host_attivi, host_totali, tempo_totale):
+        """Stampa il riassunto finale di una scansione di rete"""
+        print("\n" + "=" * 60)
+        print("📈 RISULTATI SCANSIONE")
+        print("=" * 60)
+        print(f"⏱️  Tempo totale: {tempo_totale:.2f} secondi")
+        print(f"🎯 Host attivi trovati: {len(host_attivi)}")
+        print(f"📡 Host totali scansionati: {host_totali}")
+        if host_totali:
+            print(f"📊 Percentuale host attivi: {(len(host_attivi)/host_totali)*100:.2f}%")
+        
+        if host_attivi:
+            print("\n📋 DETTAGLI HOST ATTIVI:")
+            print("-" * 60)
+            for host in host_attivi:
+                print(f"🖥️  IP: {host['ip']} | Hostname: {host['hostname']}")
+                if host['porte_aperte']:
+                    porte_str = ", ".join([f"{p}({self.ottieni_info_servizio(p, host.get('protocollo', 'tcp'))})" 
+                                         for p in host['porte_aperte']])
+                    print(f"   🔓 Porte: {porte_str}")
+                print()
+
+    # ------------------------------------------------------------------
+    # Motore asyncio: connessioni non bloccanti su un unico event loop
+    # ------------------------------------------------------------------
+
+    def _limite_concorrenza_async(self):
+        """Adatta la concorrenza al limite di file descriptor del processo"""
+        concorrenza = self.concorrenza_async
+        if resource is None:
+            return concorrenza
+        try:
+            soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+            desiderato = concorrenza + 256
+            if soft != resource.RLIM_INFINITY and soft < desiderato:
+                nuovo = desiderato if hard == resource.RLIM_INFINITY else min(desiderato, hard)
+                resource.setrlimit(resource.RLIMIT_NOFILE, (nuovo, hard))
+                soft = nuovo
+            if soft != resource.RLIM_INFINITY:
+                # Lascia margine per stdout, file di log e resolver
+                concorrenza = min(concorrenza, max(1, soft - 256))
+        except (ValueError, OSError):
+            pass
+        return concorrenza
+
+    def _semaforo_async(self, concorrenza):
+        """Semaforo delle sonde asyncio: limite pps e, con concorrenza_adattiva, finestra AIMD"""
+        finestra = AdaptiveWindow(concorrenza) if self.concorrenza_adattiva else None
+        return RateLimitedSemaphore(concorrenza, self.pps, finestra)
+
+    async def _connetti_async(self, ip, porta, semaforo, tentativo=0):
+        """Connessione TCP non bloccante: True aperta, False rifiutata, None nessuna risposta"""
+        async with semaforo:
+            loop = asyncio.get_running_loop()
+            try:
+                sock = socket.socket(famiglia_indirizzo(ip), socket.SOCK_STREAM)
+            except OSError:
+                return None
+            sock.setblocking(False)
+            inizio = time.monotonic()
+            try:
+                await asyncio.wait_for(loop.sock_connect(sock, (ip, porta)), self._timeout_per(ip, tentativo))
+                self._registra_rtt(ip, time.monotonic() - inizio)
+                return True
+            except ConnectionRefusedError:
+                self._registra_rtt(ip, time.monotonic() - inizio)
+                return False
+            except (OSError, asyncio.TimeoutError):
+                return None
+            finally:
+                sock.close()
+
+    async def _sonda_porta_async(self, ip, porta, semaforo):
+        """Stato di una porta sondata sull'event loop, ritentando solo le sonde senza risposta"""
+        for tentativo in range(self.tentativi + 1):
+            esito = await self._connetti_async(ip, porta, semaforo, tentativo)
+            if tentativo == 0 and semaforo.finestra is not None:
+                # Solo le prime sonde, come nel motore a thread
+                semaforo.finestra.record(esito is None)
+            if esito is not None:
+                return APERTA if esito else CHIUSA
+        return FILTRATA
+
+    async def _verifica_host_attivo_async(self, ip, semaforo):
+        """Verifica l'host sondando in parallelo le porte di rilevamento"""
+        sonde = [asyncio.ensure_future(self._connetti_async(ip, porta, semaforo))
+                 for porta in self.porte_rilevamento]
+        try:
+            for sonda in asyncio.as_completed(sonde):
+                # Aperta o rifiutata: in entrambi i casi l'host ha risposto
+                if await sonda is not None:
+                    return True
+            return False
+        finally:
+            for sonda in sonde:
+                sonda.cancel()
+
+    async def _banner_async(self, ip, porta, semaforo_banner):
+        """Legge il banner di una porta aperta (al massimo banner_max letture in volo)"""
+        async with semaforo_banner:
+            return await grab_banner_async(ip, porta, self.banner_byte, self.banner_timeout)
+
+    async def _tls_async(self, ip, porta, semaforo_tls):
+        """Certificato TLS di una porta aperta (al massimo tls_max handshake in volo)"""
+        async with semaforo_tls:
+            return await collect_certificate_async(ip, porta, self.tls_timeout)
+
+    async def _scansiona_host_async(self, ip, porte, semaforo, semaforo_banner=None, semaforo_tls=None,
+                                    attivo=None):
+        """Scansiona un host sull'event loop, stesso risultato di scansiona_host.
+
+        Con semaforo_banner le porte aperte passano alla lettura dei
+        banner e con semaforo_tls quelle di porte_tls all'handshake TLS,
+        ciascuna fase limitata da un semaforo separato da quello delle sonde.
+        attivo è l'esito del rilevamento a blocchi: con None l'host viene
+        verificato sondando le porte di rilevamento.
+        """
+        ip = str(ip)
+        if attivo is False or (attivo is None and not await self._verifica_host_attivo_async(ip, semaforo)):
+            return None
+
+        # Il reverse DNS gira nel pool del resolver mentre si sondano le porte
+        hostname_future = asyncio.wrap_future(self.resolver.resolve_async(ip))
+        stati = await asyncio.gather(*[self._sonda_porta_async(ip, porta, semaforo)
+                                       for porta in porte])
+        porte_aperte = sorted(porta for porta, stato in zip(porte, stati) if stato == APERTA)
+        porte_filtrate = sorted(porta for porta, stato in zip(porte, stati) if stato == FILTRATA)
+        porte_tls = [porta for porta in porte_aperte if porta in self.porte_tls] if semaforo_tls else []
+        fasi = []
+        if semaforo_banner is not None:
+            fasi += [self._banner_async(ip, porta, semaforo_banner) for porta in porte_aperte]
+        fasi += [self._tls_async(ip, porta, semaforo_tls) for porta in porte_tls]
+        letti = await asyncio.gather(*fasi)
+        banner, certificati = {}, {}
+        if semaforo_banner is not None:
+            banner = {porta: testo for porta, testo in zip(porte_aperte, letti) if testo}
+            letti = letti[len(porte_aperte):]
+        certificati = {porta: certificato for porta, certificato in zip(porte_tls, letti) if certificato}
+        hostname = await hostname_future or "N/A"
+
+        filtrate = f", filtrate: {len(porte_filtrate)}" if porte_filtrate else ""
+        print(f"✅ {ip} attivo (Hostname: {hostname}) - porte aperte: {len(porte_aperte)}{filtrate}")
+        for porta in porte_aperte:
+            testo = banner.get(porta)
+            dettaglio = f" - {testo.splitlines()[0][:80]}" if testo else ""
+            print(f"    ▶ Porta {porta}: {self.ottieni_info_servizio(porta)}{dettaglio}")
+            if porta in certificati:
+                print(f"      🔒 {certificati[porta]['soggetto']} (scade: {certificati[porta]['scadenza'][:10]})")
+
+        risultato = {
+            'ip': ip,
+            'hostname': hostname,
+            'porte_aperte': porte_aperte,
+            'porte_filtrate': porte_filtrate,
+            'attivo': True,
+            'protocollo': 'tcp'
+        }
+        if semaforo_banner is not None:
+            risultato['banner'] = banner
+        if semaforo_tls is not None:
+            risultato['tls'] = certificati
+        return risultato
+
+    async def _scansiona_rete_async(self, hosts, porte, concorrenza, target=None):
+        """Scansiona gli host mantenendo una finestra limitata di task attivi.
+
+        Il rilevamento segue metodo_scoperta come nel motore a thread: gli
+        esiti di _esiti_scoperta vengono letti a blocchi in un thread, così
+        gli sweep ICMP/ARP non fermano l'event loop, e solo gli host senza
+        esito passano alla verifica TCP.
+        """
+        loop = asyncio.get_running_loop()
+        esiti = self._esiti_scoperta(hosts, target)
+        semaforo = self._semaforo_async(concorrenza)
+        semaforo_banner = asyncio.Semaphore(self.banner_max) if self.banner else None
+        semaforo_tls = asyncio.Semaphore(self.tls_max) if self.tls else None
+        # Ogni host occupa al massimo len(porte) slot: non serve crearne di più
+        finestra = max(1, concorrenza // max(1, min(len(porte), 16)))
+        host_attivi = []
+        in_corso = set()
+
+        def raccogli(completati):
+            for task in completati:
+                risultato = task.result()
+                if risultato:
+                    host_attivi.append(risultato)
+
+        try:
+            while True:
+                blocco = await loop.run_in_executor(
+                    None, lambda: list(itertools.islice(esiti, self.blocco_scoperta)))
+                if not blocco:
+                    break
+                for ip, attivo in blocco:
+                    if attivo is False:
+                        continue
+                    if len(in_corso) >= finestra:
+                        completati, in_corso = await asyncio.wait(in_corso, return_when=asyncio.FIRST_COMPLETED)
+                        raccogli(completati)
+                    in_corso.add(asyncio.ensure_future(self._scansiona_host_async(
+                        ip, porte, semaforo, semaforo_banner, semaforo_tls, attivo)))
+        finally:
+            esiti.close()
+
+        if in_corso:
+            completati, _ = await asyncio.wait(in_corso)
+            raccogli(completati)
+        return host_attivi
+
+    def scansiona_async(self, target, porte_personalizzate=None):
+        """Scansiona un IP, una rete o un TargetSet con il motore asyncio.
+
+        Restituisce lo stesso risultato di scansiona_host (IP singolo)
+        o di scansiona_rete (rete in notazione CIDR).
+        """
+        porte = porte_personalizzate if porte_personalizzate else self.porte_comuni
+        concorrenza = self._limite_concorrenza_async()
+
+        if isinstance(target, str) and "/" not in target:
+            async def singolo():
+                semaforo = self._semaforo_async(concorrenza)
+                semaforo_banner = asyncio.Semaphore(self.banner_max) if self.banner else None
+                semaforo_tls = asyncio.Semaphore(self.tls_max) if self.tls else None
+                return await self._scansiona_host_async(target, porte, semaforo, semaforo_banner, semaforo_tls)
+
+            print(f"🔍 Scansionando {target} (asyncio)...")
+            risultato = asyncio.run(singolo())
+            if risultato is None:
+                print("❌ Host non raggiungibile")
+            return risultato
+
+        try:
+            targets = as_target_set(target)
+        except ValueError as e:
+            print(f"❌ Errore: Formato rete non valido - {e}")
+            return []
+
+        print(f"🌐 Iniziando scansione asyncio della rete: {targets}")
+        print(f"📊 Numero totale di host da scansionare: {len(targets)}")
+        print(f"⚡ Connessioni simultanee: {concorrenza}")
+        if self.pps:
+            print(f"🚦 Limite di velocità: {self.pps:g} sonde/s")
+        print("-" * 60)
+
+        inizio_tempo = time.time()
+        host_attivi = asyncio.run(self._scansiona_rete_async(self._host_da_target(targets), porte, concorrenza,
+                                                             targets.supernet()))
+        host_attivi.sort(key=lambda h: address_key(h['ip']))
+        self.stampa_riassunto(host_attivi, len(targets), time.time() - inizio_tempo)
+        return host_attivi
+
     def scansiona_porta_singola(self, ip, porta_iniziale, porta_finale=None):
         """Scansiona un range di porte su un singolo IP"""
         if porta_finale is None:
@@ -203,21 +1204,21 @@ class IPScanner:
         porte_aperte = []
         porte_totali = porta_finale - porta_iniziale + 1
         
-        with ThreadPoolExecutor(max_workers=50) as executor:
-            future_to_porta = {executor.submit(self.scansiona_porta, ip, porta): porta 
-                             for porta in range(porta_iniziale, porta_finale + 1)}
+        executor = self._pool()
+        future_to_porta = {executor.submit(self.scansiona_porta, ip, porta): porta 
+                         for porta in range(porta_iniziale, porta_finale + 1)}
+        
+        completate = 0
+        for future in as_completed(future_to_porta):
+            porta_risultato = future.result()
+            completate += 1
             
-            completate = 0
-            for future in as_completed(future_to_porta):
-                porta_risultato = future.result()
-                completate += 1
-                
-                if completate % 100 == 0 or completate == porte_totali:
-                    progresso = (completate / porte_totali) * 100
-                    print(f"📊 Progresso: {progresso:.1f}% ({completate}/{porte_totali})")
-                
-                if porta_risultato:
-                    porte_aperte.append(porta_risultato)
+            if completate % 100 == 0 or completate == porte_totali:
+                progresso = (completate / porte_totali) * 100
+                print(f"📊 Progresso: {progresso:.1f}% ({completate}/{porte_totali})")
+            
+            if porta_risultato:
+                porte_aperte.append(porta_risultato)
         
         print(f"\n📋 Scansione completata!")
         print(f"🎯 Porte aperte trovate: {len(porte_aperte)}")
@@ -230,26 +1231,193 @@ class IPScanner:
                 print(f"  ▶ Porta {porta}: {servizio}")
 
 
+def carica_target(target=None, input_list=None, exclude_file=None, vicini=None):
+    """TargetSet della linea di comando: -t, -iL e vicini IPv6, meno le esclusioni.
+
+    I target di -t e -iL, se indicati entrambi, vengono uniti.
+    Solleva OSError se un file (o la cache dei vicini) non è leggibile,
+    ValueError se contiene target non validi o se non resta nessun target.
+    """
+    targets = TargetSet()
+    if target:
+        targets = TargetSet.parse(target)
+    if input_list:
+        elenco = TargetSet.from_file(input_list)
+        targets = targets.union(elenco) if targets else elenco
+    if vicini:
+        suggeriti = ipv6_hints.neighbor_targets(vicini)
+        targets = targets.union(suggeriti) if targets else suggeriti
+    if exclude_file:
+        targets = targets.subtract(TargetSet.from_file(exclude_file, solo_host=False))
+    if not targets:
+        raise ValueError("Nessun indirizzo da scansionare: i target sono vuoti o tutti esclusi")
+    return targets
+
+
 def main():
     scanner = IPScanner()
     scanner.stampa_banner()
     
     parser = argparse.ArgumentParser(description='IP Scanner - Scansionatore di rete e porte')
     parser.add_argument('-t', '--target', help='IP o rete da scansionare (es: 192.168.1.1 o 192.168.1.0/24)')
-    parser.add_argument('-p', '--ports', help='Porte da scansionare (es: 80,443 o 1-1000)')
-    parser.add_argument('--timeout', type=int, default=1, help='Timeout in secondi (default: 1)')
-    parser.add_argument('--threads', type=int, default=100, help='Numero massimo di thread (default: 100)')
+    parser.add_argument('-iL', '--input-list', metavar='FILE',
+                        help='File con i target da scansionare (IP, reti o range, uno o più per riga)')
+    parser.add_argument('--exclude-file', metavar='FILE',
+                        help='File con IP, reti o range da non scansionare mai')
+    parser.add_argument('--ipv6-neighbors', nargs='?', const='-', metavar='DUMP',
+                        help="Aggiunge ai target gli indirizzi IPv6 della cache dei vicini del sistema "
+                             "o di un dump salvato ('ip -6 neigh', 'ndp -an', 'netsh ... show neighbors')")
+    parser.add_argument('-p', '--ports',
+                        help="Porte da scansionare (es: 80,443, 1-1000 o 22,80-90,top100,web,db,!8080)")
+    parser.add_argument('--timeout', type=float, default=1.0,
+                        help='Timeout in secondi; con i timeout adattivi è il valore iniziale e massimo (default: 1)')
+    parser.add_argument('--min-timeout', type=float, default=0.1,
+                        help='Timeout minimo in secondi derivato dagli RTT misurati (default: 0.1)')
+    parser.add_argument('--retries', type=int, default=1,
+                        help='Nuovi tentativi per le porte senza risposta (timeout); le porte chiuse non vengono '
+                             'mai ritentate (default: 1)')
+    parser.add_argument('--fixed-timeout', action='store_true',
+                        help='Usa sempre --timeout invece di adattarlo all\'RTT di ogni host e subnet')
+    parser.add_argument('--threads', type=int, default=100,
+                        help='Numero massimo di sonde simultanee; la concorrenza si adatta fino a questo tetto (default: 100)')
+    parser.add_argument('--discovery', choices=['auto', 'tcp', 'icmp', 'arp'], default='auto',
+                        help='Metodo di rilevamento host: ARP sulle reti locali e TCP altrove (auto), '
+                             'connessione TCP, ping sweep ICMP o ARP (default: auto)')
+    parser.add_argument('--dns-server', help='Server DNS a cui inviare direttamente le query PTR (UDP, in pipeline)')
+    parser.add_argument('-o', '--output', help='File JSON Lines su cui salvare gli host attivi man mano')
+    parser.add_argument('--checkpoint', help='File di checkpoint aggiornato periodicamente durante le scansioni di rete')
+    parser.add_argument('--resume', action='store_true',
+                        help='Riprende la scansione salvata in --checkpoint saltando gli host già completati')
+    parser.add_argument('--async', dest='usa_async', action='store_true',
+                        help='Usa il motore asyncio (connessioni non bloccanti su un solo thread)')
+    parser.add_argument('--concurrency', type=int, default=5000,
+                        help='Connessioni simultanee del motore asyncio (default: 5000)')
+    parser.add_argument('--udp', action='store_true',
+                        help='Scansione UDP con payload per protocollo (DNS, NTP, SNMP, NetBIOS, TFTP); '
+                             'porte di default: udp = 53,67,69,123,137,161,500')
+    parser.add_argument('--syn', action='store_true',
+                        help='Scansione SYN half-open con socket raw (richiede root): un SYN per porta, '
+                             'RST alle porte aperte invece della connessione completa')
+    parser.add_argument('--rate', type=float, metavar='PPS',
+                        help='Sonde al secondo, per tutti i motori e protocolli (default: nessun limite)')
+    parser.add_argument('--fixed-concurrency', action='store_true',
+                        help='Tiene sempre il numero massimo di sonde in volo (tutti i motori) invece di adattarlo ai timeout osservati (AIMD)')
+    parser.add_argument('--banner', action='store_true',
+                        help='Legge il banner dei servizi sulle porte aperte (incluso nei risultati e nei report)')
+    parser.add_argument('--banner-bytes', type=int, default=256,
+                        help='Byte massimi letti per banner (default: 256)')
+    parser.add_argument('--banner-timeout', type=float, default=2.0,
+                        help='Secondi di attesa massima per ogni banner (default: 2)')
+    parser.add_argument('--banner-concurrency', type=int, default=256,
+                        help='Letture di banner simultanee, separate dalle sonde (default: 256)')
+    parser.add_argument('--tls', action='store_true',
+                        help='Raccoglie il certificato (soggetto, SAN, emittente, scadenza) delle porte TLS aperte')
+    parser.add_argument('--tls-ports', default='tls',
+                        help='Porte su cui tentare l\'handshake TLS (default: tls = 443,465,636,993,995,8443)')
+    parser.add_argument('--tls-timeout', type=float, default=3.0,
+                        help='Secondi massimi per ogni handshake TLS (default: 3)')
+    parser.add_argument('--tls-concurrency', type=int, default=64,
+                        help='Handshake TLS simultanei, separati dalle sonde (default: 64)')
+    parser.add_argument('--randomize', action='store_true',
+                        help='Visita gli host della rete in ordine pseudo-casuale (permutazione senza liste in memoria)')
+    parser.add_argument('--seed', type=int, help="Seme dell'ordine casuale, per ripetere lo stesso ordine")
+    parser.add_argument('--processes', type=int, default=1,
+                        help='Processi worker tra cui dividere la scansione di una rete (default: 1)')
+    parser.add_argument('--coordinator', metavar='HOST:PORTA',
+                        help='Coordina la scansione della rete distribuendo gli shard ai worker (es: 0.0.0.0:8700)')
+    parser.add_argument('--local-workers', type=int, default=0,
+                        help='Worker locali da avviare insieme al coordinatore (default: 0)')
+    parser.add_argument('--worker', metavar='URL',
+                        help='Esegue come worker del coordinatore indicato (es: http://10.0.0.5:8700)')
+    parser.add_argument('--report', help='Nome base dei report (CSV, Excel, JSON, HTML) della scansione coordinata')
     
     args = parser.parse_args()
     
     # Configura scanner
-    if args.timeout:
+    if args.timeout and args.timeout > 0:
         scanner.timeout = args.timeout
+    scanner.timeout_min = max(0.0, args.min_timeout)
+    scanner.timeout_adattivo = not args.fixed_timeout
+    scanner.tentativi = max(0, args.retries)
     if args.threads:
         scanner.thread_max = args.threads
+    if args.concurrency:
+        scanner.concorrenza_async = args.concurrency
+    scanner.metodo_scoperta = args.discovery
+    scanner.protocollo = 'udp' if args.udp else 'syn' if args.syn else 'tcp'
+    scanner.pps = args.rate if args.rate and args.rate > 0 else None
+    scanner.concorrenza_adattiva = not args.fixed_concurrency
+    if args.syn and args.udp:
+        print("❌ --syn e --udp non si possono usare insieme")
+        return
+    if scanner.protocollo == 'syn':
+        motivo = syn_available()
+        if motivo:
+            print(f"⚠️  Scansione SYN non disponibile: {motivo}; uso il connect TCP")
+            scanner.protocollo = 'tcp'
+    if scanner.protocollo != 'tcp' and args.usa_async:
+        print(f"⚠️  La scansione {scanner.protocollo.upper()} usa già un unico ciclo non bloccante, "
+              "--async verrà ignorato")
+        args.usa_async = False
+    scanner.banner = args.banner
+    scanner.banner_byte = max(1, args.banner_bytes)
+    scanner.banner_timeout = args.banner_timeout
+    scanner.banner_max = max(1, args.banner_concurrency)
+    scanner.tls = args.tls
+    scanner.tls_timeout = args.tls_timeout
+    scanner.tls_max = max(1, args.tls_concurrency)
+    try:
+        scanner.porte_tls = parse_port_spec(args.tls_ports)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+    scanner.ordine_casuale = args.randomize or args.seed is not None
+    scanner.seme = args.seed
+    if args.dns_server:
+        try:
+            scanner.resolver.set_server(args.dns_server)
+        except (ValueError, OSError) as e:
+            print(f"❌ Server DNS non valido: {e}")
+            return
+    
+    # Worker di una scansione distribuita: gli shard arrivano dal coordinatore
+    if args.worker:
+        print(f"🤝 Worker collegato a {args.worker}")
+        completati = run_worker(args.worker, scanner)
+        print(f"✅ Shard completati: {completati}")
+        return
+    
+    # Ripresa di una scansione interrotta
+    checkpoint = None
+    if args.resume:
+        if not args.checkpoint:
+            print("❌ --resume richiede --checkpoint FILE")
+            return
+        try:
+            checkpoint = ScanCheckpoint.load(args.checkpoint)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"❌ Impossibile leggere il checkpoint: {e}")
+            return
+        if checkpoint.finished:
+            print(f"✅ La scansione in {args.checkpoint} è già completata")
+            return
+        if not (args.target or args.input_list or args.ipv6_neighbors):
+            # Il target salvato ha la forma "rete", "@file" o "rete + @file", " + vicini@dump" e " !@esclusioni"
+            base, _, esclusioni = checkpoint.target.partition(' !@')
+            for parte in base.split(' + '):
+                if parte == 'vicini IPv6':
+                    args.ipv6_neighbors = '-'
+                elif parte.startswith('vicini@'):
+                    args.ipv6_neighbors = parte[len('vicini@'):]
+                elif parte.startswith('@'):
+                    args.input_list = parte[1:]
+                else:
+                    args.target = parte
+            args.exclude_file = args.exclude_file or esclusioni or None
+        args.ports = args.ports or checkpoint.ports
     
     # Modalità interattiva se non ci sono argomenti
-    if not args.target:
+    if not (args.target or args.input_list or args.ipv6_neighbors):
         print("🎯 MODALITÀ INTERATTIVA")
         print("\nScegli un'opzione:")
         print("1. Scansiona un singolo IP")
@@ -271,24 +1439,23 @@ def main():
                 
                 elif scelta == "2":
                     rete = input("Inserisci la rete da scansionare (es: 192.168.1.0/24): ").strip()
-                    scanner.scansiona_rete(rete)
+                    # Con --checkpoint i progressi sopravvivono a un Ctrl-C
+                    checkpoint_rete = ScanCheckpoint(args.checkpoint, rete) if args.checkpoint else None
+                    scanner.scansiona_rete(rete, checkpoint=checkpoint_rete)
                 
                 elif scelta == "3":
                     ip = input("Inserisci l'IP: ").strip()
-                    porta_input = input("Inserisci le porte (es: 80,443 o 1-1000): ").strip()
+                    porta_input = input("Inserisci le porte (es: 80,443, 1-1000 o top100,web,!8080): ").strip()
                     
                     try:
                         ipaddress.ip_address(ip)
+                        porte = parse_port_spec(porta_input)
+                        intervalli = porte.ranges()
                         
-                        if "-" in porta_input:
-                            inizio, fine = map(int, porta_input.split("-"))
-                            scanner.scansiona_porta_singola(ip, inizio, fine)
-                        elif "," in porta_input:
-                            porte = [int(p.strip()) for p in porta_input.split(",")]
-                            scanner.scansiona_host(ip, porte)
+                        if len(intervalli) == 1:
+                            scanner.scansiona_porta_singola(ip, *intervalli[0])
                         else:
-                            porta = int(porta_input)
-                            scanner.scansiona_porta_singola(ip, porta)
+                            scanner.scansiona_host(ip, porte)
                     except ValueError:
                         print("❌ IP o formato porte non valido!")
                 
@@ -307,21 +1474,57 @@ def main():
         # Modalità da linea di comando
         porte_personalizzate = None
         if args.ports:
-            if "-" in args.ports:
-                inizio, fine = map(int, args.ports.split("-"))
-                porte_personalizzate = list(range(inizio, fine + 1))
-            elif "," in args.ports:
-                porte_personalizzate = [int(p.strip()) for p in args.ports.split(",")]
+            try:
+                porte_personalizzate = parse_port_spec(args.ports)
+            except ValueError as e:
+                print(f"❌ {e}")
+                return
+        
+        # Elenchi di target ed esclusioni diventano un unico insieme di intervalli
+        bersaglio = args.target
+        try:
+            if args.input_list or args.exclude_file or args.ipv6_neighbors:
+                bersaglio = carica_target(args.target, args.input_list, args.exclude_file, args.ipv6_neighbors)
             else:
-                porte_personalizzate = [int(args.ports)]
+                try:
+                    ipaddress.ip_address(bersaglio)
+                except ValueError:
+                    # Reti, range e pattern (es: 10.0.0.1-50, ::1-::ffff)
+                    bersaglio = TargetSet.parse(bersaglio)
+        except (OSError, ValueError) as e:
+            print(f"❌ {e}")
+            return
+        
+        if checkpoint is not None and not checkpoint.matches(str(bersaglio), porte_personalizzate):
+            print(f"❌ Il checkpoint si riferisce a {checkpoint.target} (porte: {checkpoint.ports or 'comuni'})")
+            return
         
         try:
             # Verifica se è un IP singolo o una rete
-            if "/" in args.target:
-                scanner.scansiona_rete(args.target, porte_personalizzate)
+            if isinstance(bersaglio, TargetSet):
+                if args.checkpoint and checkpoint is None:
+                    checkpoint = ScanCheckpoint(args.checkpoint, str(bersaglio), porte_personalizzate)
+                if args.coordinator:
+                    scanner.scansiona_distribuita(bersaglio, porte_personalizzate, args.coordinator,
+                                                  args.local_workers, args.output, args.report)
+                elif args.usa_async:
+                    if checkpoint is not None:
+                        print("⚠️  Il motore asyncio non supporta i checkpoint, verranno ignorati")
+                    if args.processes > 1:
+                        print("⚠️  Il motore asyncio usa un solo processo, --processes verrà ignorato")
+                    scanner.scansiona_async(bersaglio, porte_personalizzate)
+                else:
+                    scanner.scansiona_rete_flusso(bersaglio, porte_personalizzate, args.output, checkpoint,
+                                                  max(1, args.processes))
             else:
                 ipaddress.ip_address(args.target)
-                scanner.scansiona_host(args.target, porte_personalizzate)
+                if args.usa_async:
+                    risultato = scanner.scansiona_async(args.target, porte_personalizzate)
+                else:
+                    risultato = scanner.scansiona_host(args.target, porte_personalizzate)
+                if risultato and args.output:
+                    with open(args.output, 'a', encoding='utf-8') as f:
+                        f.write(json.dumps(risultato, ensure_ascii=False) + "\n")
         except ValueError:
             print(f"❌ Target non valido: {args.target}")
 
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Target IPv6 per IP Scanner
+Indirizzi da scansionare ricavati da fonti di suggerimento (cache dei vicini)
+"""
+
+import ipaddress
+import platform
+import subprocess
+
+from target_set import TargetSet, address_key
+
+# Comandi che stampano la cache dei vicini IPv6 (NDP) per sistema operativo
+COMANDI_VICINI = {
+    'Linux': ['ip', '-6', 'neigh', 'show'],
+    'Darwin': ['ndp', '-an'],
+    'FreeBSD': ['ndp', '-an'],
+    'Windows': ['netsh', 'interface', 'ipv6', 'show', 'neighbors'],
+}
+
+
+def parse_neighbor_dump(testo):
+    """Estrae gli indirizzi IPv6 da un dump della cache dei vicini.
+
+    Riconosce l'output di 'ip -6 neigh', 'ndp -an' e 'netsh interface
+    ipv6 show neighbors': il primo campo di ogni riga che sia un indirizzo
+    IPv6. Link-local (senza scope non sono raggiungibili), multicast e
+    non specificato vengono scartati. Restituisce una lista ordinata
+    senza duplicati.
+    """
+    indirizzi = set()
+    for riga in testo.splitlines():
+        campi = riga.split()
+        if not campi or ":" not in campi[0]:
+            continue
+        try:
+            ip = ipaddress.IPv6Address(campi[0].split("%", 1)[0])
+        except ValueError:
+            continue
+        if ip.is_link_local or ip.is_multicast or ip.is_unspecified:
+            continue
+        indirizzi.add(str(ip))
+    return sorted(indirizzi, key=address_key)
+
+
+def read_neighbor_cache():
+    """Legge la cache dei vicini IPv6 del sistema.
+
+    Solleva OSError se il comando non è disponibile o non riesce.
+    """
+    comando = COMANDI_VICINI.get(platform.system())
+    if comando is None:
+        raise OSError(f"cache dei vicini non supportata su {platform.system()}")
+    try:
+        uscita = subprocess.run(comando, capture_output=True, text=True, timeout=10, check=True)
+    except subprocess.SubprocessError as e:
+        raise OSError(f"{' '.join(comando)}: {e}")
+    return uscita.stdout
+
+
+def neighbor_targets(fonte='-'):
+    """TargetSet dalla cache dei vicini ('-' = sistema, altrimenti un file di dump)"""
+    if fonte == '-':
+        testo, descrizione = read_neighbor_cache(), "vicini IPv6"
+    else:
+        with open(fonte, encoding="utf-8", errors="replace") as f:
+            testo = f.read()
+        descrizione = f"vicini@{fonte}"
+    chiavi = [address_key(ip) for ip in parse_neighbor_dump(testo)]
+    return TargetSet(((chiave, chiave) for chiave in chiavi), descrizione)
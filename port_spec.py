@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Selezione porte per IP Scanner
+Parser unico delle specifiche porte e insiemi di porte su bitmap a 65536 bit
+"""
+
+import re
+
+import config
+from service_registry import SERVICE_FILES
+
+NUM_PORTE = 65536
+
+# Le 100 porte TCP più frequenti secondo nmap, in ordine di frequenza
+# (usate per topN quando nmap-services non è installato)
+TOP_PORTS = [
+    80, 23, 443, 21, 22, 25, 3389, 110, 445, 139, 143, 53, 135, 3306, 8080,
+    1723, 111, 995, 993, 5900, 1025, 587, 8888, 199, 1720, 465, 548, 113, 81,
+    6001, 10000, 514, 5060, 179, 1026, 2000, 8443, 8000, 32768, 554, 26, 1433,
+    49152, 2001, 515, 8008, 49154, 1027, 5666, 646, 5000, 5631, 631, 49153,
+    8081, 2049, 88, 79, 5800, 106, 2121, 1110, 49155, 6000, 513, 990, 5357,
+    427, 49156, 543, 544, 5101, 144, 7, 389, 8009, 3128, 444, 9999, 5009,
+    7070, 5190, 3000, 5432, 1900, 3986, 13, 1029, 9, 5051, 6646, 49157, 1028,
+    873, 1755, 2717, 4899, 9100, 119, 37,
+]
+
+# Profili utilizzabili per nome nelle specifiche
+PROFILI = {
+    'comuni': config.PORTE_COMUNI,
+    'web': config.WEB_PORTS,
+    'db': config.DB_PORTS,
+    'database': config.DB_PORTS,
+    'rete': config.NETWORK_PORTS,
+    'tls': config.TLS_PORTS,
+    'udp': config.UDP_PORTS,
+}
+
+_BYTE_NON_NULLO = re.compile(b"[^\x00]")
+
+# Bit impostati di ogni valore di byte, per iterare la bitmap
+_BIT_DEL_BYTE = [tuple(b for b in range(8) if valore >> b & 1) for valore in range(256)]
+
+
+class PortSet:
+    """Insieme immutabile di porte memorizzato come bitmap a 65536 bit.
+
+    Unione, intersezione e differenza sono operazioni su interi (in C),
+    l'iterazione restituisce le porte in ordine crescente saltando i
+    byte vuoti della bitmap.
+    """
+
+    __slots__ = ('_bits', '_len')
+
+    def __init__(self, porte=()):
+        bits = 0
+        for porta in porte:
+            if not 1 <= porta < NUM_PORTE:
+                raise ValueError(f"Porta fuori intervallo: {porta}")
+            bits |= 1 << porta
+        self._bits = bits
+        self._len = None
+
+    @classmethod
+    def _da_bits(cls, bits):
+        insieme = cls.__new__(cls)
+        insieme._bits = bits & ((1 << NUM_PORTE) - 1)
+        insieme._len = None
+        return insieme
+
+    @classmethod
+    def from_range(cls, inizio, fine):
+        """Insieme delle porte da inizio a fine (inclusi)"""
+        if not 1 <= inizio <= fine < NUM_PORTE:
+            raise ValueError(f"Range porte non valido: {inizio}-{fine}")
+        return cls._da_bits(((1 << (fine - inizio + 1)) - 1) << inizio)
+
+    def __or__(self, altro):
+        return PortSet._da_bits(self._bits | altro._bits)
+
+    def __and__(self, altro):
+        return PortSet._da_bits(self._bits & altro._bits)
+
+    def __sub__(self, altro):
+        return PortSet._da_bits(self._bits & ~altro._bits)
+
+    def __contains__(self, porta):
+        return 0 <= porta < NUM_PORTE and bool(self._bits >> porta & 1)
+
+    def __len__(self):
+        if self._len is None:
+            self._len = bin(self._bits).count('1')
+        return self._len
+
+    def __bool__(self):
+        return self._bits != 0
+
+    def __eq__(self, altro):
+        return isinstance(altro, PortSet) and self._bits == altro._bits
+
+    def __hash__(self):
+        return hash(self._bits)
+
+    def __iter__(self):
+        dati = self._bits.to_bytes(NUM_PORTE // 8, 'little')
+        for trovato in _BYTE_NON_NULLO.finditer(dati):
+            base = trovato.start() * 8
+            for bit in _BIT_DEL_BYTE[dati[trovato.start()]]:
+                yield base + bit
+
+    def ranges(self):
+        """Intervalli contigui (inizio, fine) delle porte dell'insieme"""
+        intervalli = []
+        for porta in self:
+            if intervalli and intervalli[-1][1] == porta - 1:
+                intervalli[-1][1] = porta
+            else:
+                intervalli.append([porta, porta])
+        return [tuple(intervallo) for intervallo in intervalli]
+
+    def to_spec(self):
+        """Specifica compatta (es. '22,80-90') che parse_port_spec rilegge"""
+        return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in self.ranges())
+
+    def __repr__(self):
+        return f"PortSet('{self.to_spec()}')"
+
+
+def top_ports(n, proto="tcp"):
+    """Le n porte più frequenti (da nmap-services se disponibile)"""
+    for percorso in SERVICE_FILES:
+        if not percorso.endswith("nmap-services"):
+            continue
+        try:
+            frequenze = []
+            with open(percorso, encoding="utf-8", errors="replace") as f:
+                for riga in f:
+                    campi = riga.split("#", 1)[0].split()
+                    if len(campi) < 3 or not campi[1].endswith("/" + proto):
+                        continue
+                    porta = campi[1].split("/", 1)[0]
+                    if porta.isdigit():
+                        frequenze.append((float(campi[2]), int(porta)))
+        except (OSError, ValueError):
+            continue
+        frequenze.sort(reverse=True)
+        return [porta for _, porta in frequenze[:n]]
+    return TOP_PORTS[:n]
+
+
+def _parse_token(token):
+    """Converte un elemento della specifica in un PortSet"""
+    nome = token.lower()
+    if nome in PROFILI:
+        return PortSet(PROFILI[nome])
+    if nome in ('all', 'tutte', '-'):
+        return PortSet.from_range(1, NUM_PORTE - 1)
+    if nome.startswith('top') and nome[3:].isdigit():
+        return PortSet(top_ports(int(nome[3:])))
+    if "-" in nome:
+        inizio, _, fine = nome.partition("-")
+        return PortSet.from_range(int(inizio or 1), int(fine or NUM_PORTE - 1))
+    return PortSet([int(nome)])
+
+
+def parse_port_spec(spec):
+    """Interpreta una specifica di porte e restituisce un PortSet.
+
+    Elementi separati da virgola: porte singole (80), range (1-1024,
+    anche aperti come 60000-), profili di config (comuni, web, db, rete, tls, udp),
+    topN (top100) e all. Un elemento preceduto da '!' viene escluso,
+    es: "top1000,web,!8080,!9000-9100".
+    Solleva ValueError se la specifica non è valida.
+    """
+    incluse = PortSet()
+    escluse = PortSet()
+    for token in spec.split(","):
+        token = token.strip()
+        if not token:
+            continue
+        esclusione = token.startswith("!")
+        if esclusione:
+            token = token[1:].strip()
+        try:
+            porte = _parse_token(token)
+        except ValueError:
+            raise ValueError(f"Specifica porte non valida: '{token}'")
+        if esclusione:
+            escluse = escluse | porte
+        else:
+            incluse = incluse | porte
+
+    # Solo esclusioni: si parte dalle porte comuni
+    if not incluse and escluse:
+        incluse = PortSet(config.PORTE_COMUNI)
+    risultato = incluse - escluse
+    if not risultato:
+        raise ValueError(f"Nessuna porta selezionata da '{spec}'")
+    return risultato
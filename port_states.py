@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stati delle porte per IP Scanner
+Valori comuni a tutti i motori di scansione (connect, asyncio, SYN e UDP)
+"""
+
+# Risposta del servizio (SYN/ACK, connessione riuscita o risposta UDP)
+APERTA = 'aperta'
+# Rifiuto esplicito: RST o ICMP port unreachable
+CHIUSA = 'chiusa'
+# Nessuna risposta TCP entro i tentativi previsti
+FILTRATA = 'filtrata'
+# Nessuna risposta UDP: servizio silenzioso o pacchetti filtrati
+APERTA_FILTRATA = 'aperta|filtrata'
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Controllo della velocità per IP Scanner
+Token bucket per le sonde al secondo e finestra di concorrenza adattiva (AIMD)
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+
+
+class TokenBucket:
+    """Limite di sonde al secondo con brevi raffiche.
+
+    Il secchio si riempie di pps gettoni al secondo fino a burst (di
+    default un centesimo di secondo di sonde) e ogni sonda ne consuma
+    uno. Un consumo superiore ai gettoni presenti lascia un debito che
+    ritarda le sonde successive. Thread-safe: il mittente della scansione
+    SYN attende i gettoni mentre il ciclo di ricezione registra le
+    sonde ripetute.
+    """
+
+    def __init__(self, pps, burst=None):
+        self.pps = float(pps)
+        self.burst = max(1.0, float(burst) if burst is not None else self.pps / 100)
+        self._gettoni = self.burst
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _ricarica(self):
+        adesso = time.monotonic()
+        self._gettoni = min(self.burst, self._gettoni + (adesso - self._ultimo) * self.pps)
+        self._ultimo = adesso
+
+    def delay(self):
+        """Secondi da attendere prima della prossima sonda (0 se può partire subito)"""
+        with self._lock:
+            self._ricarica()
+            if self._gettoni >= 1:
+                return 0.0
+            return (1 - self._gettoni) / self.pps
+
+    def consume(self, sonde=1):
+        """Registra l'invio di sonde (anche oltre i gettoni disponibili)"""
+        with self._lock:
+            self._ricarica()
+            self._gettoni -= sonde
+
+    def acquire(self):
+        """Attende, bloccando, che una sonda possa partire e la registra"""
+        attesa = self.delay()
+        while attesa:
+            time.sleep(attesa)
+            attesa = self.delay()
+        self.consume()
+
+
+class AdaptiveWindow:
+    """Sonde in volo regolate come il controllo di congestione TCP (AIMD).
+
+    Un giro sono limit esiti registrati. La finestra parte da iniziale e
+    raddoppia a ogni giro (slow start) fino alla prima perdita, poi
+    cresce di passo per giro. Se la quota di timeout di un giro supera
+    quella di riferimento di oltre soglia la finestra si dimezza, senza
+    scendere sotto minimo. Il riferimento è la media mobile delle quote
+    dei giri: le porte filtrate, che scadono sempre, non vengono
+    scambiate per congestione e un cambio stabile (una subnet tutta
+    filtrata) viene assorbito in pochi giri. Dopo un dimezzamento gli
+    esiti delle sonde già in volo sono ignorati.
+    """
+
+    def __init__(self, massimo, minimo=None, iniziale=None, soglia=0.1, passo=None):
+        self.massimo = max(1, massimo)
+        minimo = minimo if minimo is not None else self.massimo // 16
+        self.minimo = max(1, min(minimo, self.massimo))
+        iniziale = iniziale if iniziale is not None else self.massimo // 8
+        self.limit = min(self.massimo, max(self.minimo, iniziale))
+        self.soglia = soglia
+        self.passo = passo if passo is not None else max(1, self.massimo // 32)
+        self._slow_start = True
+        self._esiti = 0
+        self._timeout = 0
+        self._da_ignorare = 0
+        self._riferimento = None
+
+    def record(self, scaduta):
+        """Registra l'esito di una sonda: scaduta=True se non ha avuto risposta"""
+        if self._da_ignorare:
+            self._da_ignorare -= 1
+            return
+        self._esiti += 1
+        self._timeout += bool(scaduta)
+        if self._esiti < self.limit:
+            return
+        quota = self._timeout / self._esiti
+        self._esiti = self._timeout = 0
+        if self._riferimento is None:
+            self._riferimento = quota
+        perdite = quota > self._riferimento + self.soglia
+        self._riferimento += (quota - self._riferimento) / 8
+        if perdite:
+            # Timeout oltre il riferimento: decremento moltiplicativo
+            self._da_ignorare = self.limit
+            self.limit = max(self.minimo, self.limit // 2)
+            self._slow_start = False
+        else:
+            crescita = self.limit if self._slow_start else self.passo
+            self.limit = min(self.massimo, self.limit + crescita)
+
+
+class RateLimitedSemaphore:
+    """Semaforo asyncio che lascia entrare al massimo pps sonde al secondo.
+
+    Con una AdaptiveWindow (finestra) le sonde ammesse sono al massimo
+    finestra.limit, sotto il tetto di concorrenza; chi usa il semaforo
+    registra gli esiti con finestra.record.
+    """
+
+    def __init__(self, concorrenza, pps=None, finestra=None):
+        self._semaforo = asyncio.Semaphore(concorrenza)
+        self._secchio = TokenBucket(pps) if pps else None
+        self.finestra = finestra
+        self._dentro = 0
+        self._in_attesa = deque()
+
+    async def __aenter__(self):
+        await self._semaforo.acquire()
+        nella_finestra = False
+        try:
+            if self.finestra is not None:
+                await self._entra()
+                nella_finestra = True
+            if self._secchio is None:
+                return
+            # delay e consume non cedono il controllo: nessuna corsa tra coroutine
+            attesa = self._secchio.delay()
+            while attesa:
+                await asyncio.sleep(attesa)
+                attesa = self._secchio.delay()
+            self._secchio.consume()
+        except BaseException:
+            # Annullata durante l'attesa: __aexit__ non verrà chiamato
+            if nella_finestra:
+                self._esci()
+            self._semaforo.release()
+            raise
+
+    async def __aexit__(self, *eccezione):
+        if self.finestra is not None:
+            self._esci()
+        self._semaforo.release()
+
+    async def _entra(self):
+        while self._dentro >= self.finestra.limit:
+            attesa = asyncio.get_running_loop().create_future()
+            self._in_attesa.append(attesa)
+            try:
+                await attesa
+            except asyncio.CancelledError:
+                if attesa.done() and not attesa.cancelled():
+                    # Svegliata e poi annullata: il posto passa a un'altra sonda
+                    self._sveglia()
+                raise
+        self._dentro += 1
+
+    def _esci(self):
+        self._dentro -= 1
+        self._sveglia()
+
+    def _sveglia(self):
+        # Tante sonde in attesa quanti sono i posti liberi (la finestra può essere cresciuta)
+        liberi = self.finestra.limit - self._dentro
+        while liberi > 0 and self._in_attesa:
+            attesa = self._in_attesa.popleft()
+            if not attesa.done():
+                attesa.set_result(None)
+                liberi -= 1
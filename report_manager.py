@@ -9,24 +9,29 @@ import pandas as pd
 import json
 import csv
 import html
+import ipaddress
 import webbrowser
 import os
-import socket
 import subprocess
 import platform
 from datetime import datetime
 from scapy.all import ARP, Ether, srp
 import threading
 import time
+import host_discovery
+from dns_resolver import get_shared_resolver
 
 class ReportManager:
     def __init__(self):
         self.results_data = []
+        # Resolver condiviso con lo scanner: riusa i PTR già risolti
+        self.resolver = get_shared_resolver()
         self.network_info = {}
         self.scan_metadata = {}
         
-    def add_result(self, ip, active, hostname=None, open_ports=None, mac_address=None, device_name=None):
-        """Aggiunge un risultato al report"""
+    def add_result(self, ip, active, hostname=None, open_ports=None, mac_address=None, device_name=None,
+                   banners=None, certificates=None):
+        """Aggiunge un risultato al report (banners e certificates: porta -> banner o certificato TLS)"""
         result = {
             'ip': ip,
             'active': active,
@@ -35,6 +40,8 @@ class ReportManager:
             'ports_count': len(open_ports) if open_ports else 0,
             'mac_address': mac_address or 'N/A',
             'device_name': device_name or 'N/A',
+            'banners': {int(porta): testo for porta, testo in (banners or {}).items()},
+            'certificates': {int(porta): cert for porta, cert in (certificates or {}).items()},
             'status': '✅ Attivo' if active else '❌ Inattivo',
             'timestamp': datetime.now().isoformat()
         }
@@ -70,17 +77,33 @@ class ReportManager:
             print(f"Errore MAC address per {ip}: {e}")
             return None
             
+    def get_mac_addresses(self, targets, timeout=2):
+        """Ottiene i MAC address di più IP con un'unica richiesta ARP.
+
+        targets può essere una subnet in notazione CIDR (es. 192.168.1.0/24)
+        o una lista di IP. Usa l'ARP sweep di host_discovery: tutte le
+        richieste partono con una sola chiamata srp, quindi l'attesa
+        complessiva è circa un timeout.
+        Restituisce un dizionario {ip: mac} con i soli IP che hanno risposto.
+        """
+        if not targets:
+            return {}
+        try:
+            if isinstance(targets, str):
+                targets = list(ipaddress.ip_network(targets, strict=False).hosts())
+            return host_discovery.arp_sweep(targets, timeout)
+        except (ValueError, OSError) as e:
+            print(f"Errore ARP sweep: {e}")
+            return {}
+            
     def get_device_name(self, ip, mac_address=None):
         """Tenta di ottenere il nome del dispositivo"""
         device_name = "N/A"
         
-        try:
-            # Prova con hostname reverse
-            hostname = socket.gethostbyaddr(ip)[0]
-            if hostname and not hostname.startswith(ip):
-                device_name = hostname
-        except:
-            pass
+        # Prova con hostname reverse (dalla cache del resolver se già risolto)
+        hostname = self.resolver.resolve(ip)
+        if hostname and not hostname.startswith(ip):
+            device_name = hostname
             
         # Prova con NetBIOS (Windows)
         if device_name == "N/A" and platform.system() == "Windows":
@@ -106,10 +129,13 @@ class ReportManager:
         """Arricchisce i risultati con MAC address e nomi dispositivi"""
         total = len(self.results_data)
         
+        # Un solo ARP sweep per tutti gli host attivi
+        macs = self.get_mac_addresses([r['ip'] for r in self.results_data if r['active']])
+        
         for i, result in enumerate(self.results_data):
             if result['active']:
-                # Ottieni MAC address
-                mac = self.get_mac_address(result['ip'])
+                # MAC address dallo sweep
+                mac = macs.get(result['ip'])
                 result['mac_address'] = mac if mac else 'N/A'
                 
                 # Ottieni nome dispositivo
@@ -120,6 +146,20 @@ class ReportManager:
             if progress_callback:
                 progress_callback(i + 1, total)
                 
+    @staticmethod
+    def format_banners(banners):
+        """Banner in una sola riga: prima riga di ciascuno, per porta"""
+        return ' | '.join(f"{porta}: {testo.splitlines()[0]}" for porta, testo in sorted(banners.items()) if testo)
+
+    @staticmethod
+    def format_certificates(certificates):
+        """Certificati TLS in una sola riga: soggetto, SAN ed emittente per porta"""
+        parti = []
+        for porta, cert in sorted(certificates.items()):
+            san = f" [{', '.join(cert['san'])}]" if cert.get('san') else ''
+            parti.append(f"{porta}: {cert['soggetto']}{san} da {cert['emittente']}, scade {cert['scadenza'][:10]}")
+        return ' | '.join(parti)
+
     def export_to_csv(self, filename):
         """Esporta i risultati in formato CSV"""
         try:
@@ -127,11 +167,13 @@ class ReportManager:
             
             # Riordina le colonne
             columns_order = ['ip', 'status', 'hostname', 'mac_address', 'device_name', 
-                           'ports_count', 'open_ports', 'timestamp']
+                           'ports_count', 'open_ports', 'banners', 'certificates', 'timestamp']
             df = df[columns_order]
             
-            # Converte lista porte in stringa
+            # Converte lista porte, banner e certificati in stringa
             df['open_ports'] = df['open_ports'].apply(lambda x: ', '.join(map(str, x)) if x else '')
+            df['banners'] = df['banners'].apply(self.format_banners)
+            df['certificates'] = df['certificates'].apply(self.format_certificates)
             
             df.to_csv(filename, index=False, encoding='utf-8-sig')
             return True
@@ -146,15 +188,17 @@ class ReportManager:
             
             # Riordina le colonne
             columns_order = ['ip', 'status', 'hostname', 'mac_address', 'device_name', 
-                           'ports_count', 'open_ports', 'timestamp']
+                           'ports_count', 'open_ports', 'banners', 'certificates', 'timestamp']
             df = df[columns_order]
             
-            # Converte lista porte in stringa
+            # Converte lista porte, banner e certificati in stringa
             df['open_ports'] = df['open_ports'].apply(lambda x: ', '.join(map(str, x)) if x else '')
+            df['banners'] = df['banners'].apply(self.format_banners)
+            df['certificates'] = df['certificates'].apply(self.format_certificates)
             
             # Rinomina colonne per Excel
             df.columns = ['IP Address', 'Status', 'Hostname', 'MAC Address', 'Device Name',
-                         'Ports Count', 'Open Ports', 'Scan Time']
+                         'Ports Count', 'Open Ports', 'Banners', 'TLS Certificates', 'Scan Time']
             
             with pd.ExcelWriter(filename, engine='openpyxl') as writer:
                 df.to_excel(writer, sheet_name='Scan Results', index=False)
@@ -415,6 +459,8 @@ class ReportManager:
                         <th>🔧 MAC Address</th>
                         <th>💻 Nome Dispositivo</th>
                         <th>🔓 Porte Aperte</th>
+                        <th>📜 Banner</th>
+                        <th>🔒 Certificati TLS</th>
                         <th>⏰ Scan Time</th>
                     </tr>
                 </thead>
@@ -485,6 +531,8 @@ class ReportManager:
                     <td><span class="mac-address">{html.escape(result['mac_address'])}</span></td>
                     <td><span class="device-name">{html.escape(result['device_name'])}</span></td>
                     <td><span class="ports">{html.escape(ports_str)}</span></td>
+                    <td>{html.escape(self.format_banners(result['banners']))}</td>
+                    <td>{html.escape(self.format_certificates(result['certificates']))}</td>
                     <td>{html.escape(result['timestamp'][:19])}</td>
                 </tr>
                 """
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Timeout adattivi per IP Scanner
+Stima di RTT e varianza per host e subnet, con il calcolo dell'RTO di TCP (RFC 6298)
+"""
+
+import socket
+import threading
+from collections import OrderedDict
+
+# Pesi della media mobile di RTT e varianza (RFC 6298)
+ALFA = 1 / 8
+BETA = 1 / 4
+
+
+def subnet_key(ip):
+    """Subnet di un indirizzo testuale: /24 per IPv4, /64 per IPv6"""
+    if ":" in ip:
+        return socket.inet_pton(socket.AF_INET6, ip)[:8]
+    return ip.rsplit(".", 1)[0]
+
+
+class RttEstimator:
+    """Timeout di ogni sonda derivato dai tempi di risposta osservati.
+
+    Per ogni host e per la sua subnet tiene RTT medio (SRTT) e varianza
+    (RTTVAR) come TCP; il timeout è SRTT + 4 * RTTVAR, limitato tra
+    minimo e massimo. Un host senza campioni usa la stima della sua
+    subnet e, in mancanza anche di quella, iniziale. Sono conservate al
+    massimo capacita stime (le meno recenti vengono scartate), quindi la
+    memoria non dipende dalla dimensione del target. Thread-safe.
+    """
+
+    def __init__(self, iniziale=1.0, minimo=0.1, massimo=None, capacita=65536):
+        self.iniziale = iniziale
+        self.massimo = massimo if massimo is not None else iniziale
+        self.minimo = minimo
+        self.capacita = capacita
+        # chiave (ip o subnet) -> [srtt, rttvar]
+        self._stime = OrderedDict()
+        self._lock = threading.Lock()
+
+    def timeout(self, ip):
+        """Timeout in secondi per la prossima sonda verso ip"""
+        with self._lock:
+            stima = self._stime.get(ip) or self._stime.get(subnet_key(ip))
+        if stima is None:
+            return self.iniziale
+        srtt, rttvar = stima
+        return min(self.massimo, max(self.minimo, srtt + 4 * rttvar))
+
+    def update(self, ip, rtt):
+        """Registra il tempo di risposta (secondi) di una sonda verso ip"""
+        with self._lock:
+            for chiave in (ip, subnet_key(ip)):
+                stima = self._stime.get(chiave)
+                if stima is None:
+                    self._stime[chiave] = [rtt, rtt / 2]
+                    if len(self._stime) > self.capacita:
+                        self._stime.popitem(last=False)
+                    continue
+                stima[1] += BETA * (abs(stima[0] - rtt) - stima[1])
+                stima[0] += ALFA * (rtt - stima[0])
+                self._stime.move_to_end(chiave)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Checkpoint per IP Scanner
+Salvataggio periodico delle scansioni lunghe e ripresa del lavoro mancante
+"""
+
+import bisect
+import ipaddress
+import json
+import os
+import time
+from datetime import datetime
+
+from port_spec import PortSet
+from target_set import address_key
+
+FORMAT_VERSION = 1
+
+
+def _normalize_target(target):
+    """Forma canonica del target (la rete per i CIDR)"""
+    try:
+        return str(ipaddress.ip_network(target, strict=False))
+    except (TypeError, ValueError):
+        return target
+
+
+def _ports_to_spec(ports):
+    """Rappresentazione compatta delle porte (None = porte comuni)"""
+    if not ports:
+        return None
+    if not isinstance(ports, PortSet):
+        ports = PortSet(ports)
+    return ports.to_spec()
+
+
+class ScanCheckpoint:
+    """Stato di una scansione: intervalli di indirizzi completati e risultati.
+
+    Gli indirizzi completati sono tenuti come intervalli interi disgiunti:
+    poiché lo scheduler completa gli host quasi in ordine, gli intervalli
+    restano pochi anche su reti enormi. Nelle scansioni in ordine casuale
+    (seed impostato) gli intervalli sono sulle posizioni della
+    permutazione invece che sugli indirizzi.
+    """
+
+    def __init__(self, path, target=None, ports=None, interval=10.0):
+        self.path = path
+        self.target = _normalize_target(target)
+        self.ports = _ports_to_spec(ports)
+        self.interval = interval
+        self.results = []
+        self.finished = False
+        self.created = datetime.now().isoformat()
+        # Seme dell'ordine casuale (None = ordine crescente degli indirizzi)
+        self.seed = None
+        self._starts = []
+        self._ends = []
+        # indirizzo -> posizione nella permutazione, per gli host in corso
+        self._positions = {}
+        self._last_save = time.monotonic()
+
+    @classmethod
+    def load(cls, path, interval=10.0):
+        """Carica un checkpoint salvato. Solleva OSError o ValueError"""
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Versione checkpoint non supportata: {data.get('version')}")
+        checkpoint = cls(path, data['target'], interval=interval)
+        checkpoint.ports = data.get('ports')
+        checkpoint.results = data.get('results', [])
+        checkpoint.finished = data.get('finished', False)
+        checkpoint.seed = data.get('seed')
+        checkpoint.created = data.get('created', checkpoint.created)
+        checkpoint.add_ranges(data.get('completed', []))
+        return checkpoint
+
+    def add_ranges(self, ranges):
+        """Segna come completati gli intervalli [inizio, fine] indicati"""
+        intervalli = sorted(list(zip(self._starts, self._ends)) + [tuple(r) for r in ranges])
+        self._starts, self._ends = [], []
+        for start, end in intervalli:
+            if self._ends and start <= self._ends[-1] + 1:
+                self._ends[-1] = max(self._ends[-1], end)
+            else:
+                self._starts.append(start)
+                self._ends.append(end)
+
+    def completed_ranges(self):
+        """Intervalli [inizio, fine] degli indirizzi (o posizioni) completati"""
+        return [[start, end] for start, end in zip(self._starts, self._ends)]
+
+    def matches(self, target, ports):
+        """True se il checkpoint si riferisce allo stesso target e porte"""
+        return self.target == _normalize_target(target) and self.ports == _ports_to_spec(ports)
+
+    def completed_count(self):
+        """Numero di indirizzi già completati"""
+        return sum(end - start + 1 for start, end in zip(self._starts, self._ends))
+
+    def is_done(self, ip):
+        """True se l'indirizzo (testo o chiave intera) o la posizione è già completato"""
+        valore = address_key(ip) if isinstance(ip, str) else int(ip)
+        indice = bisect.bisect_right(self._starts, valore) - 1
+        return indice >= 0 and self._ends[indice] >= valore
+
+    def track(self, ip, position):
+        """Associa un indirizzo in corso alla sua posizione nell'ordine casuale"""
+        self._positions[str(ip)] = position
+
+    def take_position(self, ip):
+        """Restituisce (e dimentica) la posizione associata a un indirizzo, o None"""
+        return self._positions.pop(str(ip), None)
+
+    def record(self, ip, result=None):
+        """Segna un indirizzo come completato e ne conserva il risultato attivo"""
+        valore = self.take_position(ip)
+        self._add(address_key(ip) if valore is None else valore)
+        if result and result.get('attivo'):
+            self.results.append(result)
+        if time.monotonic() - self._last_save >= self.interval:
+            self.save()
+
+    def _add(self, valore):
+        indice = bisect.bisect_right(self._starts, valore) - 1
+        if indice >= 0 and self._ends[indice] >= valore:
+            return
+        unisci_sinistra = indice >= 0 and self._ends[indice] == valore - 1
+        unisci_destra = indice + 1 < len(self._starts) and self._starts[indice + 1] == valore + 1
+        if unisci_sinistra and unisci_destra:
+            self._ends[indice] = self._ends[indice + 1]
+            del self._starts[indice + 1]
+            del self._ends[indice + 1]
+        elif unisci_sinistra:
+            self._ends[indice] = valore
+        elif unisci_destra:
+            self._starts[indice + 1] = valore
+        else:
+            self._starts.insert(indice + 1, valore)
+            self._ends.insert(indice + 1, valore)
+
+    def save(self, finished=None):
+        """Scrive il checkpoint in modo atomico (file temporaneo + rename).
+
+        Un checkpoint senza path resta solo in memoria (usato dai worker
+        per saltare gli indirizzi già completati).
+        """
+        if finished is not None:
+            self.finished = finished
+        if self.path is None:
+            return
+        data = {
+            'version': FORMAT_VERSION,
+            'target': self.target,
+            'ports': self.ports,
+            'created': self.created,
+            'updated': datetime.now().isoformat(),
+            'finished': self.finished,
+            'seed': self.seed,
+            'completed': self.completed_ranges(),
+            'results': self.results,
+        }
+        temporaneo = f"{self.path}.tmp"
+        with open(temporaneo, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temporaneo, self.path)
+        self._last_save = time.monotonic()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Registro servizi per IP Scanner
+Tabella porta -> nome servizio caricata una sola volta, in modo pigro
+"""
+
+import csv
+import os
+import threading
+
+SCONOSCIUTO = "Sconosciuto"
+
+NUM_PORTE = 65536
+
+_CARTELLA = os.path.dirname(os.path.abspath(__file__))
+
+# File da cui completare la tabella, in ordine di priorità: il registro
+# IANA in CSV (se scaricato accanto al programma), nmap-services, la
+# tabella compatta distribuita con lo scanner e il file services del
+# sistema operativo
+SERVICE_FILES = [
+    os.path.join(_CARTELLA, "service-names-port-numbers.csv"),
+    "/usr/share/nmap/nmap-services",
+    "/usr/local/share/nmap/nmap-services",
+    "/opt/homebrew/share/nmap/nmap-services",
+    os.path.join(_CARTELLA, "service-ports.txt"),
+    "/etc/services",
+    os.path.join(os.environ.get("SystemRoot", r"C:\Windows"), "System32", "drivers", "etc", "services"),
+]
+
+# Nomi mostrati dallo scanner: hanno la precedenza su quelli dei file
+SERVIZI_NOTI = {
+    7: "Echo", 9: "Discard", 13: "Daytime", 19: "Chargen",
+    20: "FTP-Data", 21: "FTP", 22: "SSH", 23: "Telnet", 25: "SMTP",
+    37: "Time", 43: "WHOIS", 49: "TACACS", 53: "DNS", 67: "DHCP Server",
+    68: "DHCP Client", 69: "TFTP", 70: "Gopher", 79: "Finger", 80: "HTTP",
+    81: "HTTP-Alt", 88: "Kerberos", 102: "ISO-TSAP", 110: "POP3",
+    111: "RPCbind", 113: "Ident", 119: "NNTP", 123: "NTP", 135: "RPC",
+    137: "NetBIOS-NS", 138: "NetBIOS-DGM", 139: "NetBIOS", 143: "IMAP",
+    161: "SNMP", 162: "SNMP Trap", 179: "BGP", 194: "IRC", 389: "LDAP",
+    427: "SLP", 443: "HTTPS", 444: "SNPP", 445: "SMB", 464: "Kpasswd",
+    465: "SMTPS", 500: "IPsec/IKE", 502: "Modbus", 514: "Syslog",
+    515: "LPD", 520: "RIP", 523: "IBM-DB2", 548: "AFP", 554: "RTSP",
+    587: "SMTP Submission", 593: "RPC over HTTP", 623: "IPMI", 631: "IPP",
+    636: "LDAPS", 873: "Rsync", 902: "VMware", 989: "FTPS-Data",
+    990: "FTPS", 993: "IMAPS", 995: "POP3S", 1080: "SOCKS",
+    1194: "OpenVPN", 1433: "MS SQL", 1434: "MS SQL Monitor", 1521: "Oracle",
+    1701: "L2TP", 1723: "PPTP", 1812: "RADIUS", 1813: "RADIUS Acct",
+    1883: "MQTT", 1900: "SSDP", 2049: "NFS", 2082: "cPanel",
+    2083: "cPanel SSL", 2181: "ZooKeeper", 2375: "Docker", 2376: "Docker TLS",
+    2379: "etcd", 3000: "HTTP-Dev", 3128: "Squid", 3268: "LDAP GC",
+    3269: "LDAPS GC", 3306: "MySQL", 3389: "RDP", 3478: "STUN",
+    4369: "EPMD", 4443: "HTTPS-Alt", 4500: "IPsec NAT-T", 5000: "HTTP-Dev",
+    5060: "SIP", 5061: "SIPS", 5353: "mDNS", 5432: "PostgreSQL",
+    5555: "ADB", 5601: "Kibana", 5672: "AMQP", 5683: "CoAP",
+    5900: "VNC", 5938: "TeamViewer", 5984: "CouchDB", 5985: "WinRM",
+    5986: "WinRM HTTPS", 6379: "Redis", 6443: "Kubernetes API",
+    6660: "IRC", 6667: "IRC", 7001: "WebLogic", 8000: "HTTP-Alt",
+    8008: "HTTP-Alt", 8080: "HTTP-Alt", 8081: "HTTP-Alt", 8086: "InfluxDB",
+    8088: "HTTP-Alt", 8443: "HTTPS-Alt", 8883: "MQTT TLS", 8888: "HTTP-Alt",
+    9000: "HTTP-Alt", 9042: "Cassandra", 9090: "HTTP-Alt", 9092: "Kafka",
+    9100: "Printer", 9200: "Elasticsearch", 9300: "Elasticsearch Cluster",
+    9418: "Git", 10000: "Webmin", 11211: "Memcached", 15672: "RabbitMQ",
+    25565: "Minecraft", 27017: "MongoDB", 27018: "MongoDB Shard",
+    27019: "MongoDB Config", 50000: "SAP", 50070: "Hadoop NameNode",
+}
+
+
+class ServiceRegistry:
+    def __init__(self, service_files=None):
+        self.service_files = SERVICE_FILES if service_files is None else service_files
+        # protocollo -> lista di 65536 nomi (None = sconosciuto)
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def name(self, port, proto="tcp"):
+        """Nome del servizio su una porta (O(1), nessuna allocazione)"""
+        table = self._tables.get(proto)
+        if table is None:
+            table = self._load(proto)
+        nome = table[port] if 0 <= port < NUM_PORTE else None
+        return nome if nome is not None else SCONOSCIUTO
+
+    def table(self, proto="tcp"):
+        """Restituisce la tabella completa (lista indicizzata per porta)"""
+        return self._tables.get(proto) or self._load(proto)
+
+    def _load(self, proto):
+        with self._lock:
+            table = self._tables.get(proto)
+            if table is not None:
+                return table
+            table = [None] * NUM_PORTE
+            for porta, nome in SERVIZI_NOTI.items():
+                table[porta] = nome
+            for percorso in self.service_files:
+                try:
+                    if percorso.endswith(".csv"):
+                        self._load_iana_csv(percorso, proto, table)
+                    else:
+                        self._load_services_file(percorso, proto, table)
+                except OSError:
+                    continue
+            self._tables[proto] = table
+            return table
+
+    @staticmethod
+    def _load_services_file(percorso, proto, table):
+        """Formato services/nmap-services: 'nome porta/protocollo ...'"""
+        with open(percorso, encoding="utf-8", errors="replace") as f:
+            for riga in f:
+                riga = riga.split("#", 1)[0].split()
+                if len(riga) < 2 or "/" not in riga[1]:
+                    continue
+                porta, protocollo = riga[1].split("/", 1)
+                if protocollo != proto or not porta.isdigit() or riga[0] == "unknown":
+                    continue
+                porta = int(porta)
+                if porta < NUM_PORTE and table[porta] is None:
+                    table[porta] = riga[0].upper()
+
+    @staticmethod
+    def _load_iana_csv(percorso, proto, table):
+        """Registro IANA (service-names-port-numbers.csv), anche con range di porte"""
+        with open(percorso, encoding="utf-8", errors="replace", newline="") as f:
+            for riga in csv.DictReader(f):
+                nome = (riga.get("Service Name") or "").strip()
+                porte = (riga.get("Port Number") or "").strip()
+                if not nome or not porte or (riga.get("Transport Protocol") or "").strip() != proto:
+                    continue
+                inizio, _, fine = porte.partition("-")
+                if not inizio.isdigit() or (fine and not fine.isdigit()):
+                    continue
+                for porta in range(int(inizio), min(int(fine or inizio), NUM_PORTE - 1) + 1):
+                    if table[porta] is None:
+                        table[porta] = nome.upper()
+
+
+_default_registry = ServiceRegistry()
+
+
+def service_name(port, proto="tcp"):
+    """Nome del servizio dal registro predefinito"""
+    return _default_registry.name(port, proto)
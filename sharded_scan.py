@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Scansione multi-processo per IP Scanner
+Divide i target in shard e li distribuisce a più processi worker
+"""
+
+import multiprocessing
+import os
+import queue
+import signal
+
+from port_spec import PortSet
+from scan_checkpoint import ScanCheckpoint
+from target_set import as_target_set, key_to_text
+
+# Shard per processo: più shard piccoli bilanciano meglio il carico
+SHARD_PER_PROCESSO = 8
+
+
+def split_range(inizio, fine, parti):
+    """Divide l'intervallo [inizio, fine] in al massimo parti shard contigui"""
+    totale = fine - inizio + 1
+    parti = max(1, min(parti, totale))
+    dimensione, resto = divmod(totale, parti)
+    shard = []
+    for indice in range(parti):
+        lunghezza = dimensione + (1 if indice < resto else 0)
+        shard.append((inizio, inizio + lunghezza - 1))
+        inizio += lunghezza
+    return shard
+
+
+def scanner_settings(scanner):
+    """Configurazione dello scanner da replicare nei processi worker"""
+    return {nome: valore for nome, valore in vars(scanner).items()
+            if not nome.startswith('_') and isinstance(valore, (int, float, str, list, tuple, PortSet))}
+
+
+def _processo_worker(impostazioni, server_dns, targets, porte, seme, completati, compiti, risultati):
+    """Corpo di un processo worker: scansiona gli shard finché riceve None"""
+    # Il Ctrl-C è gestito dal processo principale, che termina i worker
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from ip_scanner import IPScanner
+
+    scanner = IPScanner()
+    for nome, valore in impostazioni.items():
+        setattr(scanner, nome, valore)
+    if server_dns:
+        scanner.resolver.set_server(*server_dns)
+
+    # Checkpoint in memoria: serve solo a saltare gli indirizzi già fatti
+    checkpoint = ScanCheckpoint(None)
+    checkpoint.add_ranges(completati or [])
+    rete = targets.supernet()
+
+    while True:
+        compito = compiti.get()
+        if compito is None:
+            break
+        shard, totale, inizio, fine = compito
+        risultati.put(('inizio', shard, os.getpid()))
+        if seme is not None:
+            # Ordine casuale: lo shard è una fetta della permutazione di tutti i target
+            hosts = scanner.host_casuali(targets, seme, checkpoint, shard, totale)
+        else:
+            hosts = map(key_to_text, (chiave for chiave in targets.iter_keys(inizio, fine + 1)
+                                      if not checkpoint.is_done(chiave)))
+        for risultato in scanner.itera_host(hosts, porte, True, target=rete):
+            # La posizione nella permutazione serve al checkpoint del processo principale
+            risultati.put(('host', shard, (risultato, checkpoint.take_position(risultato['ip']))))
+        risultati.put(('fine', shard, None))
+
+
+def itera_scansione_processi(scanner, target, porte=None, processi=2, includi_inattivi=False, checkpoint=None):
+    """Scansiona una rete (o un TargetSet) con più processi, producendo i risultati man mano.
+
+    I target vengono divisi in shard di indirizzi contigui distribuiti
+    dinamicamente a processi worker (ognuno con il proprio IPScanner
+    configurato come scanner); i risultati tornano al processo principale
+    su una coda limitata, così l'output unificato, l'esportazione e il
+    checkpoint restano in un solo punto. thread_max è ripartito tra i
+    processi. Lo shard di un worker terminato in modo anomalo viene
+    rimesso in coda e assegnato a un nuovo processo. In ordine casuale
+    ogni shard è invece una fetta (shard i di n) della permutazione.
+    """
+    targets = as_target_set(target)
+    if not targets:
+        return
+    shard = split_range(0, len(targets) - 1, processi * SHARD_PER_PROCESSO)
+    processi = min(processi, len(shard))
+
+    impostazioni = scanner_settings(scanner)
+    impostazioni['thread_max'] = max(1, scanner.thread_max // processi)
+    if scanner.pps:
+        # Il limite di velocità è complessivo: ogni processo ne ha una parte
+        impostazioni['pps'] = scanner.pps / processi
+    server_dns = (scanner.resolver.server, scanner.resolver.port) if scanner.resolver.server else None
+    completati = checkpoint.completed_ranges() if checkpoint is not None else None
+    seme = scanner.seme_ordine(checkpoint)
+
+    # spawn: i worker non ereditano thread e socket del processo principale
+    contesto = multiprocessing.get_context('spawn')
+    compiti = contesto.Queue()
+    risultati = contesto.Queue(maxsize=max(1024, scanner.finestra_host * processi))
+    for indice, (inizio, fine) in enumerate(shard):
+        compiti.put((indice, len(shard), inizio, fine))
+
+    argomenti = (impostazioni, server_dns, targets, porte, seme, completati, compiti, risultati)
+    worker = []
+    # shard -> indirizzi già restituiti, per non duplicarli se lo shard riparte
+    in_corso = {}
+    # pid del worker -> shard su cui sta lavorando
+    assegnati = {}
+    da_completare = len(shard)
+
+    def avvia_worker():
+        processo = contesto.Process(target=_processo_worker, args=argomenti, daemon=True)
+        processo.start()
+        worker.append(processo)
+
+    def recupera_worker_terminati():
+        for processo in list(worker):
+            if processo.exitcode is None:
+                continue
+            worker.remove(processo)
+            indice = assegnati.pop(processo.pid, None)
+            if processo.exitcode != 0:
+                print(f"⚠️  Worker {processo.pid} terminato (codice {processo.exitcode})")
+                if indice in in_corso:
+                    compiti.put((indice, len(shard), *shard[indice]))
+                avvia_worker()
+
+    try:
+        for _ in range(processi):
+            avvia_worker()
+
+        while da_completare:
+            try:
+                tipo, indice, risultato = risultati.get(timeout=0.5)
+            except queue.Empty:
+                recupera_worker_terminati()
+                continue
+
+            if tipo == 'inizio':
+                in_corso.setdefault(indice, set())
+                assegnati[risultato] = indice
+            elif tipo == 'fine':
+                if in_corso.pop(indice, None) is not None:
+                    da_completare -= 1
+            else:
+                risultato, posizione = risultato
+                restituiti = in_corso.get(indice)
+                if restituiti is None or risultato['ip'] in restituiti:
+                    continue
+                restituiti.add(risultato['ip'])
+                if checkpoint is not None:
+                    if posizione is not None:
+                        checkpoint.track(risultato['ip'], posizione)
+                    checkpoint.record(risultato['ip'], risultato if risultato['attivo'] else None)
+                if risultato['attivo'] or includi_inattivi:
+                    yield risultato
+
+        for _ in worker:
+            compiti.put(None)
+        for processo in worker:
+            processo.join()
+        if checkpoint is not None:
+            checkpoint.save(finished=True)
+    finally:
+        for processo in worker:
+            if processo.is_alive():
+                processo.terminate()
+        if checkpoint is not None and not checkpoint.finished:
+            checkpoint.save()
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Scansione SYN per IP Scanner
+Scansione TCP half-open con socket raw: un mittente di SYN e un unico ricevitore
+"""
+
+import heapq
+import os
+import select
+import socket
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+
+from host_discovery import icmp_checksum
+from port_states import APERTA, CHIUSA, FILTRATA
+from rate_control import TokenBucket
+
+TCP_FIN = 0x01
+TCP_SYN = 0x02
+TCP_RST = 0x04
+TCP_ACK = 0x10
+
+_TCP = struct.Struct("!HHIIBBHHH")
+
+# Buffer di ricezione dei socket raw (byte)
+BUFFER_RICEZIONE = 8 * 1024 * 1024
+
+
+def build_tcp_segment(sorgente, destinazione, porta_sorgente, porta, seq, flag, ack=0):
+    """Segmento TCP senza opzioni, con checksum se sono noti gli indirizzi IPv4.
+
+    Per IPv6 (sorgente None) il checksum è calcolato dal kernel (IPV6_CHECKSUM).
+    """
+    segmento = _TCP.pack(porta_sorgente, porta, seq, ack, 5 << 4, flag, 1024, 0, 0)
+    if sorgente is None:
+        return segmento
+    pseudo = socket.inet_aton(sorgente) + socket.inet_aton(destinazione) + struct.pack("!BBH", 0, 6, len(segmento))
+    checksum = icmp_checksum(pseudo + segmento)
+    return segmento[:16] + struct.pack("!H", checksum) + segmento[18:]
+
+
+def parse_tcp_reply(data, ipv4=True):
+    """Porta sorgente, porta di destinazione, ack e flag di un segmento ricevuto.
+
+    I socket raw IPv4 ricevono anche l'header IP, quelli IPv6 no.
+    Restituisce None se il pacchetto è troppo corto.
+    """
+    if ipv4:
+        if len(data) < 20:
+            return None
+        data = data[(data[0] & 0x0F) * 4:]
+    if len(data) < 20:
+        return None
+    porta, porta_destinazione, _, ack, _, flag, _, _, _ = _TCP.unpack(data[:20])
+    return porta, porta_destinazione, ack, flag
+
+
+def open_raw_sockets(famiglia):
+    """Socket raw TCP per una famiglia. Solleva OSError senza privilegi (root/CAP_NET_RAW)"""
+    sock = socket.socket(famiglia, socket.SOCK_RAW, socket.IPPROTO_TCP)
+    sock.setblocking(False)
+    # Il socket riceve tutto il traffico TCP in ingresso: un buffer ampio
+    # evita di perdere risposte durante le raffiche (FORCE supera rmem_max)
+    for opzione in (getattr(socket, 'SO_RCVBUFFORCE', None), socket.SO_RCVBUF):
+        if opzione is None:
+            continue
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, opzione, BUFFER_RICEZIONE)
+            break
+        except OSError:
+            continue
+    if famiglia == socket.AF_INET6:
+        # Il kernel calcola il checksum TCP (offset 16) con lo pseudo-header IPv6
+        sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_CHECKSUM, 16)
+    return sock
+
+
+def syn_available():
+    """None se la scansione SYN è possibile, altrimenti il motivo"""
+    try:
+        open_raw_sockets(socket.AF_INET).close()
+        return None
+    except OSError as e:
+        return f"socket raw non disponibili ({e}), servono i privilegi di root"
+
+
+class _Sorgenti:
+    """Indirizzo sorgente usato dal kernel verso ogni destinazione (cache per /24)"""
+
+    def __init__(self):
+        self._cache = {}
+
+    def __call__(self, ip):
+        chiave = ip.rsplit(".", 1)[0]
+        sorgente = self._cache.get(chiave)
+        if sorgente is None:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sonda:
+                # connect su UDP non invia nulla: serve solo a scegliere la rotta
+                sonda.connect((ip, 9))
+                sorgente = sonda.getsockname()[0]
+            self._cache[chiave] = sorgente
+        return sorgente
+
+
+def syn_scan(hosts, porte, timeout=1.0, max_inflight=4096, pps=None, rtt=None, tentativi=0, finestra=None):
+    """Scansione SYN (half-open) di tutte le porte degli host indicati.
+
+    Un thread mittente invia i SYN da una porta sorgente fissa (al
+    massimo pps al secondo e max_inflight in attesa di risposta); un
+    unico ciclo di ricezione legge le risposte dal socket raw: SYN-ACK
+    = aperta (a cui si risponde con un RST, senza completare la
+    connessione), RST = chiusa, nessuna risposta entro timeout =
+    filtrata. Le sonde senza risposta vengono ripetute fino a tentativi
+    volte, con attesa raddoppiata; quelle con risposta mai. Con un
+    RttEstimator (rtt) ogni sonda attende il timeout stimato per il suo
+    host invece di timeout e ogni risposta a un SYN non ripetuto
+    aggiorna la stima (algoritmo di Karn). Con una AdaptiveWindow
+    (finestra) i SYN in attesa sono al massimo finestra.limit, che si
+    adatta alla quota di primi SYN senza risposta. Il numero di
+    sequenza è derivato da indirizzo e porta, così le risposte si
+    verificano senza tabelle. Produce le coppie
+    (ip, {porta: stato}) man mano che gli host sono completi.
+    Solleva OSError se i socket raw non sono disponibili.
+    """
+    porte = list(porte)
+    if not porte:
+        return
+    socket_raw = {socket.AF_INET: open_raw_sockets(socket.AF_INET)}
+    try:
+        socket_raw[socket.AF_INET6] = open_raw_sockets(socket.AF_INET6)
+    except OSError:
+        pass
+    segreto = os.urandom(8)
+    porta_sorgente = 40000 + int.from_bytes(os.urandom(2), "big") % 20000
+    sorgente_per = _Sorgenti()
+
+    def sequenza(ip, porta):
+        return zlib.crc32(segreto + ip.encode() + porta.to_bytes(2, "big"))
+
+    lock = threading.Lock()
+    # Notificata quando una sonda lascia in_volo
+    spazio = threading.Condition(lock)
+    max_inflight = max(1, max_inflight)
+    fermo = threading.Event()
+    invio_finito = threading.Event()
+    # (ip, porta) -> (scadenza, invio); scadenze è un heap di (scadenza, (ip, porta))
+    in_volo = {}
+    scadenze = []
+    # ip -> {porta: stato}
+    esiti = {}
+    # Sonde che il mittente non è riuscito a inviare
+    non_inviate = deque()
+    # (ip, porta) -> tentativi già ripetuti, solo per le sonde ritentate
+    ritentate = {}
+    secchio = TokenBucket(pps) if pps else None
+
+    def limite():
+        return min(max_inflight, finestra.limit) if finestra is not None else max_inflight
+
+    def attesa_per(ip, ripetute=0):
+        if rtt is None:
+            return timeout
+        return min(timeout, rtt.timeout(ip) * 2 ** ripetute)
+
+    def invia(ip, porta, flag, seq, ack=0):
+        famiglia = socket.AF_INET6 if ":" in ip else socket.AF_INET
+        sorgente = sorgente_per(ip) if famiglia == socket.AF_INET else None
+        segmento = build_tcp_segment(sorgente, ip, porta_sorgente, porta, seq, flag, ack)
+        socket_raw[famiglia].sendto(segmento, (ip, 0))
+
+    def mittente():
+        try:
+            for ip in hosts:
+                ip = str(ip)
+                with lock:
+                    esiti[ip] = {}
+                for porta in porte:
+                    with spazio:
+                        while len(in_volo) >= limite() and not fermo.is_set():
+                            spazio.wait(0.1)
+                    if fermo.is_set():
+                        return
+                    if secchio is not None:
+                        secchio.acquire()
+                    attesa = attesa_per(ip)
+                    invio = time.monotonic()
+                    with lock:
+                        in_volo[(ip, porta)] = (invio + attesa, invio)
+                        heapq.heappush(scadenze, (invio + attesa, (ip, porta)))
+                    try:
+                        invia(ip, porta, TCP_SYN, sequenza(ip, porta))
+                    except OSError:
+                        # Destinazione irraggiungibile (o famiglia senza socket raw)
+                        with lock:
+                            if in_volo.pop((ip, porta), None) is not None:
+                                non_inviate.append((ip, porta))
+        finally:
+            invio_finito.set()
+
+    def completa(ip, porta, stato):
+        with lock:
+            risultati = esiti[ip]
+            risultati[porta] = stato
+            if len(risultati) < len(porte):
+                return None
+            del esiti[ip]
+        return ip, dict(sorted(risultati.items()))
+
+    thread = threading.Thread(target=mittente, name="syn-mittente", daemon=True)
+    thread.start()
+    ricevitori = {sock: famiglia for famiglia, sock in socket_raw.items()}
+    try:
+        while True:
+            completati = []
+            with lock:
+                attesa = scadenze[0][0] - time.monotonic() if scadenze else 0.05
+                fatto = invio_finito.is_set() and not in_volo and not non_inviate
+            if fatto:
+                return
+            pronti, _, _ = select.select(list(ricevitori), [], [], min(max(0, attesa), 0.05))
+            for sock in pronti:
+                while True:
+                    try:
+                        data, indirizzo = sock.recvfrom(65535)
+                    except (BlockingIOError, InterruptedError):
+                        break
+                    except OSError:
+                        break
+                    risposta = parse_tcp_reply(data, ricevitori[sock] == socket.AF_INET)
+                    if risposta is None:
+                        continue
+                    porta, destinazione, ack, flag = risposta
+                    ip = indirizzo[0]
+                    if destinazione != porta_sorgente or not flag & (TCP_SYN | TCP_RST):
+                        continue
+                    seq = sequenza(ip, porta)
+                    if ack != (seq + 1) & 0xFFFFFFFF:
+                        continue
+                    with lock:
+                        voce = in_volo.pop((ip, porta), None)
+                        ripetuta = ritentate.pop((ip, porta), None)
+                        if voce is not None:
+                            if finestra is not None and ripetuta is None:
+                                finestra.record(False)
+                            spazio.notify()
+                    if voce is None:
+                        continue
+                    if rtt is not None and ripetuta is None:
+                        rtt.update(ip, time.monotonic() - voce[1])
+                    if flag & TCP_RST:
+                        stato = CHIUSA
+                    else:
+                        stato = APERTA
+                        # Chiude la connessione a metà invece di completarla
+                        try:
+                            invia(ip, porta, TCP_RST, ack)
+                        except OSError:
+                            pass
+                    completato = completa(ip, porta, stato)
+                    if completato:
+                        completati.append(completato)
+
+            # Sonde senza risposta entro il timeout (ripetute o filtrate) o non inviate
+            adesso = time.monotonic()
+            scadute = []
+            with lock:
+                while scadenze and scadenze[0][0] <= adesso:
+                    scadenza, sonda = heapq.heappop(scadenze)
+                    if in_volo.get(sonda, (None,))[0] != scadenza:
+                        continue
+                    ripetute = ritentate.get(sonda, 0)
+                    if finestra is not None and not ripetute:
+                        finestra.record(True)
+                    if ripetute < tentativi:
+                        # Il SYN ripetuto conserva il suo posto nella finestra
+                        ritentate[sonda] = ripetute + 1
+                        ip, porta = sonda
+                        try:
+                            invia(ip, porta, TCP_SYN, sequenza(ip, porta))
+                        except OSError:
+                            pass
+                        else:
+                            if secchio is not None:
+                                secchio.consume()
+                            attesa = attesa_per(ip, ripetute + 1)
+                            in_volo[sonda] = (adesso + attesa, adesso)
+                            heapq.heappush(scadenze, (adesso + attesa, sonda))
+                            continue
+                    del in_volo[sonda]
+                    ritentate.pop(sonda, None)
+                    scadute.append(sonda)
+                    spazio.notify()
+                while non_inviate:
+                    scadute.append(non_inviate.popleft())
+            for ip, porta in scadute:
+                completato = completa(ip, porta, FILTRATA)
+                if completato:
+                    completati.append(completato)
+            yield from completati
+    finally:
+        fermo.set()
+        thread.join()
+        for sock in socket_raw.values():
+            sock.close()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ordine dei target per IP Scanner
+Permutazione pseudo-casuale degli indirizzi senza stato memorizzato
+"""
+
+import math
+import random
+
+# Basi di Miller-Rabin deterministiche per n < 3.3 * 10^24
+_BASI_MILLER_RABIN = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+
+def is_prime(n):
+    """Test di primalità di Miller-Rabin"""
+    if n < 2:
+        return False
+    for base in _BASI_MILLER_RABIN:
+        if n % base == 0:
+            return n == base
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for base in _BASI_MILLER_RABIN:
+        x = pow(base, d, n)
+        if x in (1, n - 1):
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def next_prime(n):
+    """Il più piccolo primo maggiore o uguale a n"""
+    n = max(n, 2)
+    while not is_prime(n):
+        n += 1
+    return n
+
+
+def _pollard_rho(n):
+    """Trova un divisore non banale di un n composto (variante di Brent)"""
+    if n % 2 == 0:
+        return 2
+    while True:
+        y, c, m = random.randrange(1, n), random.randrange(1, n), 128
+        g = r = q = 1
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(m, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = math.gcd(q, n)
+                k += m
+            r *= 2
+        if g == n:
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % n
+                g = math.gcd(abs(x - ys), n)
+        if g != n:
+            return g
+
+
+def prime_factors(n):
+    """Insieme dei fattori primi di n"""
+    fattori = set()
+    da_scomporre = [n] if n > 1 else []
+    while da_scomporre:
+        valore = da_scomporre.pop()
+        if is_prime(valore):
+            fattori.add(valore)
+            continue
+        divisore = _pollard_rho(valore)
+        da_scomporre.extend((divisore, valore // divisore))
+    return fattori
+
+
+class AddressPermutation:
+    """Permutazione pseudo-casuale di range(count) in memoria costante.
+
+    Come zmap, si percorre il gruppo ciclico moltiplicativo modulo un
+    primo p > count: partendo da un elemento x0 e moltiplicando ogni
+    volta per un generatore g si visitano tutti i valori 1..p-1 una sola
+    volta; quelli oltre count vengono saltati. Seme, generatore ed
+    elemento iniziale determinano l'ordine, quindi la stessa istanza
+    (stesso seme) si può dividere tra n worker (posizioni i, i+n, ...) e
+    riprendere da una posizione senza memorizzare nulla.
+    """
+
+    def __init__(self, count, seed=None):
+        self.count = count
+        self.seed = seed
+        self.prime = next_prime(count + 1)
+        generatore_casuale = random.Random(seed)
+        self.generator = self._trova_generatore(generatore_casuale)
+        self.first = generatore_casuale.randrange(1, self.prime) if self.prime > 2 else 1
+
+    def _trova_generatore(self, generatore_casuale):
+        if self.prime <= 3:
+            return self.prime - 1
+        esponenti = [(self.prime - 1) // fattore for fattore in prime_factors(self.prime - 1)]
+        while True:
+            candidato = generatore_casuale.randrange(2, self.prime)
+            if all(pow(candidato, esponente, self.prime) != 1 for esponente in esponenti):
+                return candidato
+
+    def __len__(self):
+        return self.count
+
+    def positions(self, shard=0, shards=1):
+        """Numero di posizioni del ciclo assegnate al worker shard di shards"""
+        return max(0, -(-(self.prime - 1 - shard) // shards))
+
+    def iter_positions(self, shard=0, shards=1, start=0):
+        """Produce le coppie (posizione, valore) del worker shard di shards.
+
+        posizione è l'indice nel ciclo completo (shard + k * shards) e
+        start il primo k da visitare: per riprendere basta ripartire dal
+        k successivo all'ultimo completato.
+        """
+        if not 0 <= shard < shards:
+            raise ValueError(f"Shard non valido: {shard} di {shards}")
+        p = self.prime
+        passo = pow(self.generator, shards, p)
+        posizione = shard + start * shards
+        x = self.first * pow(self.generator, posizione, p) % p
+        for _ in range(start, self.positions(shard, shards)):
+            if x <= self.count:
+                yield posizione, x - 1
+            x = x * passo % p
+            posizione += shards
+
+    def __iter__(self):
+        for _, valore in self.iter_positions():
+            yield valore
+
+
+def permuted_keys(targets, seed=None, shard=0, shards=1, start=0):
+    """Produce le coppie (posizione, chiave) di un TargetSet in ordine casuale"""
+    permutazione = AddressPermutation(len(targets), seed)
+    for posizione, indice in permutazione.iter_positions(shard, shards, start):
+        yield posizione, targets.key_at(indice)
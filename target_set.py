@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Insiemi di target per IP Scanner
+Elenchi di IP, reti e range normalizzati in intervalli interi disgiunti
+"""
+
+import bisect
+import ipaddress
+import socket
+import struct
+
+# Gli indirizzi IPv6 seguono quelli IPv4 nello stesso spazio di chiavi
+OFFSET_IPV6 = 1 << 32
+
+_UINT32 = struct.Struct("!I")
+
+
+def host_range(network):
+    """Primo e ultimo indirizzo (interi) restituiti da network.hosts()"""
+    primo = int(network.network_address)
+    ultimo = int(network.broadcast_address)
+    if network.version == 4 and network.prefixlen < 31:
+        return primo + 1, ultimo - 1
+    if network.version == 6 and network.prefixlen < 127:
+        # L'indirizzo Subnet-Router anycast è escluso da hosts()
+        return primo + 1, ultimo
+    return primo, ultimo
+
+
+def _ipv4_int(testo):
+    return _UINT32.unpack(socket.inet_pton(socket.AF_INET, testo))[0]
+
+
+def address_key(testo):
+    """Chiave intera di un indirizzo testuale (IPv6 dopo tutti gli IPv4)"""
+    if ":" not in testo:
+        return _ipv4_int(testo)
+    return int.from_bytes(socket.inet_pton(socket.AF_INET6, testo), "big") + OFFSET_IPV6
+
+
+def key_to_text(chiave):
+    """Forma testuale di una chiave, senza passare da oggetti ipaddress"""
+    if chiave < OFFSET_IPV6:
+        return socket.inet_ntoa(_UINT32.pack(chiave))
+    return socket.inet_ntop(socket.AF_INET6, (chiave - OFFSET_IPV6).to_bytes(16, "big"))
+
+
+def key_to_address(chiave):
+    """Converte una chiave intera nell'indirizzo ipaddress corrispondente"""
+    if chiave < OFFSET_IPV6:
+        return ipaddress.IPv4Address(chiave)
+    return ipaddress.IPv6Address(chiave - OFFSET_IPV6)
+
+
+def parse_target(testo, solo_host=True):
+    """Intervallo (inizio, fine) di chiavi di un IP, una rete o un range.
+
+    Formati: 10.0.0.1, 10.0.0.0/24, 10.0.0.1-10.0.0.50, 10.0.0.1-50 e gli
+    equivalenti IPv6 (2001:db8::/120, ::1-::ffff, 2001:db8::1-ff).
+    Con solo_host le reti escludono indirizzo di rete e broadcast come
+    network.hosts(); le esclusioni usano invece l'intera rete.
+    Solleva ValueError se il testo non è valido.
+    """
+    try:
+        if "/" in testo:
+            indirizzo, _, prefisso = testo.partition("/")
+            if ":" not in indirizzo and prefisso.isdigit() and int(prefisso) <= 32:
+                # Percorso veloce IPv4, senza oggetti ipaddress
+                bits = 32 - int(prefisso)
+                primo = _ipv4_int(indirizzo) >> bits << bits
+                ultimo = primo | ((1 << bits) - 1)
+                if solo_host and bits > 1:
+                    return primo + 1, ultimo - 1
+                return primo, ultimo
+            rete = ipaddress.ip_network(testo, strict=False)
+            if solo_host:
+                primo, ultimo = host_range(rete)
+            else:
+                primo, ultimo = int(rete.network_address), int(rete.broadcast_address)
+            offset = OFFSET_IPV6 if rete.version == 6 else 0
+            return primo + offset, ultimo + offset
+        if "-" in testo:
+            inizio, _, fine = testo.partition("-")
+            primo = address_key(inizio.strip())
+            fine = fine.strip()
+            if fine.isdigit() and ":" not in inizio:
+                # Forma abbreviata: 10.0.0.1-50 (ultimo ottetto)
+                ultimo = (primo & ~0xFF) | int(fine)
+                if int(fine) > 255:
+                    raise ValueError(fine)
+            elif ":" in inizio and ":" not in fine and 0 < len(fine) <= 4:
+                # Forma abbreviata IPv6: 2001:db8::1-ff (ultimo gruppo, esadecimale)
+                ultimo = (primo & ~0xFFFF) | int(fine, 16)
+            else:
+                ultimo = address_key(fine)
+            if ultimo < primo or (primo < OFFSET_IPV6) != (ultimo < OFFSET_IPV6):
+                raise ValueError(testo)
+            return primo, ultimo
+        chiave = address_key(testo)
+        return chiave, chiave
+    except (OSError, ValueError):
+        raise ValueError(f"Target non valido: '{testo}'")
+
+
+def _normalizza(intervalli):
+    """Ordina e unisce intervalli sovrapposti o adiacenti"""
+    risultato = []
+    for inizio, fine in sorted(intervalli):
+        if risultato and inizio <= risultato[-1][1] + 1:
+            if fine > risultato[-1][1]:
+                risultato[-1][1] = fine
+        else:
+            risultato.append([inizio, fine])
+    return [tuple(intervallo) for intervallo in risultato]
+
+
+class TargetSet:
+    """Insieme di indirizzi come intervalli interi disgiunti e ordinati.
+
+    Migliaia di reti e range occupano un intervallo ciascuno (o meno,
+    dopo l'unione); gli indirizzi vengono generati solo durante
+    l'iterazione. Le esclusioni sono una sottrazione tra intervalli.
+    """
+
+    def __init__(self, intervalli=(), descrizione=None):
+        self._intervalli = _normalizza(intervalli)
+        self.descrizione = descrizione
+        # Numero di indirizzi prima di ogni intervallo, per address_at
+        self._cumulativi = []
+        totale = 0
+        for inizio, fine in self._intervalli:
+            self._cumulativi.append(totale)
+            totale += fine - inizio + 1
+        self._totale = totale
+
+    @classmethod
+    def parse(cls, testo, solo_host=True):
+        """Insieme da una specifica: elementi separati da virgole o spazi"""
+        elementi = testo.replace(",", " ").split()
+        return cls((parse_target(elemento, solo_host) for elemento in elementi), testo)
+
+    @classmethod
+    def from_file(cls, percorso, solo_host=True):
+        """Legge un elenco di target (uno o più per riga, # per i commenti).
+
+        Solleva OSError se il file non è leggibile e ValueError (con il
+        numero di riga) se contiene un target non valido.
+        """
+        intervalli = []
+        with open(percorso, encoding="utf-8") as f:
+            for numero, riga in enumerate(f, 1):
+                for elemento in riga.split("#", 1)[0].replace(",", " ").split():
+                    try:
+                        intervalli.append(parse_target(elemento, solo_host))
+                    except ValueError as e:
+                        raise ValueError(f"{percorso}:{numero}: {e}")
+        return cls(intervalli, f"@{percorso}")
+
+    def subtract(self, altro):
+        """Nuovo insieme senza gli indirizzi di altro (sottrazione di intervalli)"""
+        risultato = []
+        esclusi = altro._intervalli
+        j = 0
+        for inizio, fine in self._intervalli:
+            while j < len(esclusi) and esclusi[j][1] < inizio:
+                j += 1
+            k = j
+            while k < len(esclusi) and esclusi[k][0] <= fine:
+                if esclusi[k][0] > inizio:
+                    risultato.append((inizio, esclusi[k][0] - 1))
+                inizio = max(inizio, esclusi[k][1] + 1)
+                k += 1
+            if inizio <= fine:
+                risultato.append((inizio, fine))
+        descrizione = f"{self.descrizione} !{altro.descrizione}" if self.descrizione else None
+        return TargetSet(risultato, descrizione)
+
+    def union(self, altro):
+        """Nuovo insieme con gli indirizzi di entrambi"""
+        descrizione = " + ".join(str(insieme) for insieme in (self, altro) if insieme.descrizione)
+        return TargetSet(self._intervalli + altro._intervalli, descrizione or None)
+
+    def ranges(self):
+        """Intervalli (inizio, fine) di chiavi intere"""
+        return list(self._intervalli)
+
+    def __len__(self):
+        return self._totale
+
+    def __bool__(self):
+        return self._totale > 0
+
+    def __contains__(self, ip):
+        chiave = address_key(str(ip))
+        indice = bisect.bisect_right(self._intervalli, (chiave, float("inf"))) - 1
+        return indice >= 0 and self._intervalli[indice][1] >= chiave
+
+    def key_at(self, indice):
+        """Chiave dell'indirizzo in posizione indice dell'insieme ordinato"""
+        if not 0 <= indice < self._totale:
+            raise IndexError(indice)
+        posizione = bisect.bisect_right(self._cumulativi, indice) - 1
+        return self._intervalli[posizione][0] + indice - self._cumulativi[posizione]
+
+    def address_at(self, indice):
+        """Indirizzo (ipaddress) in posizione indice dell'insieme ordinato"""
+        return key_to_address(self.key_at(indice))
+
+    def iter_keys(self, inizio=0, fine=None):
+        """Chiavi degli indirizzi dalla posizione inizio a fine (esclusa)"""
+        fine = self._totale if fine is None else min(fine, self._totale)
+        if inizio >= fine:
+            return
+        posizione = bisect.bisect_right(self._cumulativi, inizio) - 1
+        for indice in range(posizione, len(self._intervalli)):
+            primo, ultimo = self._intervalli[indice]
+            base = self._cumulativi[indice]
+            da = primo + max(0, inizio - base)
+            a = min(ultimo, primo + fine - 1 - base)
+            yield from range(da, a + 1)
+            if base + (ultimo - primo + 1) >= fine:
+                return
+
+    def slice(self, inizio=0, fine=None):
+        """Sottoinsieme degli indirizzi dalla posizione inizio a fine (esclusa)"""
+        fine = self._totale if fine is None else min(fine, self._totale)
+        intervalli = []
+        for indice, (primo, ultimo) in enumerate(self._intervalli):
+            base = self._cumulativi[indice]
+            da = max(primo, primo + inizio - base)
+            a = min(ultimo, primo + fine - 1 - base)
+            if da <= a:
+                intervalli.append((da, a))
+        return TargetSet(intervalli)
+
+    def iter_slice(self, inizio=0, fine=None):
+        """Indirizzi testuali dalla posizione inizio a fine (esclusa), generati pigramente"""
+        return map(key_to_text, self.iter_keys(inizio, fine))
+
+    def __iter__(self):
+        return self.iter_slice()
+
+    def supernet(self):
+        """La più piccola rete che contiene tutto l'insieme (None se misto o vuoto)"""
+        if not self._intervalli:
+            return None
+        primo, ultimo = self._intervalli[0][0], self._intervalli[-1][1]
+        if (primo < OFFSET_IPV6) != (ultimo < OFFSET_IPV6):
+            return None
+        primo, ultimo = key_to_address(primo), key_to_address(ultimo)
+        rete = ipaddress.ip_network(primo)
+        while ultimo not in rete:
+            rete = rete.supernet()
+        return rete
+
+    def __str__(self):
+        return self.descrizione or ", ".join(
+            str(key_to_address(a)) if a == b else f"{key_to_address(a)}-{key_to_address(b)}"
+            for a, b in self._intervalli)
+
+
+def as_target_set(target):
+    """TargetSet da una specifica testuale (IP, rete, range) o da un TargetSet"""
+    return target if isinstance(target, TargetSet) else TargetSet.parse(str(target))
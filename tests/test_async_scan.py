@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Test del motore asyncio"""
+
+import os
+import socket
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ip_scanner import IPScanner  # noqa: E402
+
+
+def porta_in_ascolto(indirizzo):
+    """Socket TCP in ascolto su una porta libera dell'indirizzo"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind((indirizzo, 0))
+    sock.listen()
+    return sock
+
+
+def porta_chiusa(indirizzo):
+    """Porta libera dell'indirizzo su cui nessuno è in ascolto"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((indirizzo, 0))
+        return sock.getsockname()[1]
+
+
+class TestScansioneAsync(unittest.TestCase):
+    def setUp(self):
+        self.scanner = IPScanner()
+        self.scanner.timeout = 0.5
+        self.scanner.tentativi = 0
+
+    def test_host_singolo(self):
+        with porta_in_ascolto("127.0.0.1") as server:
+            aperta = server.getsockname()[1]
+            chiusa = porta_chiusa("127.0.0.1")
+            self.scanner.porte_rilevamento = [aperta]
+            risultato = self.scanner.scansiona_async("127.0.0.1", [chiusa, aperta])
+        self.assertEqual(risultato['ip'], "127.0.0.1")
+        self.assertEqual(risultato['porte_aperte'], [aperta])
+        self.assertEqual(risultato['porte_filtrate'], [])
+        self.assertEqual(risultato['protocollo'], 'tcp')
+
+    def test_rilevamento_dallo_sweep(self):
+        try:
+            server = porta_in_ascolto("127.0.0.2")
+        except OSError as e:
+            self.skipTest(f"127.0.0.2 non disponibile: {e}")
+        sweep = []
+
+        def finto_sweep(metodo, interfaccia, blocco):
+            sweep.append((metodo, list(blocco)))
+            return {"127.0.0.2"}
+
+        self.scanner._scegli_scoperta = lambda target: ('icmp', None)
+        self.scanner._sweep = finto_sweep
+        # Senza porte di rilevamento la verifica TCP darebbe tutti inattivi:
+        # l'unico host attivo è quello indicato dallo sweep
+        self.scanner.porte_rilevamento = []
+        with server:
+            aperta = server.getsockname()[1]
+            risultati = self.scanner.scansiona_async("127.0.0.0/30", [aperta])
+        self.assertEqual(len(sweep), 1)
+        self.assertEqual(sweep[0][0], 'icmp')
+        self.assertIn("127.0.0.2", sweep[0][1])
+        self.assertEqual([(h['ip'], h['porte_aperte']) for h in risultati], [("127.0.0.2", [aperta])])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Test del coordinatore e dei worker della scansione distribuita"""
+
+import ipaddress
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from distributed_scan import ScanCoordinator, _post, run_worker  # noqa: E402
+from port_spec import parse_port_spec  # noqa: E402
+
+
+class ScannerFinto:
+    """Scanner senza rete: attivi gli host pari, aperte le porte sotto 100"""
+
+    def __init__(self):
+        self.shard_eseguiti = 0
+
+    def itera_host(self, hosts, porte, target=None):
+        self.shard_eseguiti += 1
+        for ip in hosts:
+            if int(ipaddress.ip_address(str(ip))) % 2 == 0:
+                yield {'ip': str(ip), 'hostname': 'N/A', 'porte_aperte': [p for p in porte if p < 100],
+                       'porte_filtrate': [], 'attivo': True}
+
+
+def host_attesi(rete, porte):
+    return [{'ip': str(ip), 'hostname': 'N/A', 'porte_aperte': [p for p in porte if p < 100],
+             'porte_filtrate': [], 'attivo': True}
+            for ip in ipaddress.ip_network(rete).hosts() if int(ip) % 2 == 0]
+
+
+class TestScanCoordinator(unittest.TestCase):
+    RETE = "10.9.0.0/26"
+    PORTE = [22, 80, 443]
+
+    def avvia(self, lease_timeout=30.0):
+        coordinatore = ScanCoordinator(self.RETE, parse_port_spec("22,80,443"), port=0,
+                                       lease_timeout=lease_timeout, porte_per_shard=2)
+        coordinatore.start()
+        self.addCleanup(coordinatore.stop)
+        return coordinatore
+
+    def test_worker_completa_tutti_gli_shard(self):
+        coordinatore = self.avvia()
+        # 3 blocchi di indirizzi x 2 gruppi di porte
+        self.assertEqual(len(coordinatore.shards), 6)
+        self.assertEqual(run_worker(coordinatore.url, ScannerFinto(), "w1"), 6)
+        self.assertTrue(coordinatore.wait(5))
+        # I gruppi di porte dello stesso host vengono uniti
+        self.assertEqual(coordinatore.risultati(), host_attesi(self.RETE, self.PORTE))
+
+    def test_lease_scaduto_riassegnato_a_un_altro_worker(self):
+        coordinatore = self.avvia(lease_timeout=0.3)
+        assegnazione = _post(coordinatore.url, '/lease', {'worker': 'morto'})
+        shard = assegnazione['shard']['id']
+        self.assertIn(shard, coordinatore._lease)
+        time.sleep(0.4)
+
+        scanner = ScannerFinto()
+        self.assertEqual(run_worker(coordinatore.url, scanner, "vivo"), 6)
+        self.assertEqual(scanner.shard_eseguiti, 6)
+        self.assertTrue(coordinatore.wait(5))
+        self.assertEqual(coordinatore.risultati(), host_attesi(self.RETE, self.PORTE))
+
+    def test_lease_rinnovato_non_scade(self):
+        coordinatore = self.avvia(lease_timeout=0.3)
+        shard = _post(coordinatore.url, '/lease', {'worker': 'lento'})['shard']['id']
+        for _ in range(4):
+            time.sleep(0.15)
+            _post(coordinatore.url, '/heartbeat', {'worker': 'lento', 'shard': shard})
+        # Gli altri worker ricevono solo gli shard restanti
+        assegnati = set()
+        while True:
+            risposta = _post(coordinatore.url, '/lease', {'worker': 'altro'})
+            if 'shard' not in risposta:
+                break
+            assegnati.add(risposta['shard']['id'])
+        self.assertEqual(assegnati, set(coordinatore.shards) - {shard})
+        self.assertEqual(risposta, {'wait': 1.0})
+
+    def test_risultati_duplicati_di_uno_shard_riassegnato(self):
+        coordinatore = self.avvia(lease_timeout=0.3)
+        assegnazione = _post(coordinatore.url, '/lease', {'worker': 'vecchio'})
+        shard = assegnazione['shard']
+        porte = sorted(parse_port_spec(shard['ports']))
+        risultato = {'ip': '10.9.0.2', 'hostname': 'N/A', 'porte_aperte': [p for p in porte if p < 100],
+                     'porte_filtrate': [], 'attivo': True}
+        # Lotto parziale, poi il lease scade e lo shard passa a un altro worker
+        _post(coordinatore.url, '/results', {'worker': 'vecchio', 'shard': shard['id'], 'results': [risultato]})
+        time.sleep(0.4)
+        self.assertEqual(run_worker(coordinatore.url, ScannerFinto(), "nuovo"), 6)
+        self.assertTrue(coordinatore.wait(5))
+
+        # Il vecchio worker consegna in ritardo lo stesso shard, anche due volte
+        for _ in range(2):
+            _post(coordinatore.url, '/results', {'worker': 'vecchio', 'shard': shard['id'],
+                                                 'results': [risultato], 'final': True})
+        self.assertEqual(len(coordinatore._completati), len(coordinatore.shards))
+        self.assertEqual(coordinatore.risultati(), host_attesi(self.RETE, self.PORTE))
+
+
+if __name__ == "__main__":
+    unittest.main()
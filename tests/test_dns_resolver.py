@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Test della risoluzione DNS inversa"""
+
+import os
+import socket
+import struct
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dns_resolver import DNS_CLASS_IN, DNS_TYPE_PTR, PTRQueryPipeline, ReverseResolver  # noqa: E402
+
+
+def risposta_ptr(query, hostname, query_id=None, domanda=None):
+    """Risposta PTR a una query; query_id e domanda sostituiscono quelli della query"""
+    query_id = struct.unpack("!H", query[:2])[0] if query_id is None else query_id
+    domanda = query[12:] if domanda is None else domanda
+    rdata = b"".join(bytes([len(label)]) + label.encode("ascii") for label in hostname.split(".")) + b"\x00"
+    record = b"\xc0\x0c" + struct.pack("!HHIH", DNS_TYPE_PTR, DNS_CLASS_IN, 60, len(rdata)) + rdata
+    return struct.pack("!HHHHHH", query_id, 0x8180, 1, 1, 0, 0) + domanda + record
+
+
+def nome_richiesto(query):
+    """Nome della domanda di una query (senza compressione)"""
+    labels = []
+    pos = 12
+    while query[pos]:
+        labels.append(query[pos + 1:pos + 1 + query[pos]].decode("ascii"))
+        pos += 1 + query[pos]
+    return ".".join(labels)
+
+
+class StubDNS:
+    """Server DNS UDP locale: gestore(query, invia) decide cosa rispondere"""
+
+    def __init__(self, gestore):
+        self.gestore = gestore
+        self.ricevute = []
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.settimeout(0.1)
+        self.porta = self.sock.getsockname()[1]
+        self._fermo = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while not self._fermo.is_set():
+            try:
+                query, mittente = self.sock.recvfrom(512)
+            except socket.timeout:
+                continue
+            self.ricevute.append(query)
+            self.gestore(query, lambda dati, mittente=mittente: self.sock.sendto(dati, mittente))
+
+    def close(self):
+        self._fermo.set()
+        self._thread.join()
+        self.sock.close()
+
+
+def risolvi_tutti(pipeline, ips, attesa=5):
+    """Accoda la query di ogni IP e restituisce {ip: hostname}"""
+    risultati = {}
+    completate = threading.Event()
+
+    def callback(ip):
+        def completa(hostname):
+            risultati[ip] = hostname
+            if len(risultati) == len(ips):
+                completate.set()
+        return completa
+
+    for ip in ips:
+        pipeline.query(ip, callback(ip))
+    completate.wait(attesa)
+    return risultati
+
+
+class ResolverLento(ReverseResolver):
+    """Resolver la cui risoluzione attende lo sblocco dal test"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.sblocca = threading.Event()
+        self.chiamate = 0
+
+    def lookup(self, ip):
+        self.chiamate += 1
+        self.sblocca.wait(5)
+        return "host.example"
+
+
+class TestReverseResolver(unittest.TestCase):
+    def test_annullamento_di_un_chiamante_non_tocca_gli_altri(self):
+        resolver = ResolverLento(timeout=5)
+        primo = resolver.resolve_async("192.0.2.1")
+        self.assertTrue(primo.cancel())
+        secondo = resolver.resolve_async("192.0.2.1")
+        self.assertFalse(secondo.cancelled())
+        resolver.sblocca.set()
+        self.assertEqual(secondo.result(2), "host.example")
+        # Una sola risoluzione condivisa, rimossa dalle richieste in corso
+        self.assertEqual(resolver.chiamate, 1)
+        self.assertEqual(resolver._pending, {})
+
+    def test_dopo_la_scadenza_la_richiesta_non_resta_in_corso(self):
+        resolver = ResolverLento(timeout=0.1)
+        self.assertIsNone(resolver.resolve_async("192.0.2.2").result(2))
+        self.assertEqual(resolver._pending, {})
+        resolver.sblocca.set()
+
+
+class TestPTRQueryPipeline(unittest.TestCase):
+    def avvia(self, gestore, **kwargs):
+        server = StubDNS(gestore)
+        self.addCleanup(server.close)
+        pipeline = PTRQueryPipeline("127.0.0.1", server.porta, **kwargs)
+        self.addCleanup(pipeline.close)
+        return server, pipeline
+
+    def test_query_in_pipeline_senza_attendere_le_risposte(self):
+        ips = [f"192.0.2.{n}" for n in range(1, 21)]
+        in_attesa = []
+
+        def gestore(query, invia):
+            # Risponde solo quando sono arrivate tutte, in ordine inverso
+            in_attesa.append((query, invia))
+            if len(in_attesa) == len(ips):
+                for query, invia in reversed(in_attesa):
+                    nome = nome_richiesto(query)
+                    invia(risposta_ptr(query, "host-" + nome.split(".")[0] + ".example"))
+
+        server, pipeline = self.avvia(gestore, timeout=3, retries=0)
+        risultati = risolvi_tutti(pipeline, ips)
+        self.assertEqual(risultati, {ip: f"host-{ip.rsplit('.', 1)[1]}.example" for ip in ips})
+        self.assertEqual(len(server.ricevute), len(ips))
+        self.assertEqual(len({query[:2] for query in server.ricevute}), len(ips))
+
+    def test_ritrasmissione_della_query_senza_risposta(self):
+        def gestore(query, invia):
+            # Il primo invio va perso
+            if len(server.ricevute) > 1:
+                invia(risposta_ptr(query, "ritentato.example"))
+
+        server, pipeline = self.avvia(gestore, timeout=1.5, retries=2)
+        self.assertEqual(risolvi_tutti(pipeline, ["192.0.2.1"]), {"192.0.2.1": "ritentato.example"})
+        self.assertEqual(len(server.ricevute), 2)
+        # La ritrasmissione riusa ID e domanda della query originale
+        self.assertEqual(server.ricevute[0], server.ricevute[1])
+
+    def test_senza_risposta_dopo_i_tentativi(self):
+        server, pipeline = self.avvia(lambda query, invia: None, timeout=0.6, retries=2)
+        self.assertEqual(risolvi_tutti(pipeline, ["192.0.2.1"]), {"192.0.2.1": None})
+        self.assertEqual(len(server.ricevute), 3)
+
+    def test_risposte_con_id_o_nome_diversi_ignorate(self):
+        def gestore(query, invia):
+            query_id = struct.unpack("!H", query[:2])[0]
+            altra_domanda = query[12:].replace(b"\x011\x01", b"\x019\x01", 1)
+            invia(risposta_ptr(query, "id-errato.example", query_id=query_id ^ 1))
+            invia(risposta_ptr(query, "nome-errato.example", domanda=altra_domanda))
+            invia(risposta_ptr(query, "corretto.example"))
+
+        server, pipeline = self.avvia(gestore, timeout=3, retries=0)
+        self.assertEqual(risolvi_tutti(pipeline, ["192.0.2.1"]), {"192.0.2.1": "corretto.example"})
+
+    def test_resolver_con_server_configurato(self):
+        server = StubDNS(lambda query, invia: invia(risposta_ptr(query, "stub.example")))
+        self.addCleanup(server.close)
+        resolver = ReverseResolver(timeout=2)
+        resolver.set_server("127.0.0.1", server.porta)
+        self.addCleanup(resolver.set_server, None)
+        self.assertEqual(resolver.resolve("192.0.2.7"), "stub.example")
+        # La seconda richiesta arriva dalla cache
+        self.assertEqual(resolver.resolve("192.0.2.7"), "stub.example")
+        self.assertEqual(len(server.ricevute), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Test delle specifiche di porte"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+from ip_scanner import IPScanner  # noqa: E402
+from port_spec import PortSet, parse_port_spec, top_ports  # noqa: E402
+
+
+class TestParsePortSpec(unittest.TestCase):
+    def test_porte_fuori_intervallo_rifiutate(self):
+        for spec in ("0", "0-10", "!0", "65536", "1-65536"):
+            with self.subTest(spec=spec), self.assertRaises(ValueError):
+                parse_port_spec(spec)
+        with self.assertRaises(ValueError):
+            PortSet([0])
+
+    def test_estremi_validi(self):
+        self.assertEqual(parse_port_spec("1,65535").to_spec(), "1,65535")
+        self.assertEqual(len(parse_port_spec("all")), 65535)
+
+    def test_porte_e_range(self):
+        self.assertEqual(list(parse_port_spec("80, 20-23,443")), [20, 21, 22, 23, 80, 443])
+        self.assertEqual(list(parse_port_spec("22-22")), [22])
+        with self.assertRaises(ValueError):
+            parse_port_spec("90-80")
+
+    def test_range_aperti(self):
+        self.assertEqual(parse_port_spec("-1024"), PortSet.from_range(1, 1024))
+        self.assertEqual(parse_port_spec("60000-"), PortSet.from_range(60000, 65535))
+        self.assertEqual(len(parse_port_spec("-")), 65535)
+
+    def test_profili(self):
+        self.assertEqual(parse_port_spec("web"), PortSet(config.WEB_PORTS))
+        self.assertEqual(parse_port_spec("DB"), PortSet(config.DB_PORTS))
+        self.assertEqual(parse_port_spec("tls,udp"), PortSet(config.TLS_PORTS) | PortSet(config.UDP_PORTS))
+
+    def test_profilo_comuni_uguale_alle_porte_di_default(self):
+        self.assertEqual(parse_port_spec("comuni"), PortSet(IPScanner().porte_comuni))
+
+    def test_top_n(self):
+        self.assertEqual(parse_port_spec("top10"), PortSet(top_ports(10)))
+        self.assertEqual(len(parse_port_spec("top100")), 100)
+        self.assertEqual(parse_port_spec("top10,!80"), PortSet(top_ports(10)) - PortSet([80]))
+
+    def test_esclusioni(self):
+        self.assertEqual(list(parse_port_spec("1-10,!5,!7-8")), [1, 2, 3, 4, 6, 9, 10])
+        self.assertEqual(list(parse_port_spec("!5,1-10,! 9-")), [1, 2, 3, 4, 6, 7, 8])
+        with self.assertRaises(ValueError):
+            parse_port_spec("80,!80")
+
+    def test_solo_esclusioni_partono_dalle_porte_comuni(self):
+        attese = PortSet(config.PORTE_COMUNI) - PortSet([22, 80])
+        self.assertEqual(parse_port_spec("!22,!80"), attese)
+
+    def test_elementi_non_validi(self):
+        for spec in ("", ",", "abc", "22,http", "top", "1-2-3", "!"):
+            with self.subTest(spec=spec), self.assertRaises(ValueError):
+                parse_port_spec(spec)
+
+    def test_to_spec_riletta_da_parse(self):
+        self.assertEqual(parse_port_spec("443,22,80-90,81").to_spec(), "22,80-90,443")
+        for spec in ("top100,web,!8080", "-1024,60000-", "comuni,!1-100", "65535"):
+            with self.subTest(spec=spec):
+                porte = parse_port_spec(spec)
+                self.assertEqual(parse_port_spec(porte.to_spec()), porte)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Test del controllo della velocità"""
+
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rate_control import AdaptiveWindow, RateLimitedSemaphore  # noqa: E402
+
+
+class TestRateLimitedSemaphore(unittest.TestCase):
+    def test_annullamento_durante_attesa_gettone_rilascia_il_permesso(self):
+        async def scenario():
+            semaforo = RateLimitedSemaphore(1, pps=1)
+            # Il primo ingresso consuma l'unico gettone disponibile
+            async with semaforo:
+                pass
+
+            async def in_attesa():
+                async with semaforo:
+                    pass
+
+            task = asyncio.ensure_future(in_attesa())
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            # Il permesso è di nuovo libero: un nuovo ingresso non resta bloccato
+            self.assertFalse(semaforo._semaforo.locked())
+            await asyncio.wait_for(semaforo.__aenter__(), 2)
+            await semaforo.__aexit__(None, None, None)
+
+        asyncio.run(scenario())
+
+    def test_finestra_limita_le_sonde_ammesse(self):
+        async def scenario():
+            finestra = AdaptiveWindow(8, minimo=1, iniziale=2)
+            semaforo = RateLimitedSemaphore(8, finestra=finestra)
+            dentro = massimo = 0
+
+            async def sonda():
+                nonlocal dentro, massimo
+                async with semaforo:
+                    dentro += 1
+                    massimo = max(massimo, dentro)
+                    await asyncio.sleep(0.01)
+                    dentro -= 1
+
+            await asyncio.gather(*[sonda() for _ in range(10)])
+            self.assertEqual(massimo, 2)
+            # La finestra cresciuta lascia entrare più sonde
+            finestra.limit = 5
+            massimo = 0
+            await asyncio.gather(*[sonda() for _ in range(10)])
+            self.assertEqual(massimo, 5)
+
+        asyncio.run(scenario())
+
+    def test_annullamento_durante_attesa_finestra_rilascia_il_permesso(self):
+        async def scenario():
+            semaforo = RateLimitedSemaphore(2, finestra=AdaptiveWindow(2, minimo=1, iniziale=1))
+            await semaforo.__aenter__()
+            task = asyncio.ensure_future(semaforo.__aenter__())
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            await semaforo.__aexit__(None, None, None)
+            # Entrambi i permessi e il posto nella finestra sono di nuovo liberi
+            await asyncio.wait_for(semaforo.__aenter__(), 2)
+            self.assertFalse(semaforo._semaforo.locked())
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Test del registro porte/servizi"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from service_registry import SCONOSCIUTO, SERVICE_FILES, ServiceRegistry  # noqa: E402
+
+TABELLA = next(percorso for percorso in SERVICE_FILES if percorso.endswith("service-ports.txt"))
+
+
+class TestServiceRegistry(unittest.TestCase):
+    def test_tabella_distribuita_copre_porte_fuori_dai_nomi_noti(self):
+        registro = ServiceRegistry([TABELLA])
+        self.assertEqual(registro.name(2222), "ETHERNET-IP-1")
+        self.assertEqual(registro.name(6379), "Redis")
+        self.assertEqual(registro.name(49151), SCONOSCIUTO)
+
+    def test_nome_dipende_dal_protocollo(self):
+        registro = ServiceRegistry([TABELLA])
+        self.assertEqual(registro.name(513, "tcp"), "LOGIN")
+        self.assertEqual(registro.name(513, "udp"), "WHO")
+
+    def test_file_mancanti_ignorati(self):
+        registro = ServiceRegistry([os.path.join(os.path.dirname(TABELLA), "inesistente.txt")])
+        self.assertEqual(registro.name(22), "SSH")
+        self.assertEqual(registro.name(2222), SCONOSCIUTO)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Test della scansione UDP"""
+
+import os
+import socket
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from udp_scan import APERTA, APERTA_FILTRATA, CHIUSA, udp_scan  # noqa: E402
+
+
+def server_tftp(sock):
+    """Risponde alla prima richiesta con un errore inviato da una nuova porta (TID)"""
+    _, mittente = sock.recvfrom(512)
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as tid:
+        tid.bind(("127.0.0.1", 0))
+        tid.sendto(b"\x00\x05\x00\x01File not found\x00", mittente)
+
+
+class TestUdpScan(unittest.TestCase):
+    def test_risposta_tftp_da_nuova_porta(self):
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.bind(("127.0.0.1", 69))
+        except OSError as e:
+            self.skipTest(f"porta 69 non disponibile: {e}")
+        with sock:
+            server = threading.Thread(target=server_tftp, args=(sock,), daemon=True)
+            server.start()
+            risultati = dict(udp_scan(["127.0.0.1"], [69], timeout=1.0))
+            server.join(2)
+        self.assertEqual(risultati, {"127.0.0.1": {69: APERTA}})
+
+    def test_risposta_da_altra_porta_non_tid_ignorata(self):
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.bind(("127.0.0.1", 0))
+            porta = sock.getsockname()[1]
+            server = threading.Thread(target=server_tftp, args=(sock,), daemon=True)
+            server.start()
+            risultati = dict(udp_scan(["127.0.0.1"], [porta], timeout=0.5))
+            server.join(2)
+        self.assertEqual(risultati, {"127.0.0.1": {porta: APERTA_FILTRATA}})
+
+    def test_esiti_delle_prime_sonde_registrati_nella_finestra(self):
+        class Finestra:
+            limit = 1
+
+            def __init__(self):
+                self.esiti = []
+
+            def record(self, scaduta):
+                self.esiti.append(scaduta)
+
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as muto, \
+                socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as chiusa:
+            muto.bind(("127.0.0.1", 0))
+            chiusa.bind(("127.0.0.1", 0))
+            porte = [muto.getsockname()[1], chiusa.getsockname()[1]]
+            # Porta libera: il kernel risponde con ICMP port unreachable
+            chiusa.close()
+            finestra = Finestra()
+            risultati = dict(udp_scan(["127.0.0.1"], porte, timeout=0.3, tentativi=1, finestra=finestra))
+        self.assertEqual(risultati["127.0.0.1"], {porte[0]: APERTA_FILTRATA, porte[1]: CHIUSA})
+        # Una sola voce per porta: i tentativi ripetuti non contano
+        self.assertEqual(sorted(finestra.esiti), [False, True])
+
+
+if __name__ == "__main__":
+    unittest.main()
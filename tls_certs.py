@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Certificati TLS per IP Scanner
+Handshake TLS sulle porte aperte e lettura di soggetto, SAN, emittente e scadenza
+"""
+
+import asyncio
+import errno
+import functools
+import heapq
+import ipaddress
+import itertools
+import selectors
+import socket
+import ssl
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+# Codici di connect_ex di una connessione non bloccante avviata
+_ERRNO_AVVIATA = {0, errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN, errno.EALREADY}
+
+# Attributi dei nomi X.509 (OID -> sigla)
+_ATTRIBUTI_NOME = {
+    "2.5.4.3": "CN",
+    "2.5.4.6": "C",
+    "2.5.4.7": "L",
+    "2.5.4.8": "ST",
+    "2.5.4.10": "O",
+    "2.5.4.11": "OU",
+    "1.2.840.113549.1.9.1": "emailAddress",
+}
+
+_OID_SAN = "2.5.29.17"
+
+
+def _tlv(dati, pos):
+    """Legge un elemento DER: (tag, inizio del contenuto, fine)"""
+    if pos + 2 > len(dati):
+        raise ValueError("elemento DER troncato")
+    tag, lunghezza = dati[pos], dati[pos + 1]
+    pos += 2
+    if lunghezza & 0x80:
+        byte_lunghezza = lunghezza & 0x7F
+        lunghezza = int.from_bytes(dati[pos:pos + byte_lunghezza], "big")
+        pos += byte_lunghezza
+    if pos + lunghezza > len(dati):
+        raise ValueError("elemento DER troncato")
+    return tag, pos, pos + lunghezza
+
+
+def _figli(dati, inizio, fine):
+    """Elementi contenuti in una SEQUENCE/SET DER"""
+    elementi = []
+    while inizio < fine:
+        tag, da, a = _tlv(dati, inizio)
+        elementi.append((tag, da, a))
+        inizio = a
+    return elementi
+
+
+def _oid(valore):
+    numeri = []
+    corrente = 0
+    for byte in valore:
+        corrente = (corrente << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            numeri.append(corrente)
+            corrente = 0
+    if not numeri:
+        return ""
+    primo = min(numeri[0] // 40, 2)
+    return ".".join(map(str, [primo, numeri[0] - primo * 40] + numeri[1:]))
+
+
+def _stringa(tag, valore):
+    if tag == 0x1E:  # BMPString
+        return valore.decode("utf-16-be", "replace")
+    return valore.decode("utf-8" if tag == 0x0C else "latin-1", "replace")
+
+
+def _nome(dati, inizio, fine):
+    """Nome X.509 come testo 'CN=..., O=...'"""
+    parti = []
+    for _, da_set, a_set in _figli(dati, inizio, fine):
+        for _, da, a in _figli(dati, da_set, a_set):
+            (_, da_oid, a_oid), (tag, da_val, a_val) = _figli(dati, da, a)[:2]
+            oid = _oid(dati[da_oid:a_oid])
+            parti.append(f"{_ATTRIBUTI_NOME.get(oid, oid)}={_stringa(tag, dati[da_val:a_val])}")
+    return ", ".join(parti)
+
+
+def _tempo(tag, valore):
+    """UTCTime/GeneralizedTime in formato ISO 8601 (UTC)"""
+    testo = valore.decode("ascii", "replace").rstrip("Z")
+    if tag == 0x17:
+        anno = int(testo[:2])
+        testo = ("19" if anno >= 50 else "20") + testo
+    return f"{testo[:4]}-{testo[4:6]}-{testo[6:8]}T{testo[8:10]}:{testo[10:12]}:{testo[12:14]}Z"
+
+
+def _san(dati, inizio, fine):
+    """Nomi DNS e indirizzi IP dell'estensione subjectAltName"""
+    nomi = []
+    _, da, a = _tlv(dati, inizio)
+    for tag, da_nome, a_nome in _figli(dati, da, a):
+        if tag == 0x82:
+            nomi.append(dati[da_nome:a_nome].decode("ascii", "replace"))
+        elif tag == 0x87 and a_nome - da_nome in (4, 16):
+            nomi.append(str(ipaddress.ip_address(dati[da_nome:a_nome])))
+    return nomi
+
+
+def parse_certificate(der):
+    """Soggetto, SAN, emittente e scadenza di un certificato X.509 (DER).
+
+    Restituisce un dizionario con le chiavi 'soggetto', 'san',
+    'emittente', 'valido_dal' e 'scadenza'. Solleva ValueError se il
+    certificato è malformato.
+    """
+    try:
+        _, da, a = _tlv(der, 0)
+        _, da_tbs, a_tbs = _tlv(der, da)
+        campi = _figli(der, da_tbs, a_tbs)
+        if campi and campi[0][0] == 0xA0:
+            campi = campi[1:]
+        # serial, algoritmo, emittente, validità, soggetto, chiave pubblica, [estensioni]
+        emittente, validita, soggetto = campi[2], campi[3], campi[4]
+        inizio_validita, fine_validita = _figli(der, validita[1], validita[2])[:2]
+        certificato = {
+            'soggetto': _nome(der, soggetto[1], soggetto[2]),
+            'san': [],
+            'emittente': _nome(der, emittente[1], emittente[2]),
+            'valido_dal': _tempo(inizio_validita[0], der[inizio_validita[1]:inizio_validita[2]]),
+            'scadenza': _tempo(fine_validita[0], der[fine_validita[1]:fine_validita[2]]),
+        }
+        for tag, da_ext, a_ext in campi[6:]:
+            if tag != 0xA3:
+                continue
+            _, da_seq, a_seq = _tlv(der, da_ext)
+            for _, da_voce, a_voce in _figli(der, da_seq, a_seq):
+                parti = _figli(der, da_voce, a_voce)
+                if _oid(der[parti[0][1]:parti[0][2]]) == _OID_SAN:
+                    certificato['san'] = _san(der, parti[-1][1], parti[-1][2])
+        return certificato
+    except (IndexError, ValueError) as e:
+        raise ValueError(f"certificato non valido: {e}")
+
+
+@functools.lru_cache(maxsize=None)
+def _contesto():
+    """Contesto TLS client che accetta qualsiasi certificato (si raccoglie, non si verifica)"""
+    contesto = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    contesto.check_hostname = False
+    contesto.verify_mode = ssl.CERT_NONE
+    try:
+        # Anche i server vecchi o con chiavi deboli mostrano il certificato
+        contesto.set_ciphers("ALL:@SECLEVEL=0")
+    except ssl.SSLError:
+        pass
+    return contesto
+
+
+def _certificato(der):
+    if not der:
+        return None
+    try:
+        return parse_certificate(der)
+    except ValueError:
+        return None
+
+
+class _Handshake:
+    """Stato di un handshake in corso"""
+
+    __slots__ = ('future', 'sock', 'tls')
+
+    def __init__(self, future, sock):
+        self.future = future
+        self.sock = sock
+        self.tls = False
+
+
+class CertificateCollector:
+    """Handshake TLS non bloccanti con un unico thread e un selettore.
+
+    Come il BannerGrabber, non occupa i worker del pool delle sonde: al
+    massimo max_inflight handshake sono in corso, gli altri attendono in
+    coda, e ognuno ha una scadenza di timeout secondi dalla connessione.
+    """
+
+    def __init__(self, timeout=3.0, max_inflight=64):
+        self.timeout = timeout
+        self.max_inflight = max_inflight
+        self._contesto = _contesto()
+
+        self._selector = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ)
+
+        self._lock = threading.Lock()
+        self._waiting = deque()
+        self._inflight = set()
+        self._timers = []
+        self._counter = itertools.count()
+        self._closed = False
+        self._thread = threading.Thread(target=self._loop, name="tls", daemon=True)
+        self._thread.start()
+
+    def collect(self, ip, porta):
+        """Accoda l'handshake; la Future restituisce il certificato o None"""
+        future = Future()
+        with self._lock:
+            self._waiting.append((str(ip), porta, future))
+        self._wake()
+        return future
+
+    def close(self):
+        """Ferma il thread; gli handshake non completati restituiscono None"""
+        self._closed = True
+        self._wake()
+        self._thread.join()
+        self._selector.close()
+        self._wake_r.close()
+        self._wake_w.close()
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b"\x00")
+        except OSError:
+            pass
+
+    def _start_waiting(self):
+        with self._lock:
+            da_avviare = []
+            while self._waiting and len(self._inflight) + len(da_avviare) < self.max_inflight:
+                da_avviare.append(self._waiting.popleft())
+        for ip, porta, future in da_avviare:
+            try:
+                sock = socket.socket(socket.AF_INET6 if ":" in ip else socket.AF_INET, socket.SOCK_STREAM)
+            except OSError:
+                future.set_result(None)
+                continue
+            sock.setblocking(False)
+            if sock.connect_ex((ip, porta)) not in _ERRNO_AVVIATA:
+                sock.close()
+                future.set_result(None)
+                continue
+            handshake = _Handshake(future, sock)
+            self._inflight.add(handshake)
+            self._selector.register(sock, selectors.EVENT_WRITE, handshake)
+            heapq.heappush(self._timers, (time.monotonic() + self.timeout, next(self._counter), handshake))
+
+    def _finish(self, handshake, der=None):
+        if handshake not in self._inflight:
+            return
+        self._inflight.discard(handshake)
+        try:
+            self._selector.unregister(handshake.sock)
+        except (KeyError, ValueError):
+            pass
+        handshake.sock.close()
+        handshake.future.set_result(_certificato(der))
+
+    def _handle(self, handshake):
+        if not handshake.tls:
+            # Connessione completata (o fallita): si avvia il TLS sullo stesso socket
+            sock = handshake.sock
+            if sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) != 0:
+                self._finish(handshake)
+                return
+            self._selector.unregister(sock)
+            try:
+                handshake.sock = self._contesto.wrap_socket(sock, do_handshake_on_connect=False)
+            except (ssl.SSLError, OSError):
+                self._finish(handshake)
+                return
+            handshake.tls = True
+            self._selector.register(handshake.sock, selectors.EVENT_WRITE, handshake)
+        try:
+            handshake.sock.do_handshake()
+        except ssl.SSLWantReadError:
+            self._selector.modify(handshake.sock, selectors.EVENT_READ, handshake)
+        except ssl.SSLWantWriteError:
+            self._selector.modify(handshake.sock, selectors.EVENT_WRITE, handshake)
+        except (ssl.SSLError, OSError):
+            self._finish(handshake)
+        else:
+            self._finish(handshake, handshake.sock.getpeercert(binary_form=True))
+
+    def _expire(self):
+        adesso = time.monotonic()
+        while self._timers and self._timers[0][0] <= adesso:
+            _, _, handshake = heapq.heappop(self._timers)
+            self._finish(handshake)
+
+    def _loop(self):
+        while not self._closed:
+            self._start_waiting()
+            attesa = max(0, self._timers[0][0] - time.monotonic()) if self._timers else None
+            for chiave, _ in self._selector.select(attesa):
+                if chiave.fileobj is self._wake_r:
+                    try:
+                        while self._wake_r.recv(4096):
+                            pass
+                    except (BlockingIOError, InterruptedError):
+                        pass
+                elif chiave.data in self._inflight:
+                    self._handle(chiave.data)
+            self._expire()
+        for handshake in list(self._inflight):
+            self._finish(handshake)
+        with self._lock:
+            in_attesa, self._waiting = self._waiting, deque()
+        for _, _, future in in_attesa:
+            future.set_result(None)
+
+
+async def collect_certificate_async(ip, porta, timeout=3.0):
+    """Certificato di una porta TLS letto sull'event loop corrente (None se assente)"""
+    writer = None
+    try:
+        _, writer = await asyncio.wait_for(
+            asyncio.open_connection(ip, porta, ssl=_contesto(), server_hostname=None), timeout)
+        return _certificato(writer.get_extra_info("ssl_object").getpeercert(binary_form=True))
+    except (OSError, ssl.SSLError, asyncio.TimeoutError):
+        return None
+    finally:
+        if writer is not None:
+            writer.close()
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Scansione UDP per IP Scanner
+Sonde con payload specifici per protocollo, poche socket e un unico ciclo di ricezione
+"""
+
+import heapq
+import os
+import select
+import socket
+import struct
+import sys
+import time
+from collections import deque
+
+from port_states import APERTA, APERTA_FILTRATA, CHIUSA
+from rate_control import TokenBucket
+
+# Costanti Linux per gli errori ICMP sulle socket non connesse
+# (il modulo socket non le esporta tutte)
+ERRORI_ICMP_DISPONIBILI = sys.platform.startswith('linux')
+IP_RECVERR = 11
+IPV6_RECVERR = 25
+MSG_ERRQUEUE = getattr(socket, 'MSG_ERRQUEUE', 0x2000)
+SO_EE_ORIGIN_ICMP = 2
+SO_EE_ORIGIN_ICMP6 = 3
+_ERRORE_ESTESO = struct.Struct("=IBBBBII")
+
+# Sonde inviate per lotto prima di tornare a leggere le risposte
+LOTTO_INVII = 256
+
+
+def _der(tag, contenuto):
+    """Elemento BER/DER con lunghezza in forma corta o lunga"""
+    lunghezza = len(contenuto)
+    if lunghezza < 0x80:
+        return bytes([tag, lunghezza]) + contenuto
+    byte_lunghezza = lunghezza.to_bytes((lunghezza.bit_length() + 7) // 8, "big")
+    return bytes([tag, 0x80 | len(byte_lunghezza)]) + byte_lunghezza + contenuto
+
+
+def dns_probe():
+    """Query DNS version.bind TXT CH: anche un rifiuto dimostra che la porta è aperta"""
+    header = struct.pack("!HHHHHH", int.from_bytes(os.urandom(2), "big"), 0x0100, 1, 0, 0, 0)
+    return header + b"\x07version\x04bind\x00" + struct.pack("!HH", 16, 3)
+
+
+def ntp_probe():
+    """Richiesta NTP v3 in modalità client"""
+    return b"\x1b" + b"\x00" * 47
+
+
+def snmp_probe(community=b"public"):
+    """SNMPv1 GetRequest di sysDescr.0 con la community indicata"""
+    varbind = _der(0x30, _der(0x06, bytes([0x2B, 6, 1, 2, 1, 1, 1, 0])) + b"\x05\x00")
+    pdu = _der(0xA0, _der(0x02, os.urandom(2)) + _der(0x02, b"\x00") + _der(0x02, b"\x00")
+               + _der(0x30, varbind))
+    return _der(0x30, _der(0x02, b"\x00") + _der(0x04, community) + pdu)
+
+
+def netbios_probe():
+    """Richiesta NetBIOS Node Status (NBSTAT) del nome jolly '*'"""
+    header = struct.pack("!HHHHHH", int.from_bytes(os.urandom(2), "big"), 0, 1, 0, 0, 0)
+    # '*' seguito da 15 byte nulli, in codifica "first level" (ogni nibble + 'A')
+    nome = b"CK" + b"AA" * 15
+    return header + b"\x20" + nome + b"\x00" + struct.pack("!HH", 0x21, 1)
+
+
+def tftp_probe():
+    """Lettura TFTP di un file inesistente: il server risponde con un errore"""
+    return b"\x00\x01ipscanner-probe\x00octet\x00"
+
+
+# Porte i cui server rispondono da una nuova porta sorgente (il TID di TFTP):
+# le risposte si abbinano per IP e socket di invio
+PORTE_TID = (69,)
+
+# Payload per porta; le altre ricevono un datagramma vuoto
+SONDE_UDP = {
+    53: dns_probe,
+    69: tftp_probe,
+    123: ntp_probe,
+    137: netbios_probe,
+    161: snmp_probe,
+}
+
+
+def udp_payload(porta):
+    """Payload della sonda per una porta UDP"""
+    sonda = SONDE_UDP.get(porta)
+    return sonda() if sonda else b""
+
+
+def _apri_socket(famiglia):
+    sock = socket.socket(famiglia, socket.SOCK_DGRAM)
+    sock.setblocking(False)
+    if not ERRORI_ICMP_DISPONIBILI:
+        return sock, False
+    errori_icmp = False
+    try:
+        # Linux: gli errori ICMP arrivano sulla coda errori con l'indirizzo di destinazione
+        if famiglia == socket.AF_INET6:
+            sock.setsockopt(socket.IPPROTO_IPV6, IPV6_RECVERR, 1)
+        else:
+            sock.setsockopt(socket.IPPROTO_IP, IP_RECVERR, 1)
+        errori_icmp = True
+    except OSError:
+        pass
+    return sock, errori_icmp
+
+
+def _stato_da_icmp(ancdata):
+    """Stato della porta da un errore ICMP della coda errori (None se non pertinente)"""
+    for _, _, dati in ancdata:
+        if len(dati) < _ERRORE_ESTESO.size:
+            continue
+        _, origine, tipo, codice, _, _, _ = _ERRORE_ESTESO.unpack(dati[:_ERRORE_ESTESO.size])
+        if origine == SO_EE_ORIGIN_ICMP and tipo == 3:
+            # Destination unreachable: port unreachable = chiusa, il resto = filtrata
+            return CHIUSA if codice == 3 else APERTA_FILTRATA
+        if origine == SO_EE_ORIGIN_ICMP6 and tipo == 1:
+            return CHIUSA if codice == 4 else APERTA_FILTRATA
+    return None
+
+
+def udp_scan(hosts, porte, timeout=1.0, max_inflight=4096, sockets=4, pps=None, rtt=None, tentativi=0,
+             finestra=None):
+    """Scansione UDP di tutte le porte degli host indicati.
+
+    Le sonde partono a lotti da poche socket condivise (sockets per
+    famiglia di indirizzi) e un unico ciclo di ricezione le abbina alle
+    risposte per indirizzo e porta sorgente. Al massimo max_inflight
+    sonde attendono risposta, quindi la memoria non dipende dal numero
+    di host; pps limita le sonde al secondo. Una risposta indica una
+    porta aperta, un ICMP port unreachable (dove il sistema lo riporta
+    alle socket non connesse, come su Linux) una porta chiusa, il
+    silenzio entro timeout una porta aperta|filtrata. Per le PORTE_TID
+    vale anche una risposta dello stesso host da un'altra porta, se
+    arriva sulla socket che ha inviato la sonda. Le sonde senza
+    risposta vengono ripetute fino a tentativi volte prima di
+    concludere aperta|filtrata. Con un RttEstimator (rtt) ogni sonda
+    attende il timeout stimato per il suo host (raddoppiato a ogni
+    ripetizione) e le risposte alle sonde non ripetute aggiornano la stima.
+    Con una AdaptiveWindow (finestra) le sonde in volo sono al massimo
+    finestra.limit, che si adatta alla quota di prime sonde senza risposta.
+    Produce le coppie (ip, {porta: stato}) man mano che gli host sono completi.
+    """
+    porte = list(porte)
+    if not porte:
+        return
+    socket_aperte = {}
+    turno = [0]
+
+    def socket_per(ip):
+        famiglia = socket.AF_INET6 if ":" in ip else socket.AF_INET
+        if famiglia not in socket_aperte:
+            socket_aperte[famiglia] = [_apri_socket(famiglia) for _ in range(max(1, sockets))]
+        turno[0] += 1
+        return socket_aperte[famiglia][turno[0] % len(socket_aperte[famiglia])][0]
+
+    sonde = ((str(ip), porta) for ip in hosts for porta in porte)
+    sospesa = None
+    esaurite = False
+    # (ip, porta) -> (scadenza, invio); scadenze è un heap di (scadenza, (ip, porta))
+    in_volo = {}
+    scadenze = []
+    esiti = {}
+    secchio = TokenBucket(pps) if pps else None
+    # Sonde scadute da ripetere e (ip, porta) -> tentativi già ripetuti
+    da_ritentare = deque()
+    ritentate = {}
+    # (ip, porta TID) -> socket che ha inviato la sonda
+    socket_tid = {}
+
+    def risposta(sonda):
+        """Toglie una sonda dal volo aggiornando la stima RTT (False se non attesa)"""
+        voce = in_volo.pop(sonda, None)
+        if voce is None:
+            return False
+        # Algoritmo di Karn: la risposta a una sonda ripetuta non dà un RTT affidabile
+        if ritentate.pop(sonda, None) is None:
+            if rtt is not None:
+                rtt.update(sonda[0], time.monotonic() - voce[1])
+            if finestra is not None:
+                finestra.record(False)
+        return True
+
+    def limite():
+        return min(max_inflight, finestra.limit) if finestra is not None else max_inflight
+
+    def completa(ip, porta, stato):
+        socket_tid.pop((ip, porta), None)
+        risultati = esiti[ip]
+        risultati[porta] = stato
+        if len(risultati) == len(porte):
+            del esiti[ip]
+            return ip, dict(sorted(risultati.items()))
+        return None
+
+    try:
+        while True:
+            completati = []
+            adesso = time.monotonic()
+
+            # Invio di un lotto di sonde
+            inviate = 0
+            while (da_ritentare or not esaurite) and len(in_volo) < limite() and inviate < LOTTO_INVII:
+                if secchio is not None and secchio.delay():
+                    break
+                sonda = sospesa or (da_ritentare.popleft() if da_ritentare else next(sonde, None))
+                sospesa = None
+                if sonda is None:
+                    esaurite = True
+                    break
+                ip, porta = sonda
+                esiti.setdefault(ip, {})
+                sock = socket_per(ip)
+                try:
+                    try:
+                        sock.sendto(udp_payload(porta), (ip, porta))
+                    except (BlockingIOError, InterruptedError):
+                        raise
+                    except OSError:
+                        # Errore ICMP in sospeso di una sonda precedente (già nella
+                        # coda errori): viene riportato una sola volta, si ritenta
+                        sock.sendto(udp_payload(porta), (ip, porta))
+                except (BlockingIOError, InterruptedError):
+                    # Buffer di invio pieno: si riprova dopo aver letto
+                    sospesa = sonda
+                    break
+                except OSError:
+                    # Rete irraggiungibile: nessuna risposta possibile
+                    ritentate.pop(sonda, None)
+                    completato = completa(ip, porta, APERTA_FILTRATA)
+                    if completato:
+                        completati.append(completato)
+                    continue
+                inviate += 1
+                if porta in PORTE_TID:
+                    socket_tid[sonda] = sock
+                if rtt is not None:
+                    scadenza = adesso + min(timeout, rtt.timeout(ip) * 2 ** ritentate.get(sonda, 0))
+                else:
+                    scadenza = adesso + timeout
+                in_volo[sonda] = (scadenza, adesso)
+                heapq.heappush(scadenze, (scadenza, sonda))
+                if secchio is not None:
+                    secchio.consume()
+            yield from completati
+            completati = []
+
+            if esaurite and not in_volo and sospesa is None and not da_ritentare:
+                return
+
+            # Attesa delle risposte fino alla prossima scadenza o al prossimo invio
+            attesa = scadenze[0][0] - time.monotonic() if scadenze else 0.1
+            if (da_ritentare or not esaurite) and len(in_volo) < limite():
+                attesa = min(attesa, secchio.delay() if secchio is not None else 0)
+            if sospesa is not None:
+                attesa = min(attesa, 0.01)
+            tutte = [sock for gruppo in socket_aperte.values() for sock, _ in gruppo]
+            errori_icmp = {sock for gruppo in socket_aperte.values() for sock, errori in gruppo if errori}
+            pronte, _, _ = select.select(tutte, [], [], max(0, attesa)) if tutte else ([], [], [])
+
+            for sock in pronte:
+                if sock in errori_icmp:
+                    while True:
+                        try:
+                            _, ancdata, _, indirizzo = sock.recvmsg(512, 512, MSG_ERRQUEUE)
+                        except (BlockingIOError, InterruptedError):
+                            break
+                        except OSError:
+                            break
+                        sonda = (indirizzo[0], indirizzo[1])
+                        stato = _stato_da_icmp(ancdata)
+                        if stato and risposta(sonda):
+                            completato = completa(sonda[0], sonda[1], stato)
+                            if completato:
+                                completati.append(completato)
+                while True:
+                    try:
+                        _, indirizzo = sock.recvfrom(4096)
+                    except (BlockingIOError, InterruptedError):
+                        break
+                    except OSError:
+                        # Errore ICMP riportato senza indirizzo (già letto dalla coda errori)
+                        continue
+                    sonda = (indirizzo[0], indirizzo[1])
+                    if sonda not in in_volo:
+                        sonda = next((chiave for chiave in ((indirizzo[0], porta) for porta in PORTE_TID)
+                                      if socket_tid.get(chiave) is sock), sonda)
+                    if risposta(sonda):
+                        completato = completa(sonda[0], sonda[1], APERTA)
+                        if completato:
+                            completati.append(completato)
+
+            # Sonde senza risposta entro il timeout
+            adesso = time.monotonic()
+            while scadenze and scadenze[0][0] <= adesso:
+                scadenza, sonda = heapq.heappop(scadenze)
+                if in_volo.get(sonda, (None,))[0] == scadenza:
+                    del in_volo[sonda]
+                    ripetute = ritentate.get(sonda, 0)
+                    if finestra is not None and not ripetute:
+                        finestra.record(True)
+                    if ripetute < tentativi:
+                        ritentate[sonda] = ripetute + 1
+                        da_ritentare.append(sonda)
+                        continue
+                    ritentate.pop(sonda, None)
+                    completato = completa(sonda[0], sonda[1], APERTA_FILTRATA)
+                    if completato:
+                        completati.append(completato)
+            yield from completati
+    finally:
+        for gruppo in socket_aperte.values():
+            for sock, _ in gruppo:
+                sock.close()